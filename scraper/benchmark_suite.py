@@ -0,0 +1,328 @@
+"""
+Suite de benchmarks offline
+Demuestra: catálogos sintéticos reproducibles, tiempos repetidos (mínimo y mediana), resultados en JSON, comparación entre versiones
+
+A diferencia de test_system.py (que necesita el backend en marcha), todo
+se ejecuta en local: el caché en una carpeta temporal y la BD en SQLite.
+Cada ejecución escribe un JSON con la configuración, el entorno y los
+tiempos de cada ruta caliente; compare() lo contrasta con uno anterior.
+
+Uso:
+    python benchmark_suite.py --titles 50000 --overlap 0.4 --repeat 5
+    python benchmark_suite.py --compare benchmarks/bench-20261001-120000.json
+"""
+
+import argparse
+import json
+import os
+import platform as platform_info
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+
+from cache_manager import CacheManager, SyncManager
+from db import create_sqlite_database
+from platforms import PLATFORM_MAP
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = os.path.join(os.path.dirname(__file__), 'benchmarks')
+FORMAT_VERSION = 1
+
+# Un tiempo mínimo mayor que el anterior en más de este margen es una regresión
+REGRESSION_THRESHOLD = 0.2
+
+
+def generate_catalogue(titles: int = 10000, platforms: Sequence[str] = None,
+                       overlap: float = 0.3, seed: int = 42) -> Dict:
+    """
+    Catálogo sintético reproducible
+
+    Cada título está en una plataforma; una fracción overlap de ellos está
+    además en una o dos más. Las filas scrapeadas repiten cada título por
+    plataforma con variaciones de mayúsculas, acentos, año y nota, y la
+    mitad trae tmdb_id (como las de la API de TMDB).
+
+    Args:
+        titles: Títulos del catálogo de TMDB
+        platforms: Plataformas (por defecto, todas las de PLATFORM_MAP)
+        overlap: Fracción de títulos en más de una plataforma (0-1)
+        seed: Semilla del generador
+
+    Returns:
+        tmdb (películas de TMDB), scraped (filas scrapeadas) y by_platform
+        (películas de cada plataforma con el formato del caché)
+    """
+    if not 0 <= overlap <= 1:
+        raise ValueError(f"overlap debe estar entre 0 y 1: {overlap}")
+    platforms = list(platforms or PLATFORM_MAP)
+    unknown = [p for p in platforms if p not in PLATFORM_MAP]
+    if unknown:
+        raise ValueError(f"Plataformas desconocidas: {unknown}")
+
+    rng = random.Random(seed)
+    tmdb, scraped = [], []
+    by_platform = {p: [] for p in platforms}
+    for i in range(titles):
+        available = [rng.choice(platforms)]
+        if len(platforms) > 1 and rng.random() < overlap:
+            others = [p for p in platforms if p != available[0]]
+            available += rng.sample(others, min(len(others), rng.randint(1, 2)))
+        movie = {
+            'id': 500000 + i,
+            'title': f'Película número {i}: la secuela',
+            'year': 1970 + i % 55,
+            'rating': round(rng.uniform(3, 9), 1),
+            'platforms': sorted(available, key=PLATFORM_MAP.get)
+        }
+        tmdb.append(movie)
+        for platform in available:
+            by_platform[platform].append({**movie, 'platforms': [platform], 'source': 'synthetic'})
+            row = {
+                'title': movie['title'].upper().replace('ú', 'u'),
+                'year': movie['year'] if rng.random() > 0.02 else movie['year'] + 1,
+                'rating': round(movie['rating'] + rng.uniform(-1.5, 1.5), 1),
+                'platforms': [platform]
+            }
+            if rng.random() < 0.5:
+                row['tmdb_id'] = movie['id']
+            scraped.append(row)
+    return {'tmdb': tmdb, 'scraped': scraped, 'by_platform': by_platform}
+
+
+def measure(func: Callable, repeat: int = 3, setup: Callable = None, items: int = None) -> Dict:
+    """
+    Ejecutar func repeat veces y resumir los tiempos
+
+    Args:
+        func: Función sin argumentos (recibe el valor de setup si lo hay)
+        repeat: Repeticiones
+        setup: Preparación de cada repetición, fuera del tiempo medido
+        items: Elementos procesados por repetición (para items_per_second)
+
+    Returns:
+        seconds_min, seconds_median, seconds_max, runs e items_per_second
+    """
+    runs = []
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        runs.append(time.perf_counter() - start)
+    result = {
+        'repeat': repeat,
+        'seconds_min': round(min(runs), 6),
+        'seconds_median': round(statistics.median(runs), 6),
+        'seconds_max': round(max(runs), 6),
+        'runs': [round(r, 6) for r in runs]
+    }
+    if items:
+        result['items'] = items
+        result['items_per_second'] = round(items / min(runs), 1) if min(runs) > 0 else None
+    return result
+
+
+@contextmanager
+def _cache_dir(directory: str):
+    """CacheManager (y SyncManager) apuntando a una carpeta temporal"""
+    previous = CacheManager.CACHE_DIR
+    CacheManager.CACHE_DIR = directory
+    try:
+        yield
+    finally:
+        CacheManager.CACHE_DIR = previous
+
+
+def run_benchmarks(titles: int = 10000, platforms: Sequence[str] = None, overlap: float = 0.3,
+                   repeat: int = 3, seed: int = 42, batch_size: int = None) -> Dict:
+    """
+    Medir las rutas calientes sobre un catálogo sintético
+
+    Caché (save_cache, load_cache en frío y en memoria, load_records, get_stats),
+    consolidate_with_tmdb, save_to_json / save_to_csv y SyncManager contra
+    SQLite (carga inicial y resincronización incremental sin cambios).
+
+    Returns:
+        Documento de resultados (config, environment, benchmarks)
+    """
+    from scraper import StreamingScraper
+
+    catalogue = generate_catalogue(titles, platforms, overlap, seed)
+    by_platform = catalogue['by_platform']
+    cached_movies = sum(len(movies) for movies in by_platform.values())
+    results = {}
+
+    directory = tempfile.mkdtemp(prefix='popflix-bench-')
+    try:
+        with _cache_dir(os.path.join(directory, 'cache')):
+            for cache_format in ('json', 'binary'):
+                def save_all():
+                    cache = CacheManager(cache_format=cache_format)
+                    for platform, movies in by_platform.items():
+                        cache.save_cache(platform, movies)
+
+                def load_all(cache):
+                    for platform in by_platform:
+                        cache.load_cache(platform)
+
+                results[f'cache_save_{cache_format}'] = measure(save_all, repeat, items=cached_movies)
+                results[f'cache_load_cold_{cache_format}'] = measure(
+                    load_all, repeat, setup=lambda: CacheManager(cache_format=cache_format), items=cached_movies
+                )
+                warm = CacheManager(cache_format=cache_format)
+                load_all(warm)
+                results[f'cache_load_warm_{cache_format}'] = measure(lambda: load_all(warm), repeat, items=cached_movies)
+                results[f'cache_records_warm_{cache_format}'] = measure(
+                    lambda: [warm.load_records(platform) for platform in by_platform], repeat, items=cached_movies
+                )
+
+            results['cache_get_stats'] = measure(lambda: CacheManager().get_stats(), repeat)
+
+            scraper = StreamingScraper(headless=True)
+            consolidated = []
+            results['consolidate_with_tmdb'] = measure(
+                lambda: consolidated.append(scraper.consolidate_with_tmdb(catalogue['tmdb'], catalogue['scraped'])),
+                repeat, items=len(catalogue['scraped'])
+            )
+            consolidated = consolidated[-1]
+            output = os.path.join(directory, 'consolidated')
+            results['save_to_json'] = measure(lambda: scraper.save_to_json(consolidated, output), repeat,
+                                              items=len(consolidated))
+            results['save_to_csv'] = measure(lambda: scraper.save_to_csv(consolidated, output), repeat,
+                                             items=len(consolidated))
+
+            def fresh_sync():
+                return SyncManager(create_sqlite_database(), batch_size=batch_size)
+
+            def sync_all(sync, incremental=False):
+                for platform in by_platform:
+                    sync.sync_from_cache(platform, incremental=incremental)
+
+            results['db_sync_initial'] = measure(sync_all, repeat, setup=fresh_sync, items=cached_movies)
+
+            def synced():
+                sync = fresh_sync()
+                sync_all(sync, incremental=True)
+                return sync
+
+            results['db_sync_unchanged'] = measure(
+                lambda sync: sync_all(sync, incremental=True), repeat, setup=synced, items=cached_movies
+            )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'titles': titles,
+            'platforms': list(by_platform),
+            'overlap': overlap,
+            'repeat': repeat,
+            'seed': seed,
+            'scraped_rows': len(catalogue['scraped']),
+            'cached_movies': cached_movies
+        },
+        'environment': {
+            'python': sys.version.split()[0],
+            'implementation': platform_info.python_implementation(),
+            'machine': platform_info.machine(),
+            'system': platform_info.system(),
+            'cpus': os.cpu_count()
+        },
+        'benchmarks': results
+    }
+
+
+def save_results(results: Dict, path: str = None) -> str:
+    """Escribir los resultados (por defecto en benchmarks/bench-<fecha>.json). Devuelve la ruta"""
+    if path is None:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        path = os.path.join(BENCH_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = REGRESSION_THRESHOLD) -> Dict[str, Dict]:
+    """
+    Comparar dos resultados por el tiempo mínimo de cada benchmark
+
+    Solo tiene sentido con la misma configuración (títulos, plataformas,
+    overlap); si difiere se avisa.
+
+    Returns:
+        {benchmark: {baseline, current, change, regression}} con change
+        como fracción (0.25 = un 25 % más lento)
+    """
+    if baseline.get('config', {}).get('titles') != current.get('config', {}).get('titles'):
+        logger.warning("  ⚠️ Los resultados comparados usan catálogos de distinto tamaño")
+    report = {}
+    for name, result in current['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous is None or not previous['seconds_min']:
+            continue
+        change = result['seconds_min'] / previous['seconds_min'] - 1
+        report[name] = {
+            'baseline': previous['seconds_min'],
+            'current': result['seconds_min'],
+            'change': round(change, 4),
+            'regression': change > threshold
+        }
+    return report
+
+
+def log_results(results: Dict, comparison: Dict = None):
+    config = results['config']
+    logger.info(
+        f"📊 Benchmarks ({config['titles']} títulos, {len(config['platforms'])} plataformas, "
+        f"overlap {config['overlap']}, {config['repeat']} repeticiones)"
+    )
+    for name, result in results['benchmarks'].items():
+        line = f"  {name:26} {result['seconds_min'] * 1000:9.1f} ms"
+        if result.get('items_per_second'):
+            line += f" · {result['items_per_second']:,.0f}/s"
+        if comparison and name in comparison:
+            change = comparison[name]
+            line += f" · {change['change']:+.0%}" + (" ⚠️ regresión" if change['regression'] else "")
+        logger.info(line)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks offline de Popflix')
+    parser.add_argument('--titles', type=int, default=10000, help='Títulos del catálogo sintético')
+    parser.add_argument('--platforms', help='Plataformas separadas por comas (por defecto, todas)')
+    parser.add_argument('--overlap', type=float, default=0.3, help='Fracción de títulos en varias plataformas')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones de cada medida')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Fichero JSON de resultados')
+    parser.add_argument('--compare', help='Resultados anteriores con los que comparar')
+    args = parser.parse_args(argv)
+
+    # Los logs por operación de caché y BD no dejarían ver la tabla
+    for name in ('cache_manager', 'scraper', 'consolidation'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    platforms = args.platforms.split(',') if args.platforms else None
+    results = run_benchmarks(args.titles, platforms, args.overlap, args.repeat, args.seed)
+    comparison = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            comparison = compare(json.load(f), results)
+        results['comparison'] = comparison
+    path = save_results(results, args.output)
+    log_results(results, comparison)
+    logger.info(f"💾 Resultados: {path}")
+    return 1 if comparison and any(c['regression'] for c in comparison.values()) else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
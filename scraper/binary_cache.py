@@ -0,0 +1,347 @@
+"""
+Formato binario compacto para el caché de plataformas
+Demuestra: registros binarios, índice por offset, lecturas con mmap
+
+Estructura del fichero (little-endian):
+
+    cabecera   MAGIC | versión | nº registros | offset índice | offset metadatos
+    registros  id, año, rating, título, plataformas, campos presentes y
+               extras (JSON compacto)
+    índice     (id, offset, longitud) por registro, ordenado por id
+    metadatos  JSON con platform y timestamp
+
+El índice permite leer una película por id con una búsqueda binaria sobre
+el fichero mapeado en memoria, sin decodificar el resto del catálogo.
+
+Cada registro anota qué campos fijos traía la película (un bit por campo
+de FIXED_KEYS): al leerla no aparecen claves que no estaban. Un título o
+unas plataformas que no son texto / lista (p. ej. None) van en los extras.
+Los ficheros de la versión 1, sin esos bits, se siguen leyendo.
+"""
+
+import json
+import math
+import mmap
+import os
+import random
+import shutil
+import struct
+import tempfile
+import time
+import logging
+from typing import Dict, Iterable, Iterator
+
+from file_lock import AtomicFile
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PFXC'
+VERSION = 2
+READABLE_VERSIONS = (1, 2)
+
+HEADER = struct.Struct('<4sHIQQ')
+RECORD_FIXED = struct.Struct('<qhdHBB')
+RECORD_FIXED_V1 = struct.Struct('<qhdHB')
+INDEX_ENTRY = struct.Struct('<qQI')
+EXTRA_LEN = struct.Struct('<I')
+
+NULL_ID = -2 ** 63
+NULL_YEAR = -1
+FIXED_KEYS = ('id', 'title', 'year', 'rating', 'platforms')
+ALL_PRESENT = (1 << len(FIXED_KEYS)) - 1
+
+
+def encode_movie(movie: Dict) -> bytes:
+    """Serializar una película a un registro binario"""
+    movie_id = movie.get('id')
+    year = movie.get('year')
+    rating = movie.get('rating')
+    extras = {k: v for k, v in movie.items() if k not in FIXED_KEYS}
+
+    title = movie.get('title')
+    if 'title' in movie and not isinstance(title, str):
+        extras['title'] = title
+    title = title.encode('utf-8') if isinstance(title, str) else b''
+    platforms = movie.get('platforms')
+    if 'platforms' in movie and not isinstance(platforms, list):
+        extras['platforms'] = platforms
+    platforms = [p.encode('utf-8') for p in platforms] if isinstance(platforms, list) else []
+
+    present = 0
+    for bit, key in enumerate(FIXED_KEYS):
+        if key in movie and key not in extras:
+            present |= 1 << bit
+    extra_bytes = json.dumps(extras, ensure_ascii=False, separators=(',', ':')).encode('utf-8') if extras else b''
+
+    parts = [
+        RECORD_FIXED.pack(
+            NULL_ID if movie_id is None else int(movie_id),
+            NULL_YEAR if year is None else int(year),
+            math.nan if rating is None else float(rating),
+            len(title),
+            len(platforms),
+            present
+        ),
+        title
+    ]
+    for platform in platforms:
+        parts.append(bytes((len(platform),)))
+        parts.append(platform)
+    parts.append(EXTRA_LEN.pack(len(extra_bytes)))
+    parts.append(extra_bytes)
+    return b''.join(parts)
+
+
+def decode_movie(buffer, offset: int, version: int = VERSION) -> Dict:
+    """Deserializar el registro que empieza en offset"""
+    return _decode_record(buffer, offset, version)[0]
+
+
+def _decode_record(buffer, offset: int, version: int = VERSION):
+    """Deserializar un registro y devolver (película, offset del siguiente)"""
+    if version == 1:
+        movie_id, year, rating, title_len, platform_count = RECORD_FIXED_V1.unpack_from(buffer, offset)
+        present = ALL_PRESENT
+        pos = offset + RECORD_FIXED_V1.size
+    else:
+        movie_id, year, rating, title_len, platform_count, present = RECORD_FIXED.unpack_from(buffer, offset)
+        pos = offset + RECORD_FIXED.size
+    title = buffer[pos:pos + title_len].decode('utf-8')
+    pos += title_len
+
+    platforms = []
+    for _ in range(platform_count):
+        length = buffer[pos]
+        platforms.append(buffer[pos + 1:pos + 1 + length].decode('utf-8'))
+        pos += 1 + length
+
+    (extra_len,) = EXTRA_LEN.unpack_from(buffer, pos)
+    pos += EXTRA_LEN.size
+
+    values = (
+        None if movie_id == NULL_ID else movie_id,
+        title,
+        None if year == NULL_YEAR else year,
+        None if math.isnan(rating) else rating,
+        platforms
+    )
+    if present == ALL_PRESENT:
+        movie = dict(zip(FIXED_KEYS, values))
+    else:
+        movie = {key: value for bit, (key, value) in enumerate(zip(FIXED_KEYS, values)) if present >> bit & 1}
+    if extra_len:
+        movie.update(json.loads(buffer[pos:pos + extra_len]))
+    return movie, pos + extra_len
+
+
+def write_binary_cache(target, platform: str, movies: Iterable[Dict], timestamp: str) -> int:
+    """
+    Escribir un catálogo en formato binario
+
+    Args:
+        target: Ruta de destino (se escribe de forma atómica) o fichero
+            binario abierto para escritura
+        platform: Nombre de plataforma
+        movies: Películas (se recorren una sola vez)
+        timestamp: Marca temporal ISO del caché
+
+    Returns:
+        Número de películas escritas
+    """
+    if isinstance(target, (str, os.PathLike)):
+        with AtomicFile(target, 'wb') as tmp:
+            return write_binary_cache(tmp.file, platform, movies, timestamp)
+
+    f = target
+    index = []
+    f.write(b'\0' * HEADER.size)
+    offset = HEADER.size
+    for movie in movies:
+        record = encode_movie(movie)
+        f.write(record)
+        movie_id = movie.get('id')
+        index.append((NULL_ID if movie_id is None else int(movie_id), offset, len(record)))
+        offset += len(record)
+
+    index.sort()
+    index_offset = offset
+    f.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in index))
+
+    meta_offset = index_offset + len(index) * INDEX_ENTRY.size
+    f.write(json.dumps({'platform': platform, 'timestamp': timestamp}).encode('utf-8'))
+
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, len(index), index_offset, meta_offset))
+
+    return len(index)
+
+
+class BinaryCacheReader:
+    """Lector de un fichero de caché binario mapeado en memoria"""
+
+    def __init__(self, path: str):
+        """
+        Abrir fichero
+
+        Raises:
+            ValueError: Si el fichero no tiene el formato esperado
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f'Fichero de caché vacío: {path}') from None
+
+        magic, version, self.count, self.index_offset, self.meta_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version not in READABLE_VERSIONS:
+            self.close()
+            raise ValueError(f'Formato de caché binario no reconocido: {path}')
+        self.version = version
+
+        self.meta = json.loads(self._mmap[self.meta_offset:].decode('utf-8'))
+        self.meta['count'] = self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Liberar el mapeo y el fichero"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _index_entry(self, position: int):
+        return INDEX_ENTRY.unpack_from(self._mmap, self.index_offset + position * INDEX_ENTRY.size)
+
+    def get(self, movie_id: int) -> Dict:
+        """
+        Leer una película por id (búsqueda binaria en el índice)
+
+        Returns:
+            Película o None si no está
+        """
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._index_entry(mid)[0] < movie_id:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.count:
+            entry_id, offset, _ = self._index_entry(low)
+            if entry_id == movie_id:
+                return decode_movie(self._mmap, offset, self.version)
+        return None
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Recorrer las películas en el orden en que se escribieron"""
+        offset = HEADER.size
+        while offset < self.index_offset:
+            movie, offset = _decode_record(self._mmap, offset, self.version)
+            yield movie
+
+
+def benchmark(count: int = 50000, lookups: int = 1000, directory: str = None) -> Dict:
+    """
+    Comparar el caché JSON actual con el formato binario
+
+    Args:
+        count: Películas del catálogo sintético
+        lookups: Lecturas por id aleatorias
+        directory: Carpeta para los ficheros de prueba (por defecto una
+            temporal, fuera del caché real)
+
+    Returns:
+        Tiempos (segundos) y tamaños (bytes) de cada formato
+    """
+    movies = [
+        {
+            'id': 100000 + i,
+            'title': f'Película de prueba {i}',
+            'year': 1980 + i % 45,
+            'rating': round(5 + (i % 50) / 10, 1),
+            'platforms': ['netflix', 'prime'][:1 + i % 2],
+            'source': 'TMDB-verified'
+        }
+        for i in range(count)
+    ]
+    timestamp = '2024-01-01T00:00:00'
+    wanted = random.sample([m['id'] for m in movies], min(lookups, count))
+    results = {'movies': count, 'lookups': len(wanted)}
+
+    owned = directory is None
+    if owned:
+        directory = tempfile.mkdtemp(prefix='popflix-binary-')
+    else:
+        os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, '_bench_cache.json')
+    binary_path = os.path.join(directory, '_bench_cache.pfxc')
+
+    try:
+        start = time.perf_counter()
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': timestamp, 'platform': 'bench', 'count': count, 'movies': movies},
+                      f, ensure_ascii=False, indent=2)
+        results['json_write'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(json_path, 'r', encoding='utf-8') as f:
+            json_movies = json.load(f)['movies']
+        results['json_read_all'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for movie_id in wanted:
+            # Con JSON cada lectura por id implica decodificar el fichero completo
+            with open(json_path, 'r', encoding='utf-8') as f:
+                next(m for m in json.load(f)['movies'] if m['id'] == movie_id)
+            if time.perf_counter() - start > 5:
+                results['json_lookups_measured'] = wanted.index(movie_id) + 1
+                break
+        results['json_lookup_each'] = (time.perf_counter() - start) / results.get('json_lookups_measured', len(wanted))
+
+        start = time.perf_counter()
+        write_binary_cache(binary_path, 'bench', movies, timestamp)
+        results['binary_write'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with BinaryCacheReader(binary_path) as reader:
+            binary_movies = list(reader)
+        results['binary_read_all'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with BinaryCacheReader(binary_path) as reader:
+            for movie_id in wanted:
+                reader.get(movie_id)
+        results['binary_lookup_each'] = (time.perf_counter() - start) / len(wanted)
+
+        results['json_bytes'] = os.path.getsize(json_path)
+        results['binary_bytes'] = os.path.getsize(binary_path)
+        results['identical'] = json_movies == binary_movies
+    finally:
+        if owned:
+            shutil.rmtree(directory, ignore_errors=True)
+        else:
+            for path in (json_path, binary_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    logger.info(f"📊 Benchmark caché ({count} películas)")
+    logger.info(f"  JSON:    escribir {results['json_write']:.3f}s · leer {results['json_read_all']:.3f}s · "
+                f"por id {results['json_lookup_each'] * 1000:.2f}ms · {results['json_bytes'] / 1e6:.1f} MB")
+    logger.info(f"  Binario: escribir {results['binary_write']:.3f}s · leer {results['binary_read_all']:.3f}s · "
+                f"por id {results['binary_lookup_each'] * 1000:.3f}ms · {results['binary_bytes'] / 1e6:.1f} MB")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    benchmark()
@@ -3,26 +3,412 @@ Sistema de caché para Popflix
 Demuestra: Optimización, control de actualización, sincronización BD
 """
 
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import logging
+from typing import Dict, Iterable, Iterator
+
+from binary_cache import BinaryCacheReader, write_binary_cache
+from db import ConnectionPool, StatementCache, get_dialect
+from file_lock import AtomicFile, FileLock
+from http_cache import HTTPResponseCache
+from metrics import CACHE_REQUESTS, DB_ROWS, STAGE_SECONDS, timed
+from movie_record import json_default, to_dicts, to_records
+from platforms import platform_id
 
 logger = logging.getLogger(__name__)
 
 class CacheManager:
-    """Gestionar caché de datos de plataformas"""
+    """
+    Gestionar caché de datos de plataformas
+    
+    Dos niveles: un LRU en memoria delante de los ficheros JSON en disco.
+    Las lecturas repetidas de una plataforma se sirven desde memoria sin
+    volver a decodificar el JSON (las películas se guardan como MovieRecord,
+    ~4 veces menos memoria que los diccionarios); la entrada se invalida al guardar o
+    limpiar desde esta instancia (contador de generación), cuando cambia el
+    mtime del fichero (escrituras de otros procesos) o al caducar.
+    """
     
-    CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
+    # POPFLIX_CACHE_DIR permite usar otro directorio (p. ej. uno temporal al medir el arranque)
+    CACHE_DIR = os.environ.get('POPFLIX_CACHE_DIR') or os.path.join(os.path.dirname(__file__), 'cache')
     CACHE_EXPIRY_HOURS = 24  # Actualizar cada 24 horas
     
-    def __init__(self):
-        """Inicializar gestor de caché"""
+    # Formato en disco: 'json' (legible), 'binary' (compacto, lectura por id con mmap)
+    # o 'jsonl' (una película por línea, lo genera open_cache_writer)
+    CACHE_FORMAT = 'json'
+    CACHE_EXTENSIONS = {'json': '.json', 'binary': '.pfxc', 'jsonl': '.jsonl'}
+    TRAILER_KEY = '__trailer__'
+    
+    # Índice de metadatos (plataforma, nº películas, timestamp, mtime) de todos
+    # los ficheros: get_stats e is_cache_valid no abren los ficheros de datos
+    MANIFEST_FILE = '.manifest.json'
+    
+    # Estado por plataforma junto al caché: snapshots de sincronización y
+    # checkpoints de scraping (ficheros ocultos, clear_cache también los borra)
+    SNAPSHOT_SUFFIX = '.snapshot.json'
+    CHECKPOINT_SUFFIX = '.checkpoint.jsonl'
+    STATE_SUFFIXES = (SNAPSHOT_SUFFIX, CHECKPOINT_SUFFIX)
+    
+    # Subcarpeta del caché de respuestas HTTP del scraper (http_cache.py)
+    HTTP_SUBDIR = 'http'
+
+    
+    # Nivel en memoria
+    MEMORY_MAX_ENTRIES = 16
+    MEMORY_MAX_BYTES = 256 * 1024 * 1024
+    MTIME_CHECK_SECONDS = 2  # Cada cuánto se revisa el mtime de una entrada en memoria
+    
+    def __init__(self, memory_max_entries: int = None, memory_max_bytes: int = None, cache_format: str = None):
+        """
+        Inicializar gestor de caché
+        
+        Args:
+            memory_max_entries: Plataformas en memoria como máximo
+            memory_max_bytes: Bytes (tamaño del fichero en disco) en memoria como máximo
+            cache_format: 'json' o 'binary' (None = CACHE_FORMAT)
+        """
         os.makedirs(self.CACHE_DIR, exist_ok=True)
+        self.cache_format = cache_format or self.CACHE_FORMAT
+        if self.cache_format not in self.CACHE_EXTENSIONS:
+            raise ValueError(f"Formato de caché no soportado: {self.cache_format}")
+        self.memory_max_entries = memory_max_entries or self.MEMORY_MAX_ENTRIES
+        self.memory_max_bytes = memory_max_bytes or self.MEMORY_MAX_BYTES
+        
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._generations = {}
+        self._manifest = None
+        self._manifest_raw = None
+        self.memory_stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
     
-    def get_cache_file(self, platform: str) -> str:
+    def get_cache_file(self, platform: str, cache_format: str = None) -> str:
         """Obtener ruta del archivo de caché"""
-        return os.path.join(self.CACHE_DIR, f'{platform}_cache.json')
+        extension = self.CACHE_EXTENSIONS[cache_format or self.cache_format]
+        return os.path.join(self.CACHE_DIR, f'{platform}_cache{extension}')
+    
+    def _find_cache_file(self, platform: str) -> str:
+        """
+        Fichero de caché existente de una plataforma, en cualquier formato
+        
+        Cada escritura borra los ficheros de otros formatos, así que como
+        mucho hay uno; se prueba primero el formato de esta instancia.
+        """
+        formats = [self.cache_format] + [f for f in self.CACHE_EXTENSIONS if f != self.cache_format]
+        for cache_format in formats:
+            path = self.get_cache_file(platform, cache_format)
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def _is_cache_file(self, filename: str) -> bool:
+        """True para ficheros de caché publicados (no temporales ni locks)"""
+        return (not filename.startswith('.')
+                and filename.endswith(tuple(self.CACHE_EXTENSIONS.values())))
+    
+    def _file_lock(self, platform: str) -> FileLock:
+        """Lock entre procesos para los escritores de una plataforma"""
+        return FileLock(os.path.join(self.CACHE_DIR, f'.{platform}.lock'))
+    
+    def _publish(self, platform: str, atomic_file: AtomicFile, meta: dict):
+        """
+        Publicar una escritura terminada
+        
+        Bajo el lock de la plataforma: rename atómico del temporal sobre el
+        fichero final, borrado de los ficheros de otros formatos y
+        actualización del manifest.
+        
+        Args:
+            meta: count y timestamp del caché publicado
+        
+        Returns:
+            os.stat del fichero publicado y su generación en el manifest
+        """
+        with self._file_lock(platform):
+            atomic_file.commit()
+            self._remove_other_formats(platform, atomic_file.path)
+            st = os.stat(atomic_file.path)
+            manifest = self._update_manifest({platform: self._manifest_entry(atomic_file.path, meta, st)})
+        self._invalidate(platform)
+        return st, manifest[platform]['generation']
+    
+    def _manifest_path(self) -> str:
+        return os.path.join(self.CACHE_DIR, self.MANIFEST_FILE)
+    
+    @staticmethod
+    def _manifest_entry(path: str, meta: dict, st) -> dict:
+        return {
+            'file': os.path.basename(path),
+            'movies': meta.get('count'),
+            'timestamp': meta.get('timestamp'),
+            'mtime': st.st_mtime,
+            'bytes': st.st_size
+        }
+    
+    def _read_manifest(self, fresh: bool = False) -> dict:
+        """
+        Leer el manifest (decodificado una vez mientras no cambie en disco)
+        
+        El manifest es pequeño: se compara su contenido con la última copia
+        leída en lugar de mtime y tamaño, que no distinguen dos escrituras
+        del mismo tamaño dentro de la resolución del mtime.
+        
+        Args:
+            fresh: Ignorar la copia en memoria (para leer-modificar-escribir)
+        
+        Returns:
+            {plataforma: entrada} o None si no existe
+        """
+        try:
+            with open(self._manifest_path(), 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        
+        with self._lock:
+            if not fresh and raw == self._manifest_raw:
+                return self._manifest
+        
+        manifest = json.loads(raw).get('platforms', {})
+        with self._lock:
+            self._manifest, self._manifest_raw = manifest, raw
+        return manifest
+    
+    def _load_manifest(self) -> dict:
+        """Manifest actual, reconstruyéndolo si el directorio no tiene"""
+        manifest = self._read_manifest()
+        if manifest is None and os.path.exists(self.CACHE_DIR):
+            manifest = self.rebuild_manifest()
+        return manifest or {}
+    
+    def _manifest_generation(self, platform: str) -> int:
+        """Generación de la plataforma en el manifest (None si no figura)"""
+        return (self._read_manifest() or {}).get(platform, {}).get('generation')
+    
+    def _update_manifest(self, changes: dict, reset: bool = False):
+        """
+        Aplicar cambios al manifest de forma atómica
+        
+        Cada entrada escrita recibe la generación siguiente a la anterior de
+        su plataforma (también al reconstruir), así el nivel en memoria de
+        otros procesos detecta cualquier reescritura.
+        
+        Args:
+            changes: {plataforma: entrada o None para quitarla}
+            reset: Empezar desde un manifest vacío
+        
+        Returns:
+            Manifest escrito
+        """
+        with FileLock(os.path.join(self.CACHE_DIR, '.manifest.lock')):
+            previous = self._read_manifest(fresh=True) or {}
+            manifest = {} if reset else dict(previous)
+            for platform, entry in changes.items():
+                if entry is None:
+                    manifest.pop(platform, None)
+                else:
+                    generation = previous.get(platform, {}).get('generation', 0) + 1
+                    manifest[platform] = dict(entry, generation=generation)
+            
+            with AtomicFile(self._manifest_path(), 'w', encoding='utf-8') as tmp:
+                json.dump({'platforms': manifest}, tmp.file, ensure_ascii=False)
+        return manifest
+    
+    def rebuild_manifest(self) -> dict:
+        """
+        Reconstruir el manifest leyendo los ficheros de caché existentes
+        
+        Solo hace falta con cachés creados antes de existir el manifest o
+        modificados a mano; las escrituras normales lo mantienen al día.
+        """
+        entries = {}
+        for file in os.listdir(self.CACHE_DIR):
+            if not self._is_cache_file(file):
+                continue
+            path = os.path.join(self.CACHE_DIR, file)
+            try:
+                data = self._read_cache_file(path, with_movies=False)
+                entries[data.get('platform')] = self._manifest_entry(path, data, os.stat(path))
+            except (FileNotFoundError, ValueError) as e:
+                logger.warning(f"  ⚠️  Fichero de caché ilegible {file}: {e}")
+        
+        self._update_manifest(entries, reset=True)
+        logger.info(f"  📇 Manifest reconstruido: {len(entries)} plataformas")
+        return entries
+    
+    def _remove_other_formats(self, platform: str, keep: str):
+        """Borrar los ficheros de la plataforma en formatos distintos de keep"""
+        for cache_format in self.CACHE_EXTENSIONS:
+            path = self.get_cache_file(platform, cache_format)
+            if path != keep and os.path.exists(path):
+                os.remove(path)
+    
+    @classmethod
+    def _read_jsonl_trailer(cls, path: str) -> dict:
+        """Leer el trailer (última línea) de un caché JSON Lines sin recorrerlo"""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            f.seek(max(0, end - 4096))
+            lines = f.read().rstrip(b'\n').rsplit(b'\n', 1)
+        try:
+            last = json.loads(lines[-1])
+        except ValueError:
+            return None
+        return last.get(cls.TRAILER_KEY) if isinstance(last, dict) else None
+    
+    @classmethod
+    def _iter_jsonl(cls, path: str) -> Iterator[Dict]:
+        """Recorrer un caché JSON Lines línea a línea (memoria constante)"""
+        complete = False
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if cls.TRAILER_KEY in record:
+                    complete = True
+                    break
+                yield record
+        if not complete:
+            logger.warning(f"  ⚠️  Caché incompleto (sin trailer): {os.path.basename(path)}")
+    
+    @classmethod
+    def _read_cache_file(cls, path: str, with_movies: bool = True) -> dict:
+        """
+        Leer un fichero de caché en cualquiera de los formatos
+        
+        Returns:
+            Diccionario con timestamp, platform, count y movies (si with_movies)
+        """
+        if path.endswith('.jsonl'):
+            cache_data = dict(cls._read_jsonl_trailer(path) or {})
+            if with_movies:
+                cache_data['movies'] = list(cls._iter_jsonl(path))
+                cache_data.setdefault('count', len(cache_data['movies']))
+            return cache_data
+        
+        if path.endswith('.pfxc'):
+            with BinaryCacheReader(path) as reader:
+                cache_data = dict(reader.meta)
+                if with_movies:
+                    cache_data['movies'] = list(reader)
+            return cache_data
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _stat(self, path: str):
+        """os.stat que devuelve None si el fichero no existe"""
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+    
+    def _memory_get(self, platform: str) -> dict:
+        """
+        Entrada válida del nivel en memoria (None si no hay)
+        
+        Comprueba generación, caducidad y, como mucho cada
+        MTIME_CHECK_SECONDS, que el fichero no haya cambiado en disco (inodo,
+        mtime y tamaño) ni lo haya reescrito otro proceso (generación del
+        manifest).
+        """
+        with self._lock:
+            entry = self._memory.get(platform)
+            if entry is None:
+                return None
+            
+            stale = entry['generation'] != self._generations.get(platform, 0)
+            if not stale:
+                stale = time.time() - entry['mtime'] >= self.CACHE_EXPIRY_HOURS * 3600
+            if not stale and time.monotonic() - entry['checked_at'] >= self.MTIME_CHECK_SECONDS:
+                st = self._stat(entry['path'])
+                stale = (st is None or self._signature(st) != entry['signature']
+                         or self._manifest_generation(platform) != entry['manifest_generation'])
+                entry['checked_at'] = time.monotonic()
+            
+            if stale:
+                self._memory_drop(platform)
+                self.memory_stats['invalidations'] += 1
+                return None
+            
+            self._memory.move_to_end(platform)
+            return entry
+    
+    @staticmethod
+    def _signature(st) -> tuple:
+        # Cada publicación es un rename de un temporal nuevo: cambia el inodo
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def _memory_put(self, platform: str, path: str, cache_data: dict, st, manifest_generation: int):
+        """
+        Guardar en el nivel en memoria y expulsar las entradas menos usadas
+        
+        Args:
+            manifest_generation: Generación del manifest leída antes que el
+                fichero (o la recién publicada)
+        """
+        with self._lock:
+            self._memory_drop(platform)
+            if st.st_size > self.memory_max_bytes:
+                return
+            
+            self._memory[platform] = {
+                'path': path,
+                'movies': to_records(cache_data.get('movies', [])),
+                'count': cache_data.get('count'),
+                'timestamp': cache_data.get('timestamp'),
+                'mtime': st.st_mtime,
+                'signature': self._signature(st),
+                'manifest_generation': manifest_generation,
+                'size': st.st_size,
+                'generation': self._generations.get(platform, 0),
+                'checked_at': time.monotonic()
+            }
+            self._memory_bytes += st.st_size
+            
+            while (len(self._memory) > self.memory_max_entries
+                   or self._memory_bytes > self.memory_max_bytes):
+                oldest = next(iter(self._memory))
+                self._memory_drop(oldest)
+                self.memory_stats['evictions'] += 1
+    
+    def _memory_drop(self, platform: str):
+        entry = self._memory.pop(platform, None)
+        if entry is not None:
+            self._memory_bytes -= entry['size']
+    
+    def _invalidate(self, platform: str):
+        """Invalidar la entrada en memoria de una plataforma"""
+        with self._lock:
+            self._generations[platform] = self._generations.get(platform, 0) + 1
+            self._memory_drop(platform)
+    
+    def _read_manifest_entry(self, platform: str) -> dict:
+        """
+        Entrada del manifest de una plataforma
+        
+        Si falta el manifest, o no incluye una plataforma cuyo fichero sí
+        existe (cachés antiguos o copiados a mano), se reconstruye.
+        """
+        manifest = self._read_manifest()
+        if manifest is not None and (platform in manifest or self._find_cache_file(platform) is None):
+            return manifest.get(platform)
+        if not os.path.exists(self.CACHE_DIR):
+            return None
+        return self.rebuild_manifest().get(platform)
     
     def is_cache_valid(self, platform: str) -> bool:
         """
@@ -34,12 +420,12 @@ class CacheManager:
         Returns:
             True si caché es menor a CACHE_EXPIRY_HOURS
         """
-        cache_file = self.get_cache_file(platform)
-        
-        if not os.path.exists(cache_file):
+        entry = self._memory_get(platform) or self._read_manifest_entry(platform)
+        if entry is None:
             return False
+        mtime = entry['mtime']
         
-        file_time = datetime.fromtimestamp(os.path.getmtime(cache_file))
+        file_time = datetime.fromtimestamp(mtime)
         age = datetime.now() - file_time
         
         is_valid = age < timedelta(hours=self.CACHE_EXPIRY_HOURS)
@@ -67,8 +453,18 @@ class CacheManager:
             'movies': data
         }
         
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        # Se escribe en un temporal y se publica con rename: los lectores
+        # ven el fichero anterior o el nuevo, nunca uno truncado
+        binary = self.cache_format == 'binary'
+        with timed('cache_write'), AtomicFile(cache_file, 'wb' if binary else 'w', encoding='utf-8') as tmp:
+            if binary:
+                write_binary_cache(tmp.file, platform, data, cache_data['timestamp'])
+            else:
+                json.dump(cache_data, tmp.file, ensure_ascii=False, indent=2, default=json_default)
+            st, generation = self._publish(platform, tmp, cache_data)
+        
+        # Write-through: la siguiente lectura ya no toca disco
+        self._memory_put(platform, cache_file, cache_data, st, generation)
         
         logger.info(f"  💾 Caché guardado: {platform} ({len(data)} películas)")
     
@@ -80,96 +476,904 @@ class CacheManager:
             platform: Nombre de plataforma
         
         Returns:
-            Lista de películas del caché
+            Lista de películas del caché (diccionarios nuevos, modificables)
         """
-        cache_file = self.get_cache_file(platform)
+        return to_dicts(self.load_records(platform))
+    
+    def load_records(self, platform: str) -> list:
+        """
+        Cargar caché como registros compactos
         
-        if not os.path.exists(cache_file):
+        Los MovieRecord son de solo lectura y se comparten con el nivel en
+        memoria, así que no se copia nada en cada lectura.
+        
+        Args:
+            platform: Nombre de plataforma
+        
+        Returns:
+            Lista de MovieRecord del caché
+        """
+        entry = self._memory_get(platform)
+        if entry is not None:
+            with self._lock:
+                self.memory_stats['hits'] += 1
+            CACHE_REQUESTS.inc(cache='memory', result='hit')
+            logger.debug(f"  ⚡ Caché en memoria: {platform} ({entry['count']} películas)")
+            return list(entry['movies'])
+        
+        with self._lock:
+            self.memory_stats['misses'] += 1
+        CACHE_REQUESTS.inc(cache='memory', result='miss')
+        
+        # Antes que el fichero: si otro proceso publica entre medias, la
+        # entrada queda con la generación vieja y se recarga en la siguiente revisión
+        generation = self._manifest_generation(platform)
+        cache_file = self._find_cache_file(platform)
+        st = self._stat(cache_file) if cache_file else None
+        if st is None:
             return []
         
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
+        try:
+            with timed('cache_read'):
+                cache_data = self._read_cache_file(cache_file)
+                cache_data['movies'] = to_records(cache_data.get('movies', []))
+        except FileNotFoundError:
+            # Borrado por clear_cache entre el stat y la lectura
+            return []
+        self._memory_put(platform, cache_file, cache_data, st, generation)
         
         logger.info(f"  ✅ Caché cargado: {platform} ({cache_data['count']} películas)")
-        return cache_data.get('movies', [])
+        return list(cache_data['movies'])
+    
+    def iter_cache(self, platform: str) -> Iterator[Dict]:
+        """
+        Recorrer las películas del caché sin construir la lista completa
+        
+        Con los formatos 'jsonl' y 'binary' la memoria usada es constante;
+        el JSON clásico tiene que decodificarse entero antes de empezar.
+        
+        Args:
+            platform: Nombre de plataforma
+        
+        Yields:
+            Películas del caché
+        """
+        entry = self._memory_get(platform)
+        if entry is not None:
+            with self._lock:
+                self.memory_stats['hits'] += 1
+            for movie in entry['movies']:
+                yield movie.to_dict()
+            return
+        
+        cache_file = self._find_cache_file(platform)
+        if cache_file is None:
+            return
+        
+        try:
+            if cache_file.endswith('.jsonl'):
+                yield from self._iter_jsonl(cache_file)
+            elif cache_file.endswith('.pfxc'):
+                with BinaryCacheReader(cache_file) as reader:
+                    yield from reader
+            else:
+                for movie in self.load_records(platform):
+                    yield movie.to_dict()
+        except FileNotFoundError:
+            return
+    
+    def open_cache_writer(self, platform: str) -> 'CacheStreamWriter':
+        """
+        Abrir un escritor incremental (JSON Lines) para una plataforma
+        
+        Uso:
+            with cache.open_cache_writer('netflix') as writer:
+                for movie in scrape():
+                    writer.write(movie)
+        """
+        return CacheStreamWriter(self, platform)
+    
+    def get_movie(self, platform: str, movie_id: int) -> dict:
+        """
+        Leer una sola película del caché
+        
+        Con el formato binario se lee solo ese registro a través del índice
+        del fichero; con JSON se recurre al catálogo completo.
+        
+        Args:
+            platform: Nombre de plataforma
+            movie_id: Id de la película
+        
+        Returns:
+            Película (diccionario nuevo, como load_cache) o None si no está en caché
+        """
+        entry = self._memory_get(platform)
+        if entry is not None:
+            movie = next((m for m in entry['movies'] if m.get('id') == movie_id), None)
+            # Copia: el MovieRecord es compartido y de solo lectura (ver load_records)
+            return movie.to_dict() if movie is not None else None
+        
+        cache_file = self._find_cache_file(platform)
+        if cache_file is not None and cache_file.endswith('.pfxc'):
+            with BinaryCacheReader(cache_file) as reader:
+                return reader.get(movie_id)
+        
+        return next((m for m in self.iter_cache(platform) if m.get('id') == movie_id), None)
     
     def clear_cache(self, platform: str = None):
         """
         Limpiar caché
         
+        También borra el estado asociado: checkpoints de scraping (un
+        --resume empieza de cero) y snapshots de sincronización (el
+        siguiente sync incremental envía el catálogo completo). Sin
+        plataforma se vacía además el caché de respuestas HTTP. Los locks y
+        los temporales de escrituras en curso se conservan.
+        
         Args:
             platform: Plataforma a limpiar (None = todas)
         """
         if platform:
-            cache_file = self.get_cache_file(platform)
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
+            with self._file_lock(platform):
+                cache_file = self._find_cache_file(platform)
+                self._remove_other_formats(platform, None)
+                for path in (self._snapshot_file(platform), self._checkpoint_file(platform)):
+                    self._remove(path)
+                self._update_manifest({platform: None})
+            self._invalidate(platform)
+            if cache_file is not None:
                 logger.info(f"  🗑️  Caché limpiado: {platform}")
         else:
             for file in os.listdir(self.CACHE_DIR):
-                os.remove(os.path.join(self.CACHE_DIR, file))
+                if self._is_cache_file(file) or file.endswith(self.STATE_SUFFIXES):
+                    self._remove(os.path.join(self.CACHE_DIR, file))
+            http_dir = os.path.join(self.CACHE_DIR, self.HTTP_SUBDIR)
+            if os.path.isdir(http_dir):
+                HTTPResponseCache(http_dir).clear()
+            self._update_manifest({}, reset=True)
+            with self._lock:
+                for cached_platform in set(self._memory) | set(self._generations):
+                    self._invalidate(cached_platform)
             logger.info("  🗑️  Todo el caché limpiado")
     
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def _snapshot_file(self, platform: str) -> str:
+        return os.path.join(self.CACHE_DIR, f'.{platform}{self.SNAPSHOT_SUFFIX}')
+    
+    def _checkpoint_file(self, platform: str) -> str:
+        return os.path.join(self.CACHE_DIR, f'.{platform}{self.CHECKPOINT_SUFFIX}')
+    
+    def load_snapshot(self, platform: str) -> Dict[str, str]:
+        """
+        Cargar el snapshot de la última sincronización de una plataforma
+        
+        Returns:
+            {tmdb_id: hash de contenido} (vacío si nunca se sincronizó)
+        """
+        try:
+            with open(self._snapshot_file(platform), 'r', encoding='utf-8') as f:
+                return json.load(f).get('movies', {})
+        except FileNotFoundError:
+            return {}
+    
+    def save_snapshot(self, platform: str, snapshot: Dict[str, str]):
+        """Guardar el snapshot de sincronización de una plataforma"""
+        with AtomicFile(self._snapshot_file(platform), 'w', encoding='utf-8') as tmp:
+            json.dump({
+                'platform': platform,
+                'timestamp': datetime.now().isoformat(),
+                'movies': snapshot
+            }, tmp.file, separators=(',', ':'))
+    
+    def open_checkpoint(self, platform: str, resume: bool = True) -> 'ScrapeCheckpoint':
+        """
+        Abrir el checkpoint de scraping de una plataforma
+        
+        Args:
+            platform: Nombre de plataforma
+            resume: Retomar el progreso guardado (False = empezar de cero)
+        
+        Uso:
+            checkpoint = cache.open_checkpoint('netflix')
+            for page in pages:
+                if page not in checkpoint.pages_done:
+                    checkpoint.record_page(page, scrape(page))
+            movies = checkpoint.finish()
+        """
+        return ScrapeCheckpoint(self, platform, resume)
+    
     def get_stats(self) -> dict:
-        """Obtener estadísticas del caché"""
-        stats = {
-            'total_cache_files': 0,
-            'platforms': {}
-        }
+        """
+        Obtener estadísticas del caché
         
-        if os.path.exists(self.CACHE_DIR):
-            for file in os.listdir(self.CACHE_DIR):
-                stats['total_cache_files'] += 1
-                filepath = os.path.join(self.CACHE_DIR, file)
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    platform = data.get('platform')
-                    stats['platforms'][platform] = {
-                        'movies': data.get('count'),
-                        'timestamp': data.get('timestamp')
-                    }
+        Se responden desde el manifest, sin abrir los ficheros de datos.
+        """
+        with self._lock:
+            lookups = self.memory_stats['hits'] + self.memory_stats['misses']
+            stats = {
+                'total_cache_files': 0,
+                'platforms': {},
+                'memory': dict(
+                    self.memory_stats,
+                    hit_ratio=round(self.memory_stats['hits'] / lookups, 4) if lookups else None,
+                    entries=len(self._memory),
+                    bytes=self._memory_bytes
+                )
+            }
+        
+        for platform, entry in self._load_manifest().items():
+            stats['total_cache_files'] += 1
+            stats['platforms'][platform] = {
+                'movies': entry.get('movies'),
+                'timestamp': entry.get('timestamp'),
+                'bytes': entry.get('bytes')
+            }
         
         return stats
 
 
+class CacheStreamWriter:
+    """
+    Escritor incremental de caché en formato JSON Lines
+    
+    Cada película se escribe en cuanto llega; al cerrar se añade un trailer
+    con platform, count y timestamp. Un fichero sin trailer indica una
+    escritura interrumpida.
+    """
+    
+    def __init__(self, cache: CacheManager, platform: str):
+        self.cache = cache
+        self.platform = platform
+        self.path = cache.get_cache_file(platform, 'jsonl')
+        self.count = 0
+        # El caché anterior sigue visible hasta que close() publica este
+        self._atomic = AtomicFile(self.path, 'w', encoding='utf-8')
+        self._file = self._atomic.file
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+    
+    def write(self, movie: Dict):
+        """Añadir una película"""
+        self._file.write(json.dumps(movie, ensure_ascii=False, separators=(',', ':'), default=json_default))
+        self._file.write('\n')
+        self.count += 1
+    
+    def write_many(self, movies: Iterable[Dict]) -> int:
+        """Añadir varias películas (acepta generadores). Devuelve cuántas"""
+        written = 0
+        for movie in movies:
+            self.write(movie)
+            written += 1
+        return written
+    
+    def close(self):
+        """Escribir el trailer y publicar el caché"""
+        if self._file is None:
+            return
+        trailer = {
+            'platform': self.platform,
+            'count': self.count,
+            'timestamp': datetime.now().isoformat()
+        }
+        self._file.write(json.dumps({CacheManager.TRAILER_KEY: trailer}) + '\n')
+        self._file = None
+        self.cache._publish(self.platform, self._atomic, trailer)
+        logger.info(f"  💾 Caché guardado (streaming): {self.platform} ({self.count} películas)")
+    
+    def abort(self):
+        """Descartar lo escrito"""
+        if self._file is None:
+            return
+        self._file = None
+        self._atomic.discard()
+
+
+class ScrapeCheckpoint:
+    """
+    Progreso de scraping de una plataforma, recuperable tras una caída
+    
+    Se guarda en un JSON Lines oculto que solo crece: una cabecera con la
+    hora de inicio, las películas de cada página y, detrás, una marca de
+    página terminada con el cursor. Si el proceso muere entre las películas
+    y la marca, la página se repite al retomar y los ids ya vistos se
+    descartan. Un checkpoint más antiguo que CACHE_EXPIRY_HOURS se descarta.
+    """
+    
+    HEADER_KEY = '__checkpoint__'
+    PAGE_KEY = '__page__'
+    
+    def __init__(self, cache: CacheManager, platform: str, resume: bool = True):
+        self.cache = cache
+        self.platform = platform
+        self.path = cache._checkpoint_file(platform)
+        self.started_at = datetime.now()
+        self.cursor = None
+        self.pages_done = set()
+        self.seen_ids = set()
+        self.movies = []
+        self.resumed = False
+        
+        if resume:
+            self._load()
+        else:
+            self._remove()
+        
+        needs_newline = self._ends_without_newline()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if not self.resumed:
+            self._append({self.HEADER_KEY: {'platform': platform, 'started_at': self.started_at.isoformat()}})
+        elif needs_newline:
+            # La última línea quedó cortada: la siguiente empieza en limpio
+            self._file.write('\n')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    @staticmethod
+    def _movie_key(movie: Dict):
+        movie_id = movie.get('id')
+        return movie_id if movie_id is not None else f"{movie.get('title')}|{movie.get('year')}"
+    
+    def _ends_without_newline(self) -> bool:
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b'\n'
+        except OSError:
+            return False
+    
+    def _load(self):
+        """Leer el progreso guardado si existe y sigue dentro de la validez del caché"""
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        
+        with f:
+            movies = []
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # línea cortada por la caída
+                if self.HEADER_KEY in record:
+                    self.started_at = datetime.fromisoformat(record[self.HEADER_KEY]['started_at'])
+                    self.resumed = True
+                elif self.PAGE_KEY in record:
+                    self.pages_done.add(record[self.PAGE_KEY])
+                    self.cursor = record.get('cursor')
+                else:
+                    movies.append(record)
+        
+        if not self.resumed or datetime.now() - self.started_at > timedelta(hours=self.cache.CACHE_EXPIRY_HOURS):
+            logger.info(f"  🧹 Checkpoint de {self.platform} caducado o inválido: se empieza de cero")
+            self._reset()
+            return
+        
+        for movie in movies:
+            key = self._movie_key(movie)
+            if key not in self.seen_ids:
+                self.seen_ids.add(key)
+                self.movies.append(movie)
+        logger.info(
+            f"  ⏯️ Retomando {self.platform}: {len(self.pages_done)} páginas hechas, "
+            f"{len(self.movies)} películas"
+        )
+    
+    def _reset(self):
+        self._remove()
+        self.started_at = datetime.now()
+        self.cursor = None
+        self.pages_done = set()
+        self.seen_ids = set()
+        self.movies = []
+        self.resumed = False
+    
+    def _remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+    
+    def _append(self, *records: Dict):
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=json_default))
+            self._file.write('\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def record_page(self, page: str, movies: Iterable[Dict], cursor=None) -> list:
+        """
+        Guardar el resultado de una página y marcarla como hecha
+        
+        Args:
+            page: Identificador de la página (URL)
+            movies: Películas extraídas de la página
+            cursor: Posición para continuar (por defecto, la página)
+        
+        Returns:
+            Películas nuevas (las de ids ya vistos se descartan)
+        """
+        new = []
+        for movie in movies:
+            key = self._movie_key(movie)
+            if key not in self.seen_ids:
+                self.seen_ids.add(key)
+                new.append(movie)
+        self.cursor = page if cursor is None else cursor
+        self._append(*new, {self.PAGE_KEY: page, 'cursor': self.cursor})
+        self.pages_done.add(page)
+        self.movies.extend(new)
+        return new
+    
+    def close(self):
+        """Cerrar el fichero conservando el progreso para retomarlo"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def discard(self):
+        """Cerrar y borrar el progreso"""
+        self.close()
+        self._remove()
+    
+    def finish(self) -> list:
+        """
+        Publicar las películas acumuladas como caché de la plataforma
+        y borrar el checkpoint
+        
+        Returns:
+            Películas de la plataforma
+        """
+        self.close()
+        self.cache.save_cache(self.platform, self.movies)
+        self._remove()
+        return self.movies
+
+
 class SyncManager:
-    """Gestionar sincronización de datos scrapeados con BD MySQL"""
+    """
+    Gestionar sincronización de datos scrapeados con BD MySQL
     
-    def __init__(self, db_connection):
+    Las películas se procesan por lotes de batch_size, con una transacción
+    por lote y un número fijo de round trips por lote (no por película):
+    
+        1. SELECT de las películas del lote que ya existen (por tmdb_id)
+        2. Upsert multi-fila solo de las nuevas o modificadas
+        3. SELECT de los ids internos de las recién insertadas
+        4. SELECT de las asignaciones existentes en movies_platforms
+        5. Upsert multi-fila de las asignaciones que faltan
+    """
+    
+    DEFAULT_BATCH_SIZE = 500
+    
+    def __init__(self, db_connection, batch_size: int = None, dialect=None):
         """
         Inicializar gestor de sincronización
         
         Args:
-            db_connection: Conexión a MySQL
+            db_connection: Conexión a MySQL (pymysql) o SQLite (pruebas), o un
+                ConnectionPool para sincronizar varias plataformas a la vez
+            batch_size: Películas por lote / transacción
+            dialect: Dialecto SQL (None = según la conexión)
         """
         self.db = db_connection
+        self.pool = db_connection if isinstance(db_connection, ConnectionPool) else None
         self.cache = CacheManager()
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        if dialect is None:
+            dialect = self.pool.dialect if self.pool else get_dialect(db_connection)
+        self.dialect = dialect
+        self._statements = StatementCache(dialect)
+        self._db_lock = threading.Lock()
     
-    def sync_platform_data(self, platform: str, movies: list) -> dict:
+    @contextmanager
+    def _lease(self):
+        """
+        Conexión y caché de sentencias para un lote
+        
+        Con un pool cada hilo usa su propia conexión; con una conexión única
+        los lotes de distintos hilos se serializan.
+        """
+        if self.pool is not None:
+            with self.pool.lease() as entry:
+                yield entry.connection, entry.statements
+        else:
+            with self._db_lock:
+                yield self.db, self._statements
+    
+    @staticmethod
+    def _movie_row(movie: Dict) -> tuple:
+        """
+        Fila (tmdb_id, title, release_date, rating) normalizada, o None si no es válida
+        
+        Sin release_date se usa year (lo que traen las películas
+        consolidadas); release_date queda entonces como 'YYYY'.
+        """
+        tmdb_id = movie.get('tmdb_id', movie.get('id'))
+        title = movie.get('title')
+        if tmdb_id is None or not title:
+            return None
+        rating = movie.get('rating')
+        release_date = movie.get('release_date')
+        if release_date:
+            release_date = str(release_date)[:10]
+        elif movie.get('year'):
+            release_date = f"{int(movie.get('year')):04d}"
+        return (
+            int(tmdb_id),
+            str(title)[:255],
+            release_date or None,
+            round(float(rating), 1) if rating is not None else None
+        )
+    
+    @staticmethod
+    def _write_row(row: tuple, current: tuple = None) -> tuple:
+        """
+        Valores a escribir de una fila
+        
+        Un release_date de solo año se guarda como 1 de enero, salvo que BD
+        ya tenga una fecha de ese año (COALESCE la conserva).
+        """
+        release_date = row[2]
+        if release_date is None or len(release_date) != 4:
+            return row
+        db_release_date = str(current[1])[:10] if current is not None and current[1] else None
+        if db_release_date and db_release_date.startswith(release_date):
+            release_date = None
+        else:
+            release_date = f'{release_date}-01-01'
+        return (row[0], row[1], release_date, row[3])
+    
+    @staticmethod
+    def _row_changed(row: tuple, current: tuple) -> bool:
+        """Comparar la fila scrapeada con (title, release_date, rating) de BD"""
+        _, title, release_date, rating = row
+        db_title, db_release_date, db_rating = current
+        if title != db_title:
+            return True
+        db_release_date = str(db_release_date)[:10] if db_release_date else None
+        if release_date is not None and release_date != (db_release_date or '')[:len(release_date)]:
+            return True
+        db_rating = round(float(db_rating), 1) if db_rating is not None else None
+        return rating != db_rating
+    
+    @staticmethod
+    def _select_in(cursor, statements: StatementCache, name: str, values: list, *params) -> list:
+        """SELECT ... IN (...) con un placeholder por valor"""
+        cursor.execute(statements.get(name, len(values)), (*params, *values))
+        return cursor.fetchall()
+    
+    def _sync_batch(self, cursor, statements: StatementCache, platform_id: int,
+                    rows: Dict[int, tuple], result: dict):
+        """Sincronizar un lote ya deduplicado por tmdb_id"""
+        tmdb_ids = list(rows)
+        existing = {
+            tmdb_id: (movie_id, (title, release_date, rating))
+            for tmdb_id, movie_id, title, release_date, rating in self._select_in(
+                cursor, statements, 'select_movies', tmdb_ids
+            )
+        }
+        
+        new_ids = [t for t in tmdb_ids if t not in existing]
+        changed_ids = [t for t in tmdb_ids if t in existing and self._row_changed(rows[t], existing[t][1])]
+        
+        to_write = new_ids + changed_ids
+        if to_write:
+            cursor.execute(
+                statements.get('upsert_movies', len(to_write)),
+                [value for t in to_write
+                 for value in self._write_row(rows[t], existing[t][1] if t in existing else None)]
+            )
+        
+        movie_ids = {t: existing[t][0] for t in existing}
+        if new_ids:
+            movie_ids.update(
+                (tmdb_id, movie_id) for tmdb_id, movie_id in self._select_in(
+                    cursor, statements, 'select_movie_ids', new_ids
+                )
+            )
+        
+        linked = {
+            movie_id for (movie_id,) in self._select_in(
+                cursor, statements, 'select_platform_links', list(movie_ids.values()), platform_id
+            )
+        }
+        missing_links = [movie_ids[t] for t in tmdb_ids if movie_ids[t] not in linked]
+        if missing_links:
+            cursor.execute(
+                statements.get('upsert_movie_platforms', len(missing_links)),
+                [value for movie_id in missing_links for value in (movie_id, platform_id)]
+            )
+        
+        changed = set(changed_ids)
+        newly_linked = set(missing_links)
+        result['inserted'] += len(new_ids)
+        for tmdb_id in existing:
+            if tmdb_id in changed or movie_ids[tmdb_id] in newly_linked:
+                result['updated'] += 1
+            else:
+                result['skipped'] += 1
+    
+    def _flush_batch(self, platform_id: int, rows: Dict[int, tuple], result: dict) -> bool:
+        """Ejecutar un lote en su propia transacción. Devuelve si se confirmó"""
+        with self._lease() as (connection, statements):
+            cursor = connection.cursor()
+            try:
+                self._sync_batch(cursor, statements, platform_id, rows, result)
+                connection.commit()
+                result['batches'] += 1
+                return True
+            except Exception as e:
+                connection.rollback()
+                result['failed'] += len(rows)
+                logger.error(f"  ❌ Lote de {len(rows)} películas revertido: {e}")
+                return False
+            finally:
+                cursor.close()
+    
+    def _sync_rows(self, platform_id: int, rows: Iterable[tuple], result: dict) -> set:
+        """
+        Sincronizar filas normalizadas por lotes
+        
+        Returns:
+            tmdb_ids de los lotes revertidos
+        """
+        failed = set()
+        # Dict por tmdb_id: si una película se repite en el lote gana la última
+        batch = {}
+        for row in rows:
+            if row[0] in batch:
+                result['skipped'] += 1
+            batch[row[0]] = row
+            if len(batch) >= self.batch_size:
+                if not self._flush_batch(platform_id, batch, result):
+                    failed.update(batch)
+                batch = {}
+        if batch and not self._flush_batch(platform_id, batch, result):
+            failed.update(batch)
+        return failed
+    
+    def _remove_links(self, platform_id: int, tmdb_ids: list, result: dict) -> set:
+        """
+        Quitar de movies_platforms las películas que ya no están en la plataforma
+        
+        Returns:
+            tmdb_ids de los lotes revertidos
+        """
+        failed = set()
+        for i in range(0, len(tmdb_ids), self.batch_size):
+            batch = tmdb_ids[i:i + self.batch_size]
+            with self._lease() as (connection, statements):
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(statements.get('delete_platform_links', len(batch)), (platform_id, *batch))
+                    connection.commit()
+                    result['removed'] += len(batch)
+                    result['batches'] += 1
+                except Exception as e:
+                    connection.rollback()
+                    result['failed'] += len(batch)
+                    failed.update(batch)
+                    logger.error(f"  ❌ Lote de {len(batch)} bajas revertido: {e}")
+                finally:
+                    cursor.close()
+        return failed
+    
+    @staticmethod
+    def _new_result(platform: str) -> dict:
+        return {
+            'platform': platform,
+            'inserted': 0,
+            'updated': 0,
+            'skipped': 0,
+            'failed': 0,
+            'batches': 0
+        }
+    
+    @staticmethod
+    def _record_metrics(result: dict, elapsed: float):
+        STAGE_SECONDS.observe(elapsed, stage='db_sync')
+        for key in ('inserted', 'updated', 'skipped', 'failed', 'removed'):
+            if result.get(key):
+                DB_ROWS.inc(result[key], result=key)
+    
+    def sync_platform_data(self, platform: str, movies: Iterable[Dict]) -> dict:
         """
         Sincronizar datos scrapeados con BD
         
         Args:
             platform: Nombre de plataforma
-            movies: Lista de películas scrapeadas
+            movies: Películas scrapeadas (lista o generador)
         
         Returns:
-            Diccionario con resultados de sincronización
+            Diccionario con resultados de sincronización: inserted (películas
+            nuevas), updated (existentes con cambios o asignadas a la
+            plataforma), skipped (sin cambios o sin id/título), failed
+            (en lotes revertidos) y batches
         """
         logger.info(f"\n🔄 Sincronizando {platform}...")
         
-        result = {
-            'platform': platform,
-            'inserted': 0,
-            'updated': 0,
-            'skipped': 0
+        result = self._new_result(platform)
+        start = time.perf_counter()
+        
+        def valid_rows():
+            for movie in movies:
+                row = self._movie_row(movie)
+                if row is None:
+                    result['skipped'] += 1
+                else:
+                    yield row
+        
+        self._sync_rows(platform_id(platform), valid_rows(), result)
+        
+        elapsed = time.perf_counter() - start
+        result['seconds'] = round(elapsed, 3)
+        self._record_metrics(result, elapsed)
+        logger.info(f"  ✅ Sincronización completada: {result}")
+        return result
+    
+    @staticmethod
+    def content_hash(row: tuple) -> str:
+        """Hash del contenido sincronizado de una película"""
+        return hashlib.blake2b(json.dumps(row).encode('utf-8'), digest_size=8).hexdigest()
+    
+    def compute_diff(self, platform: str, movies: Iterable[Dict]) -> dict:
+        """
+        Comparar el catálogo scrapeado con el snapshot de la última sincronización
+        
+        El snapshot guarda un hash por par (película, plataforma); solo se
+        conservan en memoria las filas que difieren de él.
+        
+        Returns:
+            Diccionario con added, changed y removed (tmdb_ids), rows (filas
+            a escribir), snapshot (hashes actuales), previous, unchanged e
+            invalid
+        """
+        previous = self.cache.load_snapshot(platform)
+        snapshot = {}
+        rows = {}
+        added, changed = [], []
+        invalid = 0
+        
+        for movie in movies:
+            row = self._movie_row(movie)
+            if row is None:
+                invalid += 1
+                continue
+            key = str(row[0])
+            digest = self.content_hash(row)
+            # Repetida en el catálogo: cuenta una vez y gana la última copia,
+            # tanto en el snapshot como en las filas a escribir
+            duplicate = key in snapshot
+            snapshot[key] = digest
+            old = previous.get(key)
+            if old == digest:
+                if duplicate and rows.pop(row[0], None) is not None:
+                    changed.remove(row[0])
+                continue
+            if row[0] not in rows:
+                (added if old is None else changed).append(row[0])
+            rows[row[0]] = row
+        
+        removed = [int(key) for key in previous if key not in snapshot]
+        return {
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+            'unchanged': len(snapshot) - len(added) - len(changed),
+            'invalid': invalid,
+            'rows': rows,
+            'snapshot': snapshot,
+            'previous': previous
+        }
+    
+    def sync_platform_incremental(self, platform: str, movies: Iterable[Dict]) -> dict:
+        """
+        Sincronizar solo los cambios desde la última sincronización
+        
+        Escribe las películas nuevas o modificadas en la plataforma y quita
+        de movies_platforms las que han salido de ella. El volumen de
+        escrituras depende de los cambios, no del tamaño del catálogo.
+        
+        Args:
+            platform: Nombre de plataforma
+            movies: Catálogo scrapeado completo (lista o generador)
+        
+        Returns:
+            Resultado de sincronización con 'removed' y 'diff' (tamaños del diff)
+        """
+        logger.info(f"\n🔄 Sincronización incremental {platform}...")
+        start = time.perf_counter()
+        
+        diff = self.compute_diff(platform, movies)
+        result = self._new_result(platform)
+        result['removed'] = 0
+        result['skipped'] = diff['invalid']
+        result['diff'] = {
+            'added': len(diff['added']),
+            'changed': len(diff['changed']),
+            'removed': len(diff['removed']),
+            'unchanged': diff['unchanged']
         }
         
-        # Implementar lógica de sincronización
-        # 1. Para cada película: verificar si existe
-        # 2. Si existe: actualizar timestamp de disponibilidad
-        # 3. Si no existe: insertar nueva
-        # 4. Crear/actualizar entrada en movies_platforms
+        platform_db_id = platform_id(platform)
+        failed = self._sync_rows(platform_db_id, diff['rows'].values(), result)
+        failed |= self._remove_links(platform_db_id, diff['removed'], result)
+        
+        # Lo que no se pudo escribir conserva su hash anterior para reintentarse
+        snapshot, previous = diff['snapshot'], diff['previous']
+        for tmdb_id in failed:
+            key = str(tmdb_id)
+            if key in previous:
+                snapshot[key] = previous[key]
+            else:
+                snapshot.pop(key, None)
+        self.cache.save_snapshot(platform, snapshot)
         
+        elapsed = time.perf_counter() - start
+        result['seconds'] = round(elapsed, 3)
+        self._record_metrics(result, elapsed)
+        logger.info(f"  📐 Diff {platform}: {result['diff']}")
         logger.info(f"  ✅ Sincronización completada: {result}")
         return result
+    
+    def sync_from_cache(self, platform: str, incremental: bool = False) -> dict:
+        """
+        Sincronizar una plataforma leyendo su caché en streaming
+        
+        Args:
+            platform: Nombre de plataforma
+            incremental: Enviar solo los cambios respecto al último snapshot
+        
+        Returns:
+            Diccionario con resultados de sincronización
+        """
+        movies = self.cache.iter_cache(platform)
+        if incremental:
+            return self.sync_platform_incremental(platform, movies)
+        return self.sync_platform_data(platform, movies)
+    
+    def sync_platforms(self, platforms: Iterable[str], incremental: bool = True,
+                       max_workers: int = None) -> Dict[str, dict]:
+        """
+        Sincronizar varias plataformas desde caché en paralelo
+        
+        Cada plataforma se sincroniza en su hilo; con un ConnectionPool cada
+        hilo usa su propia conexión, con una conexión única los lotes se
+        turnan.
+        
+        Args:
+            platforms: Nombres de plataforma
+            incremental: Enviar solo los cambios respecto al último snapshot
+            max_workers: Hilos (por defecto, el tamaño del pool)
+        
+        Returns:
+            {plataforma: resultado de sincronización}
+        """
+        platforms = list(platforms)
+        if not platforms:
+            return {}
+        workers = max_workers or (self.pool.size if self.pool else 1)
+        with ThreadPoolExecutor(max_workers=min(workers, len(platforms))) as executor:
+            futures = {
+                platform: executor.submit(self.sync_from_cache, platform, incremental)
+                for platform in platforms
+            }
+            return {platform: future.result() for platform, future in futures.items()}
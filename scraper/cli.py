@@ -0,0 +1,279 @@
+"""
+Punto de entrada único de las herramientas del scraper
+Demuestra: subcomandos con argparse, imports perezosos, medición del arranque (-X importtime)
+
+Cada subcomando importa sus dependencias dentro de su función: consultar o
+limpiar el caché no carga Selenium, pandas, aiohttp ni pyarrow, y arranca
+en lo que tarda el intérprete más unos milisegundos.
+
+Uso:
+    python cli.py scrape [--concurrent] [--resume] [--metrics-port 9464]
+    python cli.py sync [netflix prime ...] [--full] [--workers 4]
+    python cli.py cache stats [--json]
+    python cli.py cache clear [plataforma]
+    python cli.py orchestrate [--demo] [--metrics-port 9464]
+    python cli.py bench [--titles 50000 ...]
+    python cli.py startup [cache stats] [--runs 5] [--json]   # tiempos de arranque e imports
+    python cli.py startup --runs 3 -- cache stats --json      # opciones del comando medido tras '--'
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import logging
+
+logger = logging.getLogger('cli')
+
+CLI_PATH = os.path.abspath(__file__)
+
+# Dependencias que los comandos baratos no deberían cargar
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'selenium', 'aiohttp', 'bs4', 'requests', 'pymysql')
+
+# Presupuesto de arranque de los comandos baratos
+FAST_STARTUP_MS = 200
+
+
+def cmd_scrape(args) -> int:
+    from scraper import main as scraper_main
+
+    argv = []
+    if args.concurrent:
+        argv.append('--concurrent')
+    if args.resume:
+        argv.append('--resume')
+    if args.metrics_port is not None:
+        argv += ['--metrics-port', str(args.metrics_port)]
+    scraper_main(argv)
+    return 0
+
+
+def cmd_sync(args) -> int:
+    from cache_manager import CacheManager, SyncManager
+    from db import create_mysql_pool
+
+    platforms = args.platforms or sorted(CacheManager().get_stats()['platforms'])
+    if not platforms:
+        logger.warning("⚠️ No hay plataformas en caché que sincronizar")
+        return 1
+    with create_mysql_pool(size=args.workers) as pool:
+        results = SyncManager(pool).sync_platforms(platforms, incremental=not args.full)
+    print(json.dumps(results, ensure_ascii=False, indent=2, default=str))
+    return 1 if any(result['failed'] for result in results.values()) else 0
+
+
+def cmd_cache_stats(args) -> int:
+    from cache_manager import CacheManager
+
+    stats = CacheManager().get_stats()
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+    print(f"📦 {stats['total_cache_files']} plataformas en caché")
+    for platform, entry in sorted(stats['platforms'].items()):
+        size = f"{entry['bytes'] / 1024:.0f} KB" if entry.get('bytes') is not None else '?'
+        print(f"  {platform:10} {entry.get('movies') or 0:>8} películas · {size:>9} · {entry.get('timestamp') or '-'}")
+    return 0
+
+
+def cmd_cache_clear(args) -> int:
+    from cache_manager import CacheManager
+
+    CacheManager().clear_cache(args.platform)
+    print(f"🗑️  Caché limpiado: {args.platform or 'todas las plataformas'}")
+    return 0
+
+
+def cmd_orchestrate(args) -> int:
+    import task_orchestrator
+
+    if args.demo:
+        task_orchestrator.main()
+        return 0
+
+    metrics_server = None
+    if args.metrics_port is not None:
+        from metrics import MetricsServer
+
+        metrics_server = MetricsServer(port=args.metrics_port)
+        metrics_server.start()
+    try:
+        orchestrator = task_orchestrator.TaskOrchestrator(max_workers=args.workers)
+        orchestrator.schedule_config(task_orchestrator.ScheduleConfig.get_recommended_schedule(), {
+            'scraping': task_orchestrator.demo_scrape_task,
+            'sync': task_orchestrator.demo_sync_task,
+            'health_check': task_orchestrator.demo_health_check
+        })
+        orchestrator.start()
+    finally:
+        if metrics_server is not None:
+            metrics_server.stop()
+    return 0
+
+
+def cmd_bench(args) -> int:
+    import benchmark_suite
+
+    return benchmark_suite.main(args.bench_args)
+
+
+def parse_importtime(stderr: str):
+    """
+    Líneas de -X importtime como (microsegundos propios, acumulados, profundidad, módulo)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        head, cumulative_us, name = line.split('|', 2)
+        stripped = name.lstrip(' ')
+        depth = (len(name) - len(stripped) - 1) // 2
+        entries.append((int(head.split(':')[1]), int(cumulative_us), depth, stripped.strip()))
+    return entries
+
+
+def measure_startup(command, runs: int = 5) -> dict:
+    """
+    Arranque de un comando en procesos nuevos
+
+    Mide el tiempo total (mínimo y mediana de runs ejecuciones), el del
+    intérprete vacío como referencia, y una ejecución con -X importtime
+    para sumar el tiempo de los imports del comando (sin los que hace el
+    intérprete al arrancar, como site) y listar los más lentos. Los procesos
+    usan un caché temporal (POPFLIX_CACHE_DIR) para no escribir en el real.
+
+    Returns:
+        command, wall_ms_min, wall_ms_median, interpreter_ms, import_ms,
+        modules, heavy_modules (de HEAVY_MODULES cargados), slowest
+        (imports de primer nivel por tiempo acumulado) y fast (dentro de
+        FAST_STARTUP_MS)
+    """
+    import statistics
+    import subprocess
+    import tempfile
+
+    def importtime(argv, env):
+        traced = subprocess.run(
+            [sys.executable, '-X', 'importtime', *argv], stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE, text=True, cwd=os.path.dirname(CLI_PATH), env=env
+        )
+        return parse_importtime(traced.stderr)
+
+    def wall(argv, env):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(
+                argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=os.path.dirname(CLI_PATH), env=env
+            )
+            times.append((time.perf_counter() - start) * 1000)
+        return times
+
+    argv = [sys.executable, CLI_PATH, *command]
+    with tempfile.TemporaryDirectory(prefix='popflix-startup-') as cache_dir:
+        env = dict(os.environ, POPFLIX_CACHE_DIR=cache_dir)
+        times = wall(argv, env)
+        interpreter = wall([sys.executable, '-c', 'pass'], env)
+        baseline = {name for *_, name in importtime(['-c', 'pass'], env)}
+        entries = [entry for entry in importtime(argv[1:], env) if entry[3] not in baseline]
+    top_level = [(cumulative, name) for _, cumulative, depth, name in entries if depth == 0]
+    imported = {name for *_, name in entries}
+    return {
+        'command': ' '.join(command),
+        'wall_ms_min': round(min(times), 1),
+        'wall_ms_median': round(statistics.median(times), 1),
+        'interpreter_ms': round(min(interpreter), 1),
+        'import_ms': round(sum(cumulative for cumulative, _ in top_level) / 1000, 1),
+        'modules': len(entries),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in imported],
+        'slowest': [
+            {'module': name, 'ms': round(cumulative / 1000, 1)}
+            for cumulative, name in sorted(top_level, reverse=True)[:8]
+        ],
+        'fast': min(times) <= FAST_STARTUP_MS
+    }
+
+
+def cmd_startup(args) -> int:
+    commands = [args.command] if args.command else [['cache', 'stats'], ['--help'], ['bench', '--help']]
+    reports = [measure_startup(command, args.runs) for command in commands]
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for report in reports:
+            print(
+                f"{'✅' if report['fast'] else '⚠️'} {report['command']}: {report['wall_ms_min']:.0f} ms "
+                f"(mediana {report['wall_ms_median']:.0f} ms, intérprete {report['interpreter_ms']:.0f} ms) · "
+                f"imports {report['import_ms']:.0f} ms en {report['modules']} módulos"
+            )
+            if report['heavy_modules']:
+                print(f"    pesados: {', '.join(report['heavy_modules'])}")
+            for entry in report['slowest']:
+                print(f"    {entry['ms']:7.1f} ms  {entry['module']}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='cli.py', description='Herramientas del scraper de PopFlix')
+    commands = parser.add_subparsers(dest='command_name', required=True)
+
+    scrape = commands.add_parser('scrape', help='Scrapear las plataformas')
+    scrape.add_argument('--concurrent', action='store_true', help='Scrapear las plataformas en paralelo')
+    scrape.add_argument('--resume', action='store_true', help='Saltar lo ya hecho dentro de la validez del caché')
+    scrape.add_argument('--metrics-port', type=int, help='Servir métricas Prometheus en este puerto')
+    scrape.set_defaults(func=cmd_scrape)
+
+    sync = commands.add_parser('sync', help='Sincronizar el caché con MySQL')
+    sync.add_argument('platforms', nargs='*', help='Plataformas (por defecto, todas las del caché)')
+    sync.add_argument('--full', action='store_true', help='Sincronización completa en lugar de incremental')
+    sync.add_argument('--workers', type=int, default=4, help='Conexiones / plataformas a la vez')
+    sync.set_defaults(func=cmd_sync)
+
+    cache = commands.add_parser('cache', help='Consultar o limpiar el caché')
+    cache_commands = cache.add_subparsers(dest='cache_command', required=True)
+    stats = cache_commands.add_parser('stats', help='Plataformas, películas y tamaño en caché')
+    stats.add_argument('--json', action='store_true')
+    stats.set_defaults(func=cmd_cache_stats)
+    clear = cache_commands.add_parser('clear', help='Borrar el caché')
+    clear.add_argument('platform', nargs='?', help='Plataforma (por defecto, todas)')
+    clear.set_defaults(func=cmd_cache_clear)
+
+    orchestrate = commands.add_parser('orchestrate', help='Ejecutar el orquestador de tareas')
+    orchestrate.add_argument('--demo', action='store_true', help='Mostrar la configuración y ejecutar cada tarea una vez')
+    orchestrate.add_argument('--workers', type=int, default=4, help='Tareas a la vez')
+    orchestrate.add_argument('--metrics-port', type=int, help='Servir métricas Prometheus en este puerto')
+    orchestrate.set_defaults(func=cmd_orchestrate)
+
+    bench = commands.add_parser('bench', help='Benchmarks offline (argumentos de benchmark_suite.py)', add_help=False)
+    bench.add_argument('bench_args', nargs=argparse.REMAINDER)
+    bench.set_defaults(func=cmd_bench)
+
+    startup = commands.add_parser('startup', help='Medir el arranque y los imports de un comando')
+    # nargs='*' y no REMAINDER: --runs y --json valen también detrás del comando;
+    # las opciones del comando medido van tras '--'
+    startup.add_argument(
+        'command', nargs='*',
+        help="Comando a medir (por defecto, los baratos); sus opciones tras '--': startup -- cache stats --json"
+    )
+    startup.add_argument('--runs', type=int, default=5, help='Ejecuciones por comando')
+    startup.add_argument('--json', action='store_true', help='Informe en JSON')
+    startup.set_defaults(func=cmd_startup)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = build_parser()
+    # Lo que siga a 'bench' es de benchmark_suite, aunque empiece por guion
+    args, extra = parser.parse_known_args(argv)
+    if args.func is cmd_bench:
+        args.bench_args = extra + args.bench_args
+    elif extra:
+        parser.error(f"argumentos no reconocidos: {' '.join(extra)}")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Exportación columnar de películas (Parquet / Feather)
+Demuestra: pyarrow, esquema tipado, compresión, particionado hive, lectura por columnas y filtros
+
+Los ficheros se escriben particionados por plataforma y fecha de scrapeo:
+
+    export/platform=netflix/scrape_date=2026-10-18/part-0.parquet
+
+Una película aparece una vez por cada plataforma en la que está (la
+columna platforms conserva la lista completa). El cargador solo lee las
+columnas pedidas y solo abre las particiones que pasan el filtro.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import logging
+from datetime import date
+from typing import Dict, Iterable, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from movie_record import MovieRecord
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    # formato: (formato de pyarrow.dataset, extensión, compresión por defecto)
+    'parquet': ('parquet', '.parquet', 'zstd'),
+    'feather': ('ipc', '.feather', 'lz4')
+}
+
+PARTITION_COLUMNS = ('platform', 'scrape_date')
+NO_PLATFORM = 'none'
+
+# Tipos de las columnas conocidas; el resto se infiere de los datos
+COLUMN_TYPES = {
+    'id': pa.int64(),
+    'tmdb_id': pa.int64(),
+    'title': pa.string(),
+    'year': pa.int16(),
+    'rating': pa.float64(),
+    'url': pa.string(),
+    'source': pa.string(),
+    'platforms': pa.list_(pa.string()),
+    'conflicts': pa.list_(pa.string())
+}
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([('platform', pa.string()), ('scrape_date', pa.string())]), flavor='hive'
+)
+
+
+def movies_table(movies: Iterable[Dict], scrape_date: str = None) -> pa.Table:
+    """
+    Tabla Arrow con una fila por película y plataforma
+
+    Args:
+        movies: Películas con el formato del scraper
+        scrape_date: Fecha ISO de la partición (por defecto, hoy)
+
+    Returns:
+        Tabla con las columnas tipadas más platform y scrape_date. Tiene
+        todas las claves que aparecen en alguna película (nulas donde
+        falten), no solo las de la primera
+    """
+    scrape_date = scrape_date or date.today().isoformat()
+    rows = []
+    columns = {}
+    for movie in movies:
+        base = movie.to_dict() if isinstance(movie, MovieRecord) else movie
+        columns.update(dict.fromkeys(base))
+        for platform in base.get('platforms') or [NO_PLATFORM]:
+            row = dict(base)
+            row['platform'] = platform
+            row['scrape_date'] = scrape_date
+            rows.append(row)
+    if not rows:
+        return pa.table({name: pa.array([], type=pa.string()) for name in PARTITION_COLUMNS})
+
+    columns.update(dict.fromkeys(PARTITION_COLUMNS))
+    table = pa.table({name: [row.get(name) for row in rows] for name in columns})
+    for name, column_type in COLUMN_TYPES.items():
+        index = table.schema.get_field_index(name)
+        if index >= 0 and table.schema.field(index).type != column_type:
+            table = table.set_column(index, name, table.column(index).cast(column_type))
+    return table
+
+
+def export_movies(movies: List[Dict], root: str, fmt: str = 'parquet',
+                  compression: str = None, scrape_date: str = None) -> Dict:
+    """
+    Escribir películas particionadas por plataforma y fecha
+
+    Las particiones de la misma plataforma y fecha se sustituyen; las de
+    otras fechas se conservan.
+
+    Args:
+        movies: Películas con el formato del scraper
+        root: Carpeta raíz del dataset
+        fmt: 'parquet' o 'feather'
+        compression: Códec (por defecto zstd en Parquet y lz4 en Feather)
+        scrape_date: Fecha ISO de la partición (por defecto, hoy)
+
+    Returns:
+        Estadísticas: filas, particiones, ficheros, bytes y segundos
+    """
+    dataset_format, extension, default_compression = FORMATS[fmt]
+    compression = compression or default_compression
+    start = time.perf_counter()
+
+    table = movies_table(movies, scrape_date)
+    if dataset_format == 'parquet':
+        file_options = ds.ParquetFileFormat().make_write_options(compression=compression)
+    else:
+        file_options = ds.IpcFileFormat().make_write_options(compression=compression)
+
+    written = []
+    ds.write_dataset(
+        table, root,
+        format=dataset_format,
+        file_options=file_options,
+        partitioning=_PARTITIONING,
+        basename_template='part-{i}' + extension,
+        existing_data_behavior='delete_matching',
+        file_visitor=lambda written_file: written.append(written_file.path)
+    )
+
+    stats = {
+        'format': fmt,
+        'compression': compression,
+        'rows': table.num_rows,
+        'partitions': len({os.path.dirname(path) for path in written}),
+        'files': len(written),
+        'bytes': sum(os.path.getsize(path) for path in written),
+        'seconds': round(time.perf_counter() - start, 4)
+    }
+    logger.info(
+        f"💾 Exportado {fmt} ({compression}): {stats['rows']} filas en "
+        f"{stats['partitions']} particiones, {stats['bytes'] / 1024:.0f} KB"
+    )
+    return stats
+
+
+def _detect_format(root: str) -> str:
+    for _, _, files in os.walk(root):
+        for file in files:
+            for fmt, (_, extension, _) in FORMATS.items():
+                if file.endswith(extension):
+                    return fmt
+    return 'parquet'
+
+
+def open_dataset(root: str, fmt: str = None) -> ds.Dataset:
+    """Dataset de pyarrow sobre una exportación (formato detectado por extensión)"""
+    fmt = fmt or _detect_format(root)
+    dataset_format, extension, _ = FORMATS[fmt]
+    files = [
+        os.path.join(directory, file)
+        for directory, _, names in os.walk(root)
+        for file in names if file.endswith(extension)
+    ]
+    return ds.dataset(sorted(files), format=dataset_format, partitioning=_PARTITIONING, partition_base_dir=root)
+
+
+def load_movies(root: str, columns: List[str] = None, platforms: Iterable[str] = None,
+                since: str = None, until: str = None, fmt: str = None) -> pd.DataFrame:
+    """
+    Leer una exportación
+
+    Los filtros de plataforma y fecha se resuelven con los nombres de las
+    carpetas, así que las particiones descartadas no se abren.
+
+    Args:
+        root: Carpeta raíz del dataset
+        columns: Columnas a leer (None = todas)
+        platforms: Plataformas a incluir (None = todas)
+        since: Fecha ISO mínima de scrapeo (incluida)
+        until: Fecha ISO máxima de scrapeo (incluida)
+        fmt: 'parquet' o 'feather' (None = detectar)
+
+    Returns:
+        DataFrame con una fila por película y plataforma
+    """
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns)
+
+    conditions = []
+    if platforms is not None:
+        conditions.append(ds.field('platform').isin(list(platforms)))
+    if since is not None:
+        conditions.append(ds.field('scrape_date') >= since)
+    if until is not None:
+        conditions.append(ds.field('scrape_date') <= until)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    table = open_dataset(root, fmt).to_table(columns=columns, filter=expression)
+    return table.to_pandas()
+
+
+def benchmark(count: int = 100000, seed: int = 42) -> Dict:
+    """
+    Comparar JSON indentado, CSV de pandas, Parquet y Feather
+
+    Mide escritura, tamaño en disco, lectura completa y lectura de dos
+    columnas de una plataforma sobre un catálogo sintético.
+
+    Returns:
+        Por formato: write_seconds, bytes, read_seconds, read_columns_seconds
+    """
+    from consolidation import synthetic_catalogue
+
+    movies, _ = synthetic_catalogue(count, seed=seed)
+    directory = tempfile.mkdtemp(prefix='popflix-export-')
+    results = {'movies': count}
+    try:
+        path = os.path.join(directory, 'movies.json')
+        start = time.perf_counter()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(movies, f, ensure_ascii=False, indent=2)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path, encoding='utf-8') as f:
+            loaded = json.load(f)
+        read_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path, encoding='utf-8') as f:
+            [(m['id'], m['rating']) for m in json.load(f) if 'netflix' in m['platforms']]
+        results['json'] = {
+            'write_seconds': write_seconds, 'bytes': os.path.getsize(path),
+            'read_seconds': read_seconds, 'read_columns_seconds': time.perf_counter() - start
+        }
+        del loaded
+
+        path = os.path.join(directory, 'movies.csv')
+        start = time.perf_counter()
+        pd.DataFrame(movies).to_csv(path, index=False, encoding='utf-8')
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        pd.read_csv(path)
+        read_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        frame = pd.read_csv(path, usecols=['id', 'rating', 'platforms'])
+        frame[frame['platforms'].str.contains('netflix')][['id', 'rating']]
+        results['csv'] = {
+            'write_seconds': write_seconds, 'bytes': os.path.getsize(path),
+            'read_seconds': read_seconds, 'read_columns_seconds': time.perf_counter() - start
+        }
+
+        for fmt in FORMATS:
+            root = os.path.join(directory, fmt)
+            stats = export_movies(movies, root, fmt=fmt)
+            start = time.perf_counter()
+            load_movies(root, fmt=fmt)
+            read_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            load_movies(root, columns=['id', 'rating'], platforms=['netflix'], fmt=fmt)
+            results[fmt] = {
+                'write_seconds': stats['seconds'], 'bytes': stats['bytes'],
+                'read_seconds': read_seconds, 'read_columns_seconds': time.perf_counter() - start
+            }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    logger.info(f"📊 Benchmark exportación ({count} películas)")
+    for fmt in ('json', 'csv', *FORMATS):
+        r = results[fmt]
+        logger.info(
+            f"  {fmt:8} escritura {r['write_seconds']:.2f}s · {r['bytes'] / 1024 / 1024:.1f} MB · "
+            f"lectura {r['read_seconds']:.2f}s · 2 columnas de netflix {r['read_columns_seconds']:.3f}s"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    benchmark()
@@ -0,0 +1,420 @@
+"""
+Consolidación de datos scrapeados con TMDB
+Demuestra: joins por diccionario, normalización de títulos memoizada, detección de conflictos
+
+Cada fila scrapeada se asocia a una película de TMDB por tmdb_id o, si no
+lo trae, por título normalizado + año. Las plataformas de cada película son
+las de TMDB más las encontradas por el scraper, y se marcan los conflictos:
+
+    year       el año scrapeado no coincide con TMDB (emparejado por id)
+    rating     la nota scrapeada difiere más de RATING_TOLERANCE
+    platforms  el scraper ve plataformas que TMDB no lista
+
+Con fuzzy_min_score, las filas que no casan de forma exacta se buscan en
+un TitleIndex (title_matcher.py) por similitud de trigramas.
+
+consolidate() usa diccionarios: con catálogos reales el coste está en
+normalizar títulos (Python puro en ambos casos) y en convertir de vuelta a
+diccionarios, así que la versión con joins de pandas no era más rápida
+(benchmark() con 50k títulos: ~0.8s con diccionarios frente a ~1.4s con
+pandas, 1.2s del DataFrame más la conversión a diccionarios).
+consolidate_frame() mantiene los joins de pandas para quien quiera el
+resultado como DataFrame. Las dos versiones convierten year, tmdb_id y
+rating igual (_to_int, _to_float): lo que no es un número cuenta como ausente.
+"""
+
+import random
+import re
+import time
+import unicodedata
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+RATING_TOLERANCE = 1.0
+CONFLICT_FLAGS = ('year', 'rating', 'platforms')
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_title(title) -> str:
+    """Título sin acentos, en minúsculas y solo con letras, números y espacios"""
+    if not isinstance(title, str):
+        return ''
+    if not title.isascii():
+        title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALNUM.sub(' ', title.lower()).strip()
+
+
+def normalize_titles(titles: 'pd.Series') -> 'pd.Series':
+    """normalize_title sobre una serie, calculado una vez por título distinto"""
+    import pandas as pd
+
+    normalized = {title: normalize_title(title) for title in pd.unique(titles)}
+    # astype(object): con una serie vacía map() devolvería float64
+    return titles.map(normalized).astype(object).fillna('')
+
+
+def _to_float(value):
+    """Número o None si no lo es (como pd.to_numeric con errors='coerce')"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = value
+    else:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+    return None if number != number else number
+
+
+def _to_int(value):
+    """Entero o None si no lo es (años e ids llegan a veces como texto)"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    number = _to_float(value)
+    if number is None or not float(number).is_integer():
+        return None
+    return int(number)
+
+
+def _title_key(title, year, normalized: Dict = None) -> str:
+    """Clave título normalizado + año (ya convertido con _to_int); normalized memoiza los títulos"""
+    if normalized is None:
+        name = normalize_title(title)
+    else:
+        name = normalized.get(title)
+        if name is None:
+            name = normalized[title] = normalize_title(title)
+    return f'{name}|{"" if year is None else year}'
+
+
+def _nullable(series: 'pd.Series') -> list:
+    """Valores de una serie con None en lugar de NA/NaN"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _empty_stats(tmdb_count: int) -> Dict:
+    return {
+        'tmdb_movies': tmdb_count,
+        'scraped_rows': 0,
+        'matched_by_id': 0,
+        'matched_by_title': 0,
+        'matched_by_fuzzy': 0,
+        'unmatched': 0,
+        'ambiguous': 0,
+        'conflicts': 0
+    }
+
+
+def _title_index(movies: Iterable[Dict]):
+    # Import diferido: title_matcher usa normalize_title de este módulo
+    from title_matcher import TitleIndex
+    return TitleIndex(movies)
+
+
+def consolidate_frame(tmdb_movies: List[Dict], scraped_movies: List[Dict] = (),
+                      fuzzy_min_score: float = None) -> Tuple['pd.DataFrame', Dict]:
+    """
+    Consolidar con joins de pandas (mismo resultado que consolidate, como DataFrame)
+
+    Args:
+        tmdb_movies: Películas de TMDB (id, title, year, rating, platforms)
+        scraped_movies: Filas scrapeadas (title, year, rating, platforms y
+            opcionalmente tmdb_id)
+        fuzzy_min_score: Puntuación mínima del emparejado difuso para las
+            filas sin coincidencia exacta (None = desactivado)
+
+    Returns:
+        (DataFrame en el orden de TMDB con id, title, year, rating,
+        platforms y una columna booleana conflict_<flag> por conflicto,
+        estadísticas del join)
+    """
+    import pandas as pd
+
+    tmdb = pd.DataFrame.from_records(
+        list(tmdb_movies), columns=['id', 'title', 'year', 'rating', 'platforms']
+    ).drop_duplicates('id')
+    tmdb['year'] = tmdb['year'].map(_to_int).astype('Int64')
+    tmdb['platforms'] = tmdb['platforms'].map(lambda p: p if isinstance(p, list) else [])
+    tmdb['_key'] = normalize_titles(tmdb['title']) + '|' + tmdb['year'].astype('string').fillna('')
+    # Nota de TMDB como número para comparar; el resultado conserva la original
+    tmdb_values = tmdb[['id', 'year', '_key']].assign(rating=tmdb['rating'].map(_to_float).astype(float))
+
+    stats = _empty_stats(len(tmdb))
+    tmdb_platforms = tmdb[['id', 'platforms']].explode('platforms').dropna()
+    tmdb_platforms.columns = ['id', 'platform']
+
+    scraped = pd.DataFrame.from_records(
+        list(scraped_movies), columns=['tmdb_id', 'title', 'year', 'rating', 'platforms']
+    )
+    stats['scraped_rows'] = len(scraped)
+
+    if len(scraped):
+        scraped['_row'] = range(len(scraped))
+        scraped['year'] = scraped['year'].map(_to_int).astype('Int64')
+        scraped['rating'] = scraped['rating'].map(_to_float).astype(float)
+        scraped['tmdb_id'] = scraped['tmdb_id'].map(_to_int).astype('Int64')
+
+        # 1) Por tmdb_id
+        by_id = scraped.dropna(subset=['tmdb_id']).merge(
+            tmdb_values[['id', 'year', 'rating']], left_on='tmdb_id', right_on='id', suffixes=('', '_tmdb')
+        )
+        by_id['_by_id'] = True
+
+        # 2) El resto por título normalizado + año, solo contra claves únicas de TMDB
+        rest = scraped[~scraped['_row'].isin(by_id['_row'])]
+        rest = rest.assign(
+            _key=normalize_titles(rest['title']) + '|' + rest['year'].astype('string').fillna('')
+        )
+        duplicated_keys = tmdb['_key'].duplicated(keep=False)
+        ambiguous = rest['_key'].isin(tmdb.loc[duplicated_keys, '_key'])
+        by_title = rest[~ambiguous].merge(
+            tmdb_values.loc[~duplicated_keys, ['id', 'year', 'rating', '_key']], on='_key', suffixes=('', '_tmdb')
+        )
+        by_title['_by_id'] = False
+
+        # 3) Difuso: filas sin coincidencia exacta ni clave ambigua
+        leftover = rest[~ambiguous & ~rest['_row'].isin(by_title['_row'])]
+        by_fuzzy = by_title.iloc[:0]
+        if fuzzy_min_score is not None and len(leftover):
+            index = _title_index(
+                {'id': movie_id, 'title': title, 'year': year}
+                for movie_id, title, year in zip(
+                    tmdb['id'].tolist(), tmdb['title'].tolist(), _nullable(tmdb['year'])
+                )
+            )
+            leftover = leftover.assign(id=[
+                index.best(title, year, min_score=fuzzy_min_score)
+                for title, year in zip(leftover['title'].tolist(), _nullable(leftover['year']))
+            ])
+            by_fuzzy = leftover.dropna(subset=['id']).merge(
+                tmdb_values[['id', 'year', 'rating']], on='id', suffixes=('', '_tmdb')
+            )
+            by_fuzzy['_by_id'] = False
+
+        matches = pd.concat([by_id, by_title, by_fuzzy], ignore_index=True)
+        stats['matched_by_id'] = len(by_id)
+        stats['matched_by_title'] = len(by_title)
+        stats['matched_by_fuzzy'] = len(by_fuzzy)
+        stats['ambiguous'] = int(ambiguous.sum())
+        stats['unmatched'] = len(scraped) - len(matches)
+    else:
+        matches = pd.DataFrame(columns=['id', 'year', 'year_tmdb', 'rating', 'rating_tmdb', 'platforms', '_by_id'])
+
+    # Conflictos por fila emparejada; se agregan por película con groupby
+    matches['year_conflict'] = (
+        matches['_by_id'].astype(bool)
+        & matches['year'].notna() & matches['year_tmdb'].notna()
+        & (matches['year'] != matches['year_tmdb'])
+    ).astype(bool)
+    matches['rating_conflict'] = (
+        (matches['rating'].astype(float) - matches['rating_tmdb'].astype(float)).abs() > RATING_TOLERANCE
+    ).fillna(False).astype(bool)
+
+    scraped_platforms = matches[['id', 'platforms']].explode('platforms').dropna()
+    scraped_platforms.columns = ['id', 'platform']
+    scraped_platforms = scraped_platforms.drop_duplicates()
+    known = scraped_platforms.merge(tmdb_platforms.assign(_known=True), on=['id', 'platform'], how='left')
+    has_tmdb_platforms = known['id'].isin(tmdb_platforms['id'])
+    new_platforms = known[known['_known'].isna()]
+    platform_conflicts = set(new_platforms.loc[has_tmdb_platforms[known['_known'].isna()], 'id'])
+
+    flags = matches.groupby('id')[['year_conflict', 'rating_conflict']].any()
+
+    # TMDB primero (en su orden) y después las nuevas del scraper, ordenadas.
+    # Las nuevas son pocas: agruparlas con un dict evita el groupby(list),
+    # que pandas resuelve grupo a grupo en Python
+    extra_platforms = {}
+    new_platforms = new_platforms.sort_values(['id', 'platform'])
+    for movie_id, platform in zip(new_platforms['id'].tolist(), new_platforms['platform'].tolist()):
+        extra_platforms.setdefault(movie_id, []).append(platform)
+
+    result = tmdb[['id', 'title', 'year', 'rating', 'platforms']].reset_index(drop=True)
+    if extra_platforms:
+        result['platforms'] = [
+            platforms + extra_platforms[movie_id] if movie_id in extra_platforms else platforms
+            for movie_id, platforms in zip(result['id'].tolist(), result['platforms'].tolist())
+        ]
+    result = result.join(flags, on='id')
+    result['conflict_year'] = result.pop('year_conflict').fillna(False).astype(bool)
+    result['conflict_rating'] = result.pop('rating_conflict').fillna(False).astype(bool)
+    result['conflict_platforms'] = result['id'].isin(platform_conflicts)
+
+    stats['conflicts'] = int(result[[f'conflict_{flag}' for flag in CONFLICT_FLAGS]].any(axis=1).sum())
+    return result, stats
+
+
+def consolidate(tmdb_movies: List[Dict], scraped_movies: List[Dict] = (),
+                fuzzy_min_score: float = None) -> Tuple[List[Dict], Dict]:
+    """
+    Consolidar con diccionarios
+
+    Cada título distinto se normaliza una sola vez (las filas scrapeadas
+    repiten título en cada plataforma). year, tmdb_id y rating se
+    convierten como en consolidate_frame: lo que no es un número se ignora.
+
+    Returns:
+        (películas consolidadas en el orden de TMDB, estadísticas del join)
+    """
+    tmdb = {}
+    for movie in tmdb_movies:
+        tmdb.setdefault(movie.get('id'), movie)
+    stats = _empty_stats(len(tmdb))
+
+    normalized = {}
+    keys = {}
+    for movie_id, movie in tmdb.items():
+        keys.setdefault(_title_key(movie.get('title'), _to_int(movie.get('year')), normalized), []).append(movie_id)
+    index = _title_index(tmdb.values()) if fuzzy_min_score is not None else None
+
+    found = {movie_id: {'platforms': [], 'year': False, 'rating': False} for movie_id in tmdb}
+    for row in scraped_movies:
+        stats['scraped_rows'] += 1
+        tmdb_id = _to_int(row.get('tmdb_id'))
+        year = _to_int(row.get('year'))
+        by_id = tmdb_id is not None and tmdb_id in tmdb
+        if by_id:
+            movie_id = tmdb_id
+            stats['matched_by_id'] += 1
+        else:
+            candidates = keys.get(_title_key(row.get('title'), year, normalized), [])
+            if len(candidates) > 1:
+                stats['ambiguous'] += 1
+                stats['unmatched'] += 1
+                continue
+            if candidates:
+                movie_id = candidates[0]
+                stats['matched_by_title'] += 1
+            else:
+                movie_id = index.best(row.get('title'), year, fuzzy_min_score) if index else None
+                if movie_id is None:
+                    stats['unmatched'] += 1
+                    continue
+                stats['matched_by_fuzzy'] += 1
+
+        movie, entry = tmdb[movie_id], found[movie_id]
+        tmdb_year = _to_int(movie.get('year'))
+        if by_id and year is not None and tmdb_year is not None and year != tmdb_year:
+            entry['year'] = True
+        rating, tmdb_rating = _to_float(row.get('rating')), _to_float(movie.get('rating'))
+        if rating is not None and tmdb_rating is not None and abs(rating - tmdb_rating) > RATING_TOLERANCE:
+            entry['rating'] = True
+        entry['platforms'].extend(row.get('platforms') or [])
+
+    consolidated = []
+    for movie_id, movie in tmdb.items():
+        entry = found[movie_id]
+        platforms = list(movie.get('platforms') or [])
+        extra = sorted({p for p in entry['platforms'] if p not in platforms})
+        conflicts = [
+            flag for flag, hit in zip(CONFLICT_FLAGS, (entry['year'], entry['rating'], bool(extra and platforms)))
+            if hit
+        ]
+        stats['conflicts'] += bool(conflicts)
+        consolidated.append({
+            'id': movie_id,
+            'title': movie.get('title'),
+            'year': _to_int(movie.get('year')),
+            'rating': movie.get('rating'),
+            'platforms': platforms + extra,
+            'source': 'TMDB-verified',
+            'conflicts': conflicts
+        })
+    return consolidated, stats
+
+
+def frame_to_movies(result: 'pd.DataFrame') -> List[Dict]:
+    """Filas de consolidate_frame como los diccionarios de consolidate"""
+    years = _nullable(result['year'])
+    ratings = _nullable(result['rating'])
+    conflict_columns = [result[f'conflict_{flag}'].tolist() for flag in CONFLICT_FLAGS]
+    consolidated = []
+    for movie_id, title, year, rating, platforms, *conflict in zip(
+        result['id'].tolist(), result['title'].tolist(), years, ratings, result['platforms'].tolist(),
+        *conflict_columns
+    ):
+        consolidated.append({
+            'id': movie_id,
+            'title': title,
+            'year': year,
+            'rating': rating,
+            'platforms': platforms,
+            'source': 'TMDB-verified',
+            'conflicts': [flag for flag, hit in zip(CONFLICT_FLAGS, conflict) if hit]
+        })
+    return consolidated
+
+
+def synthetic_catalogue(count: int, seed: int = 42) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Catálogo sintético de TMDB y filas scrapeadas que lo referencian
+
+    La mitad de las filas scrapeadas trae tmdb_id; el resto solo título y
+    año, con variaciones de mayúsculas, acentos y puntuación.
+    """
+    rng = random.Random(seed)
+    platforms = ['netflix', 'prime', 'disney', 'hbo', 'apple', 'hulu', 'paramount']
+    tmdb = [
+        {
+            'id': 500000 + i,
+            'title': f'Película número {i}: la secuela',
+            'year': 1970 + i % 55,
+            'rating': round(rng.uniform(3, 9), 1),
+            'platforms': rng.sample(platforms, rng.randint(0, 2))
+        }
+        for i in range(count)
+    ]
+    scraped = []
+    for movie in tmdb:
+        for platform in rng.sample(platforms, rng.randint(0, 2)):
+            row = {
+                'title': movie['title'].upper().replace('ú', 'u'),
+                'year': movie['year'] if rng.random() > 0.02 else movie['year'] + 1,
+                'rating': round(movie['rating'] + rng.uniform(-1.5, 1.5), 1),
+                'platforms': [platform]
+            }
+            if rng.random() < 0.5:
+                row['tmdb_id'] = movie['id']
+            scraped.append(row)
+    return tmdb, scraped
+
+
+def benchmark(count: int = 200000) -> Dict:
+    """
+    Comparar consolidate() con consolidate_frame() sobre un catálogo sintético
+
+    Returns:
+        Segundos de cada versión, speedup de consolidate sobre pandas
+        (DataFrame + conversión a diccionarios) y si los resultados coinciden
+    """
+    tmdb, scraped = synthetic_catalogue(count)
+    results = {'tmdb_movies': count, 'scraped_rows': len(scraped)}
+
+    start = time.perf_counter()
+    movies, stats = consolidate(tmdb, scraped)
+    results['dict_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frame, _ = consolidate_frame(tmdb, scraped)
+    results['pandas_frame_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frame_movies = frame_to_movies(frame)
+    results['pandas_seconds'] = results['pandas_frame_seconds'] + time.perf_counter() - start
+
+    results['speedup'] = results['pandas_seconds'] / results['dict_seconds']
+    results['identical'] = movies == frame_movies
+    results['stats'] = stats
+
+    logger.info(f"📊 Benchmark consolidación ({count} películas, {len(scraped)} filas scrapeadas)")
+    logger.info(f"  Diccionarios:     {results['dict_seconds']:.2f}s (x{results['speedup']:.1f})")
+    logger.info(f"  pandas DataFrame: {results['pandas_frame_seconds']:.2f}s")
+    logger.info(f"  pandas dicts:     {results['pandas_seconds']:.2f}s")
+    logger.info(f"  Resultados idénticos: {results['identical']} · {stats}")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    benchmark()
@@ -0,0 +1,435 @@
+"""
+Acceso a BD para la sincronización del scraper
+Demuestra: dialectos SQL (MySQL / SQLite), upserts multi-fila, conexión desde .env,
+pool de conexiones con health checks y caché de sentencias
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class MySQLDialect:
+    """SQL para MySQL (pymysql): placeholders %s y ON DUPLICATE KEY UPDATE"""
+
+    name = 'mysql'
+    placeholder = '%s'
+
+    def placeholders(self, count: int) -> str:
+        return ', '.join([self.placeholder] * count)
+
+    def rows(self, row_count: int, columns: int) -> str:
+        row = f'({self.placeholders(columns)})'
+        return ', '.join([row] * row_count)
+
+    def select_movies(self, count: int) -> str:
+        """Películas existentes (tmdb_id, id, title, release_date, rating) por tmdb_id"""
+        return f'SELECT tmdb_id, id, title, release_date, rating FROM movies WHERE tmdb_id IN ({self.placeholders(count)})'
+
+    def select_movie_ids(self, count: int) -> str:
+        """Ids internos (tmdb_id, id) por tmdb_id"""
+        return f'SELECT tmdb_id, id FROM movies WHERE tmdb_id IN ({self.placeholders(count)})'
+
+    def select_platform_links(self, count: int) -> str:
+        """Asignaciones existentes de una plataforma: (platform_id, movie_id...)"""
+        return (
+            f'SELECT movie_id FROM movies_platforms WHERE platform_id = {self.placeholder} '
+            f'AND movie_id IN ({self.placeholders(count)})'
+        )
+
+    def delete_platform_links(self, count: int) -> str:
+        """Quitar películas (por tmdb_id) de una plataforma: (platform_id, tmdb_id...)"""
+        return (
+            f'DELETE FROM movies_platforms WHERE platform_id = {self.placeholder} AND movie_id IN '
+            f'(SELECT id FROM movies WHERE tmdb_id IN ({self.placeholders(count)}))'
+        )
+
+    def upsert_movies(self, row_count: int) -> str:
+        """Upsert de (tmdb_id, title, release_date, rating) sobre la clave única tmdb_id"""
+        return (
+            'INSERT INTO movies (tmdb_id, title, release_date, rating) VALUES '
+            f'{self.rows(row_count, 4)} '
+            'ON DUPLICATE KEY UPDATE title = VALUES(title), rating = VALUES(rating), '
+            'release_date = COALESCE(VALUES(release_date), release_date)'
+        )
+
+    def upsert_movie_platforms(self, row_count: int) -> str:
+        """Alta de (movie_id, platform_id) sobre la clave unique_movie_platform"""
+        return (
+            'INSERT INTO movies_platforms (movie_id, platform_id) VALUES '
+            f'{self.rows(row_count, 2)} '
+            'ON DUPLICATE KEY UPDATE movie_id = VALUES(movie_id)'
+        )
+
+
+class SQLiteDialect(MySQLDialect):
+    """SQL equivalente para SQLite (BD local de pruebas y benchmarks)"""
+
+    name = 'sqlite'
+    placeholder = '?'
+
+    def upsert_movies(self, row_count: int) -> str:
+        return (
+            'INSERT INTO movies (tmdb_id, title, release_date, rating) VALUES '
+            f'{self.rows(row_count, 4)} '
+            'ON CONFLICT(tmdb_id) DO UPDATE SET title = excluded.title, rating = excluded.rating, '
+            'release_date = COALESCE(excluded.release_date, movies.release_date)'
+        )
+
+    def upsert_movie_platforms(self, row_count: int) -> str:
+        return (
+            'INSERT INTO movies_platforms (movie_id, platform_id) VALUES '
+            f'{self.rows(row_count, 2)} '
+            'ON CONFLICT(movie_id, platform_id) DO NOTHING'
+        )
+
+
+# Esquema mínimo de backend/create-movies-tables.sql y setup-movies-platforms.sql
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  tmdb_id INTEGER UNIQUE NOT NULL,
+  title VARCHAR(255) NOT NULL,
+  release_date DATE,
+  rating DECIMAL(3, 1),
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS movies_platforms (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  movie_id INTEGER NOT NULL REFERENCES movies(id) ON DELETE CASCADE,
+  platform_id INTEGER NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT unique_movie_platform UNIQUE (movie_id, platform_id)
+);
+"""
+
+
+class StatementCache:
+    """
+    Sentencias SQL generadas por dialecto y nº de filas, reutilizadas entre lotes
+
+    Los lotes completos siempre tienen el mismo tamaño, así que cada sentencia
+    se construye una vez por conexión. pymysql no implementa el protocolo
+    binario de sentencias preparadas (COM_STMT_PREPARE): los parámetros se
+    escapan en el cliente y lo que se reutiliza es la plantilla SQL.
+    """
+
+    def __init__(self, dialect, max_size: int = 64):
+        """
+        Args:
+            dialect: Dialecto que genera las sentencias
+            max_size: Plantillas conservadas (LRU)
+        """
+        self.dialect = dialect
+        self.max_size = max_size
+        self._statements = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, *args) -> str:
+        """
+        SQL de dialect.<name>(*args), construido solo la primera vez
+
+        Args:
+            name: Método del dialecto (p. ej. 'upsert_movies')
+            args: Argumentos del método (nº de filas)
+        """
+        key = (name, args)
+        sql = self._statements.get(key)
+        if sql is not None:
+            self._statements.move_to_end(key)
+            self.hits += 1
+            return sql
+
+        self.misses += 1
+        sql = getattr(self.dialect, name)(*args)
+        self._statements[key] = sql
+        if len(self._statements) > self.max_size:
+            self._statements.popitem(last=False)
+        return sql
+
+
+class PooledConnection:
+    """Conexión del pool con su antigüedad y sus sentencias"""
+
+    __slots__ = ('connection', 'statements', 'created_at', 'checked_at', 'depth')
+
+    def __init__(self, connection, dialect):
+        self.connection = connection
+        self.statements = StatementCache(dialect)
+        self.created_at = time.monotonic()
+        self.checked_at = self.created_at
+        self.depth = 0
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones DB-API compartido por varios hilos de sincronización
+
+    Cada hilo toma una conexión con lease(); si vuelve a pedirla sin haberla
+    devuelto recibe la misma (préstamo por hilo). Las conexiones se crean
+    bajo demanda hasta size, se comprueban con ping si llevan más de
+    health_check_interval segundos sin uso y se reciclan al superar
+    max_lifetime segundos, de una en una, para no provocar reconexiones en
+    masa.
+    """
+
+    def __init__(
+        self,
+        factory: Callable,
+        size: int = 4,
+        max_lifetime: float = 3600,
+        health_check_interval: float = 30,
+        dialect=None
+    ):
+        """
+        Inicializar pool
+
+        Args:
+            factory: Función sin argumentos que abre una conexión
+            size: Conexiones máximas abiertas
+            max_lifetime: Segundos antes de reciclar una conexión
+            health_check_interval: Segundos de inactividad tras los que se
+                comprueba la conexión antes de prestarla
+            dialect: Dialecto SQL (None = según la primera conexión)
+        """
+        self.factory = factory
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self._dialect = dialect
+
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self.stats = {
+            'created': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'leases': 0,
+            'wait_seconds': 0.0
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def dialect(self):
+        """Dialecto SQL de las conexiones del pool"""
+        if self._dialect is None:
+            with self.lease() as entry:
+                self._dialect = get_dialect(entry.connection)
+        return self._dialect
+
+    def _create(self) -> PooledConnection:
+        connection = self.factory()
+        if self._dialect is None:
+            self._dialect = get_dialect(connection)
+        with self._lock:
+            self.stats['created'] += 1
+        return PooledConnection(connection, self._dialect)
+
+    @staticmethod
+    def _ping(connection):
+        """Comprobar que la conexión sigue viva (lanza excepción si no)"""
+        if hasattr(connection, 'ping'):
+            connection.ping(reconnect=False)
+        else:
+            connection.execute('SELECT 1')
+
+    @staticmethod
+    def _close_connection(entry: PooledConnection):
+        try:
+            entry.connection.close()
+        except Exception as e:
+            logger.warning(f"  ⚠️ Error cerrando conexión: {e}")
+
+    def _replace(self, entry: PooledConnection) -> PooledConnection:
+        """Cerrar una conexión y abrir otra en su lugar"""
+        self._close_connection(entry)
+        try:
+            return self._create()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def _checkout(self, timeout: float) -> PooledConnection:
+        """Sacar una conexión libre, abrir una nueva o esperar a que se devuelva"""
+        try:
+            entry = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._open < self.size
+                if can_open:
+                    self._open += 1
+            if can_open:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            try:
+                entry = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f'Sin conexiones libres tras {timeout}s') from None
+
+        now = time.monotonic()
+        if now - entry.created_at >= self.max_lifetime:
+            logger.info("  ♻️ Reciclando conexión por antigüedad")
+            with self._lock:
+                self.stats['recycled'] += 1
+            return self._replace(entry)
+
+        if now - entry.checked_at >= self.health_check_interval:
+            try:
+                self._ping(entry.connection)
+                entry.checked_at = now
+            except Exception as e:
+                logger.warning(f"  ⚠️ Conexión caída, se abre otra: {e}")
+                with self._lock:
+                    self.stats['health_check_failures'] += 1
+                return self._replace(entry)
+        return entry
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """
+        Tomar prestada una conexión para el hilo actual
+
+        Args:
+            timeout: Segundos máximos esperando una conexión libre (None = sin límite)
+
+        Yields:
+            PooledConnection (connection y statements)
+
+        Raises:
+            TimeoutError: Si no queda ninguna conexión libre a tiempo
+        """
+        if self._closed:
+            raise RuntimeError('ConnectionPool cerrado')
+
+        entry = getattr(self._local, 'entry', None)
+        if entry is None:
+            wait_start = time.perf_counter()
+            entry = self._checkout(timeout)
+            with self._lock:
+                self.stats['leases'] += 1
+                self.stats['wait_seconds'] += time.perf_counter() - wait_start
+            self._local.entry = entry
+
+        entry.depth += 1
+        try:
+            yield entry
+        finally:
+            entry.depth -= 1
+            if entry.depth == 0:
+                self._local.entry = None
+                self._release(entry)
+
+    def _release(self, entry: PooledConnection):
+        """Devolver la conexión sin transacciones abiertas"""
+        try:
+            entry.connection.rollback()
+        except Exception as e:
+            logger.warning(f"  ⚠️ Conexión descartada al devolverla: {e}")
+            self._close_connection(entry)
+            with self._lock:
+                self._open -= 1
+            return
+
+        entry.checked_at = time.monotonic()
+        if self._closed:
+            self._close_connection(entry)
+            with self._lock:
+                self._open -= 1
+            return
+        self._idle.put(entry)
+
+    def close(self):
+        """Cerrar las conexiones libres del pool"""
+        self._closed = True
+        while True:
+            try:
+                self._close_connection(self._idle.get_nowait())
+            except queue.Empty:
+                break
+            with self._lock:
+                self._open -= 1
+        logger.info("🛑 Pool de conexiones cerrado")
+
+
+def get_dialect(connection):
+    """Dialecto SQL adecuado para una conexión DB-API"""
+    if isinstance(connection, sqlite3.Connection):
+        return SQLiteDialect()
+    return MySQLDialect()
+
+
+def create_sqlite_database(path: str = ':memory:') -> sqlite3.Connection:
+    """
+    Crear una BD SQLite con el esquema de movies / movies_platforms
+
+    Sustituye a MySQL en pruebas y benchmarks locales.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.executescript(SQLITE_SCHEMA)
+    return connection
+
+
+def connect_mysql(**overrides):
+    """
+    Abrir conexión MySQL con la configuración de .env
+
+    Variables: DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME (por defecto
+    las mismas que backend/server.js)
+    """
+    import pymysql
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': int(os.getenv('DB_PORT', '3306')),
+        'user': os.getenv('DB_USER', 'root'),
+        'password': os.getenv('DB_PASSWORD', '1234'),
+        'database': os.getenv('DB_NAME', 'popflix'),
+        'charset': 'utf8mb4',
+        'autocommit': False
+    }
+    config.update(overrides)
+    logger.info(f"🔌 Conectando a MySQL {config['host']}:{config['port']}/{config['database']}")
+    return pymysql.connect(**config)
+
+
+def create_mysql_pool(size: int = 4, max_lifetime: float = 3600, **overrides) -> ConnectionPool:
+    """
+    Pool de conexiones MySQL con la configuración de .env
+
+    Args:
+        size: Conexiones máximas (una por plataforma sincronizada a la vez)
+        max_lifetime: Segundos antes de reciclar una conexión (por debajo
+            de wait_timeout del servidor)
+        overrides: Parámetros de conexión que sustituyen a los de .env
+    """
+    return ConnectionPool(
+        lambda: connect_mysql(**overrides),
+        size=size,
+        max_lifetime=max_lifetime,
+        dialect=MySQLDialect()
+    )
@@ -0,0 +1,320 @@
+"""
+Pool de sesiones WebDriver reutilizables
+Demuestra: pre-calentado de navegadores, préstamo/devolución, reciclado por uso y memoria
+"""
+
+import functools
+import os
+import queue
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def resolve_chromedriver_path() -> str:
+    """
+    Resolver la ruta de chromedriver una sola vez por proceso
+
+    ChromeDriverManager().install() consulta versiones y revisa su caché en
+    disco en cada llamada; aquí se hace una vez. CHROMEDRIVER_PATH permite
+    fijar la ruta sin pasar por webdriver-manager.
+    """
+    path = os.environ.get('CHROMEDRIVER_PATH')
+    if path and os.path.exists(path):
+        return path
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    logger.info(f"  📍 chromedriver resuelto: {path}")
+    return path
+
+
+def chrome_rss_mb(driver) -> float:
+    """
+    Memoria residente (MB) de chromedriver y sus procesos Chrome hijos
+
+    Returns:
+        MB usados, o None si psutil no está instalado o no hay proceso
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except (AttributeError, psutil.Error):
+        return None
+
+
+def _has_psutil() -> bool:
+    try:
+        import psutil  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PooledDriver:
+    """Sesión del pool con sus contadores de uso"""
+
+    __slots__ = ('driver', 'pages', 'created_at')
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """
+    Pool de N sesiones de navegador headless
+
+    Las sesiones se crean al arrancar el pool y se prestan a los trabajos de
+    renderizado con lease(). Al devolverlas se limpian (cookies, pestañas y
+    página en blanco) y se reciclan cuando superan max_pages páginas o
+    max_rss_mb de memoria.
+
+    Si no se puede crear la sesión de reemplazo, el hueco se reintenta en
+    los siguientes lease(); si no queda ninguna sesión viva y tampoco se
+    puede crear, lease() falla en lugar de esperar para siempre.
+    """
+
+    # Segundos entre reintentos de crear las sesiones que faltan mientras se espera
+    RETRY_SECONDS = 1.0
+
+    def __init__(
+        self,
+        factory: Callable,
+        size: int = 2,
+        max_pages: int = 100,
+        max_rss_mb: float = None,
+        rss_probe: Callable = chrome_rss_mb
+    ):
+        """
+        Inicializar pool
+
+        Args:
+            factory: Función sin argumentos que crea un driver
+            size: Sesiones mantenidas abiertas
+            max_pages: Páginas renderizadas antes de reciclar una sesión
+            max_rss_mb: Memoria máxima por sesión (None = sin límite)
+            rss_probe: Función driver -> MB (None si no se puede medir)
+        """
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.rss_probe = rss_probe
+
+        if max_rss_mb is not None and rss_probe is chrome_rss_mb and not _has_psutil():
+            logger.warning(
+                f"  ⚠️ psutil no está instalado: se ignora max_rss_mb={max_rss_mb} "
+                "y las sesiones solo se reciclan por páginas"
+            )
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        # Sesiones que no se pudieron reemplazar y están pendientes de crear
+        self._missing = 0
+        self.stats = {
+            'created': 0,
+            'recycled': 0,
+            'leases': 0,
+            'reset_failures': 0,
+            'create_failures': 0,
+            'wait_seconds': 0.0
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _create(self) -> PooledDriver:
+        entry = PooledDriver(self.factory())
+        with self._lock:
+            self.stats['created'] += 1
+        return entry
+
+    def start(self):
+        """
+        Pre-calentar las sesiones del pool
+
+        Las sesiones que no se pueden crear quedan pendientes y se
+        reintentan en lease(), igual que un reemplazo fallido.
+
+        Raises:
+            RuntimeError: Si no se pudo crear ninguna sesión
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        logger.info(f"🔥 Pre-calentando {self.size} sesiones de navegador...")
+        error = None
+        for _ in range(self.size):
+            try:
+                self._idle.put(self._create())
+            except Exception as e:
+                with self._lock:
+                    self._missing += 1
+                    self.stats['create_failures'] += 1
+                logger.error(f"  ❌ No se pudo crear sesión de navegador: {e}")
+                error = e
+        if error is not None and self._idle.empty():
+            raise RuntimeError('DriverPool sin sesiones: no se pudo crear ninguna') from error
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """
+        Tomar prestada una sesión del pool
+
+        Args:
+            timeout: Segundos máximos esperando una sesión libre (None = sin límite)
+
+        Yields:
+            Driver listo para usar
+
+        Raises:
+            TimeoutError: Si no queda ninguna sesión libre a tiempo
+            RuntimeError: Si el pool está cerrado o no le queda ninguna sesión
+                y no se puede crear otra
+        """
+        if self._closed:
+            raise RuntimeError('DriverPool cerrado')
+        self.start()
+
+        wait_start = time.perf_counter()
+        entry = self._take(timeout, wait_start)
+
+        with self._lock:
+            self.stats['leases'] += 1
+            self.stats['wait_seconds'] += time.perf_counter() - wait_start
+
+        failed = False
+        try:
+            yield entry.driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            entry.pages += 1
+            self._release(entry, failed)
+
+    def _take(self, timeout: float, wait_start: float) -> PooledDriver:
+        """Esperar una sesión libre, reintentando crear las que falten"""
+        deadline = None if timeout is None else wait_start + timeout
+        while True:
+            if self._idle.empty():
+                self._replace_missing()
+            with self._lock:
+                exhausted = self._missing >= self.size
+            if exhausted and self._idle.empty():
+                raise RuntimeError('DriverPool sin sesiones: no se pudo crear ninguna')
+
+            wait = self.RETRY_SECONDS
+            if deadline is not None:
+                wait = min(wait, deadline - time.perf_counter())
+                if wait <= 0:
+                    raise TimeoutError(f'Sin sesiones libres tras {timeout}s')
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def _replace_missing(self):
+        """Reintentar crear una de las sesiones que no se pudieron reemplazar"""
+        with self._lock:
+            if self._missing == 0:
+                return
+            self._missing -= 1
+        try:
+            entry = self._create()
+        except Exception as e:
+            with self._lock:
+                self._missing += 1
+                self.stats['create_failures'] += 1
+            logger.error(f"  ❌ No se pudo crear sesión de navegador: {e}")
+            return
+        self._idle.put(entry)
+
+    def _release(self, entry: PooledDriver, failed: bool):
+        """Limpiar o reciclar la sesión y devolverla al pool"""
+        if self._closed:
+            self._quit(entry)
+            return
+
+        reason = None
+        if entry.pages >= self.max_pages:
+            reason = f'{entry.pages} páginas'
+        elif self.max_rss_mb is not None:
+            rss = self.rss_probe(entry.driver) if self.rss_probe else None
+            if rss is not None and rss > self.max_rss_mb:
+                reason = f'{rss:.0f} MB'
+
+        if reason is None and not self._reset(entry.driver):
+            reason = 'fallo al limpiar' if not failed else 'error en el trabajo'
+
+        if reason is not None:
+            logger.info(f"  ♻️ Reciclando sesión de navegador ({reason})")
+            self._quit(entry)
+            with self._lock:
+                self.stats['recycled'] += 1
+            try:
+                entry = self._create()
+            except Exception as e:
+                # El hueco se reintenta en el siguiente lease()
+                with self._lock:
+                    self._missing += 1
+                    self.stats['create_failures'] += 1
+                logger.error(f"  ❌ No se pudo crear sesión de reemplazo: {e}")
+                return
+
+        self._idle.put(entry)
+
+    def _reset(self, driver) -> bool:
+        """Dejar la sesión como nueva: una pestaña, sin cookies y en blanco"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            with self._lock:
+                self.stats['reset_failures'] += 1
+            logger.warning(f"  ⚠️ No se pudo limpiar la sesión: {e}")
+            return False
+
+    @staticmethod
+    def _quit(entry: PooledDriver):
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.warning(f"  ⚠️ Error cerrando navegador: {e}")
+
+    def close(self):
+        """Cerrar todas las sesiones libres del pool"""
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        logger.info("🛑 Pool de navegadores cerrado")
@@ -0,0 +1,284 @@
+"""
+Capa HTTP asíncrona para el scraper de Popflix
+Demuestra: asyncio, pool de conexiones keep-alive, reintentos con backoff
+"""
+
+import asyncio
+import random
+import time
+import logging
+from typing import Dict, Iterable, List
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from metrics import BYTES, CACHE_REQUESTS, PAGES, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFetcher:
+    """
+    Cliente HTTP asíncrono con una sesión compartida
+
+    Todas las requests pasan por un único aiohttp.ClientSession cuyo
+    conector mantiene conexiones keep-alive por host, de modo que miles de
+    páginas de un mismo catálogo reutilizan unas pocas conexiones TCP/TLS
+    en lugar de abrir una por request.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        headers: Dict = None,
+        concurrency: int = 32,
+        max_connections: int = 100,
+        max_per_host: int = 8,
+        timeout: float = 30,
+        connect_timeout: float = 10,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30,
+        keepalive_timeout: float = 30,
+        rate_limiter=None,
+        response_cache=None
+    ):
+        """
+        Inicializar cliente
+
+        Args:
+            headers: Headers enviados en todas las requests
+            concurrency: Requests en vuelo como máximo
+            max_connections: Conexiones abiertas en total
+            max_per_host: Conexiones abiertas por host
+            timeout: Timeout total por intento (segundos)
+            connect_timeout: Timeout de conexión (segundos)
+            max_retries: Reintentos tras el primer intento
+            backoff_base: Base del backoff exponencial (segundos)
+            backoff_max: Tope del backoff (segundos)
+            keepalive_timeout: Segundos que una conexión ociosa sigue abierta
+            rate_limiter: HostRateLimiter opcional consultado antes de cada intento
+            response_cache: HTTPResponseCache opcional; con él las requests son
+                condicionales y los 304 se sirven desde disco
+        """
+        self.headers = dict(headers or {})
+        self.concurrency = concurrency
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.keepalive_timeout = keepalive_timeout
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+
+        self._session = None
+        self._semaphore = None
+        self.stats = {
+            'requests': 0,
+            'responses': 0,
+            'retries': 0,
+            'errors': 0,
+            'bytes': 0,
+            'not_modified': 0,
+            'bytes_saved': 0,
+            'connections_created': 0,
+            'connections_reused': 0
+        }
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Crear la sesión y el pool de conexiones"""
+        if self._session is not None:
+            return
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=self.timeout,
+            auto_decompress=True,
+            trace_configs=[trace_config]
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self):
+        """Cerrar la sesión y todas sus conexiones"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _on_connection_created(self, session, ctx, params):
+        self.stats['connections_created'] += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self.stats['connections_reused'] += 1
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Backoff exponencial con jitter completo para el intento dado"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(headers) -> float:
+        """Segundos indicados en Retry-After (None si no hay o no es numérico)"""
+        value = headers.get('Retry-After')
+        try:
+            return max(0.0, float(value)) if value is not None else None
+        except ValueError:
+            return None
+
+    async def fetch(self, url: str, headers: Dict = None) -> Dict:
+        """
+        Descargar una URL con reintentos
+
+        Args:
+            url: URL a descargar
+            headers: Headers adicionales para esta request
+
+        Returns:
+            Diccionario con url, status, headers, body (bytes ya descomprimidos),
+            elapsed, attempts, from_cache (cuerpo servido desde el caché de
+            respuestas tras un 304) y error (None si todo fue bien)
+        """
+        if self._session is None:
+            await self.open()
+
+        result = {
+            'url': url,
+            'host': urlsplit(url).hostname,
+            'status': None,
+            'headers': {},
+            'body': b'',
+            'elapsed': 0.0,
+            'attempts': 0,
+            'from_cache': False,
+            'error': None
+        }
+        start = time.perf_counter()
+        conditional = self.response_cache is not None
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                result['attempts'] = attempt + 1
+                self.stats['requests'] += 1
+                delay = None
+
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async(result['host'])
+
+                request_headers = headers
+                if conditional:
+                    request_headers = {**self.response_cache.validators(url), **(headers or {})}
+
+                try:
+                    async with self._session.get(url, headers=request_headers) as response:
+                        body = await response.read()
+                        result['status'] = response.status
+                        result['headers'] = dict(response.headers)
+                        result['body'] = body
+                        result['error'] = None
+                        self.stats['responses'] += 1
+                        self.stats['bytes'] += len(body)
+                        BYTES.inc(len(body), source='network')
+
+                        if response.status == 304 and conditional:
+                            cached = self.response_cache.revalidated(url)
+                            if cached is not None:
+                                result.update(status=cached['status'], headers=cached['headers'],
+                                              body=cached['body'], from_cache=True)
+                                self.stats['not_modified'] += 1
+                                self.stats['bytes_saved'] += len(cached['body'])
+                                BYTES.inc(len(cached['body']), source='http_cache')
+                                CACHE_REQUESTS.inc(cache='http', result='hit')
+                                break
+                            # La copia se expulsó entre la request y el 304: se pide entera
+                            conditional = False
+                            self.stats['requests'] += 1
+                            async with self._session.get(url, headers=headers) as full:
+                                body = await full.read()
+                                result.update(status=full.status, headers=dict(full.headers), body=body)
+                                self.stats['responses'] += 1
+                                self.stats['bytes'] += len(body)
+                                BYTES.inc(len(body), source='network')
+                                response = full
+                        elif conditional and response.status == 200:
+                            CACHE_REQUESTS.inc(cache='http', result='miss')
+
+                        if self.response_cache is not None:
+                            self.response_cache.store(url, response.status, result['headers'], body)
+
+                        retry_after = self._retry_after(response.headers)
+                        if self.rate_limiter is not None:
+                            self.rate_limiter.on_response(result['host'], response.status, retry_after)
+
+                        if response.status not in self.RETRY_STATUSES:
+                            break
+                        result['error'] = f'HTTP {response.status}'
+                        delay = retry_after
+                        if self.rate_limiter is not None and response.status in self.rate_limiter.THROTTLE_STATUSES:
+                            # La pausa de Retry-After ya la aplica el bucket del host
+                            delay = 0.0
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result['error'] = f'{type(e).__name__}: {e}'
+
+                if attempt == self.max_retries:
+                    break
+
+                self.stats['retries'] += 1
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                logger.debug(f"  🔁 Reintento {attempt + 1} de {url} en {delay:.2f}s ({result['error']})")
+                await asyncio.sleep(delay)
+
+        result['elapsed'] = time.perf_counter() - start
+        STAGE_SECONDS.observe(result['elapsed'], stage='fetch')
+        PAGES.inc(stage='fetch', result='error' if result['error'] else 'cached' if result['from_cache'] else 'ok')
+        if result['error']:
+            self.stats['errors'] += 1
+            logger.warning(f"  ⚠️ Fallo descargando {url}: {result['error']}")
+
+        return result
+
+    async def fetch_all(self, urls: Iterable[str]) -> List[Dict]:
+        """
+        Descargar muchas URLs en paralelo (limitado por concurrency)
+
+        Returns:
+            Resultados en el mismo orden que urls
+        """
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+
+def fetch_urls(urls: Iterable[str], **options) -> List[Dict]:
+    """
+    Descargar URLs desde código síncrono
+
+    Args:
+        urls: URLs a descargar
+        **options: Parámetros de AsyncFetcher
+
+    Returns:
+        Resultados en el mismo orden que urls
+    """
+    async def run():
+        async with AsyncFetcher(**options) as fetcher:
+            return await fetcher.fetch_all(urls)
+
+    return asyncio.run(run())
@@ -0,0 +1,172 @@
+"""
+Escritura atómica y locks entre procesos para los ficheros del scraper
+Demuestra: write-then-rename, fsync, locks consultivos (POSIX y Windows)
+"""
+
+import os
+import tempfile
+import time
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def _current_umask() -> int:
+    # os.umask solo se puede leer cambiándola; se hace una vez al importar
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Permisos de un fichero nuevo, como los que daría open(path, 'w')
+DEFAULT_FILE_MODE = 0o666 & ~_current_umask()
+
+
+class FileLock:
+    """
+    Lock consultivo exclusivo sobre un fichero .lock
+
+    Solo coordina a los escritores (threads o procesos); los lectores nunca
+    lo toman porque las escrituras se publican con un rename atómico.
+    """
+
+    def __init__(self, path: str, timeout: float = 30, poll_interval: float = 0.01):
+        """
+        Args:
+            path: Fichero de lock (se crea si no existe)
+            timeout: Segundos máximos esperando el lock
+            poll_interval: Pausa entre intentos
+        """
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def _try_lock(self) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        """
+        Tomar el lock
+
+        Raises:
+            TimeoutError: Si otro escritor lo retiene más de timeout segundos
+        """
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock():
+            if time.monotonic() >= deadline:
+                os.close(self._fd)
+                self._fd = None
+                raise TimeoutError(f'No se pudo obtener el lock {self.path}')
+            time.sleep(self.poll_interval)
+
+    def release(self):
+        """Liberar el lock"""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class AtomicFile:
+    """
+    Fichero temporal que sustituye al destino de golpe al confirmarlo
+
+    Se escribe en un temporal del mismo directorio; commit() hace fsync y
+    os.replace, así un lector ve el fichero anterior completo o el nuevo
+    completo, nunca uno a medias. El fichero publicado conserva los
+    permisos del destino anterior, o los de open() con la umask actual si
+    es nuevo (mkstemp crea los temporales con 0600).
+    """
+
+    REPLACE_RETRIES = 20
+
+    def __init__(self, path: str, mode: str = 'w', encoding: str = None):
+        """
+        Args:
+            path: Fichero destino
+            mode: 'w' (texto) o 'wb' (binario)
+            encoding: Codificación en modo texto
+        """
+        self.path = path
+        directory, name = os.path.split(path)
+        fd, self.temp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+        self.file = os.fdopen(fd, mode, encoding=encoding if 'b' not in mode else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def commit(self):
+        """Volcar a disco y publicar el fichero"""
+        if self.file is None:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.file = None
+        self._apply_mode()
+
+        for attempt in range(self.REPLACE_RETRIES):
+            try:
+                os.replace(self.temp_path, self.path)
+                return
+            except PermissionError:
+                # Windows no deja reemplazar un fichero que un lector tiene abierto
+                if attempt == self.REPLACE_RETRIES - 1:
+                    self._remove_temp()
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+
+    def _apply_mode(self):
+        try:
+            mode = os.stat(self.path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = DEFAULT_FILE_MODE
+        os.chmod(self.temp_path, mode)
+
+    def discard(self):
+        """Descartar lo escrito"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self._remove_temp()
+
+    def _remove_temp(self):
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,254 @@
+"""
+Etapa de parseo HTML en un pool de procesos
+Demuestra: ProcessPoolExecutor, SoupStrainer, registros compactos, back-pressure, métricas
+
+BeautifulSoup es CPU y retiene el GIL: parsear en el bucle de descarga
+limita el scraper a un núcleo. Aquí cada página se envía en bruto a un
+proceso del pool, que solo construye los nodos de las tarjetas de título
+(SoupStrainer) y devuelve tuplas pequeñas en lugar del árbol completo.
+
+Convención de marcado: cada título del catálogo es un elemento con
+data-title y, opcionalmente, data-id, data-year, data-rating y un enlace.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+import logging
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from metrics import PAGES, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# lxml es varias veces más rápido; html.parser no necesita dependencias
+DEFAULT_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+RECORD_FIELDS = ('id', 'title', 'year', 'rating', 'url')
+
+_CARDS = SoupStrainer(attrs={'data-title': True})
+
+
+def _number(value, cast):
+    try:
+        return cast(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def parse_catalogue_page(html, url: str = None, platform: str = None, parser: str = None) -> Dict:
+    """
+    Extraer las tarjetas de título de una página de catálogo
+
+    Se ejecuta en los procesos del pool, por eso es una función de módulo.
+
+    Args:
+        html: HTML en bytes o str
+        url: URL de la página (para los resultados)
+        platform: Plataforma de la página
+        parser: Parser de BeautifulSoup (por defecto DEFAULT_PARSER)
+
+    Returns:
+        Diccionario con url, platform, records (tuplas RECORD_FIELDS),
+        parse_seconds y error
+    """
+    start = time.perf_counter()
+    result = {'url': url, 'platform': platform, 'records': [], 'parse_seconds': 0.0, 'error': None}
+    try:
+        soup = BeautifulSoup(html, parser or DEFAULT_PARSER, parse_only=_CARDS)
+        records = []
+        for card in soup.find_all(attrs={'data-title': True}):
+            link = card.get('href') or (card.a.get('href') if card.a else None)
+            records.append((
+                _number(card.get('data-id'), int),
+                card['data-title'].strip(),
+                _number(card.get('data-year'), int),
+                _number(card.get('data-rating'), float),
+                link
+            ))
+        result['records'] = records
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['parse_seconds'] = time.perf_counter() - start
+    return result
+
+
+def records_to_movies(result: Dict) -> List[Dict]:
+    """Convertir los registros de una página al formato de película del scraper"""
+    movies = []
+    for record in result['records']:
+        movie = dict(zip(RECORD_FIELDS, record))
+        movie['platforms'] = [result['platform']] if result['platform'] else []
+        movies.append(movie)
+    return movies
+
+
+class ParsePool:
+    """
+    Pool de procesos para parsear páginas con back-pressure
+
+    Como mucho max_pending páginas esperan o se están parseando; submit()
+    bloquea al productor (la descarga) cuando se llega al límite, así el
+    HTML pendiente en memoria no crece sin control si se descarga más
+    rápido de lo que se parsea.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None, parser: str = None, executor=None):
+        """
+        Inicializar pool
+
+        Args:
+            max_workers: Procesos (por defecto, núcleos disponibles)
+            max_pending: Páginas en cola o en parseo (por defecto 2 por proceso)
+            parser: Parser de BeautifulSoup (por defecto DEFAULT_PARSER)
+            executor: Executor alternativo (p. ej. de threads en pruebas)
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.parser = parser or DEFAULT_PARSER
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._started_at = None
+        self._finished_at = None
+        self._parse_times = []
+        self.stats = {
+            'pages': 0,
+            'records': 0,
+            'errors': 0,
+            'max_pending': 0,
+            'backpressure_wait_seconds': 0.0
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        """Arrancar los procesos"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._owns_executor = True
+
+    def close(self):
+        """Esperar a las páginas pendientes y parar los procesos"""
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def submit(self, html, url: str = None, platform: str = None, block: bool = True) -> Future:
+        """
+        Enviar una página al pool
+
+        Args:
+            html: HTML en bytes o str
+            url: URL de la página
+            platform: Plataforma de la página
+            block: Esperar si hay max_pending páginas pendientes
+
+        Returns:
+            Future con el resultado de parse_catalogue_page
+
+        Raises:
+            BlockingIOError: Si block es False y el pool está lleno
+        """
+        self.start()
+        wait_start = time.perf_counter()
+        if not self._slots.acquire(blocking=block):
+            raise BlockingIOError('Pool de parseo lleno')
+        waited = time.perf_counter() - wait_start
+
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = time.perf_counter()
+            self._pending += 1
+            self.stats['max_pending'] = max(self.stats['max_pending'], self._pending)
+            self.stats['backpressure_wait_seconds'] += waited
+
+        try:
+            future = self._executor.submit(parse_catalogue_page, html, url, platform, self.parser)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _on_done(self, future: Future):
+        self._release()
+        if future.cancelled():
+            return
+        error = future.exception()
+        with self._lock:
+            self._finished_at = time.perf_counter()
+            self.stats['pages'] += 1
+            if error is not None:
+                self.stats['errors'] += 1
+                PAGES.inc(stage='parse', result='error')
+                return
+            result = future.result()
+            self._parse_times.append(result['parse_seconds'])
+            self.stats['records'] += len(result['records'])
+            if result['error']:
+                self.stats['errors'] += 1
+        STAGE_SECONDS.observe(result['parse_seconds'], stage='parse')
+        PAGES.inc(stage='parse', result='error' if result['error'] else 'ok')
+
+    def parse_all(self, pages: Iterable[Tuple]) -> Iterator[Dict]:
+        """
+        Parsear páginas (url, html[, platform]) en el orden en que terminan
+
+        Consume pages a medida que quedan huecos en el pool, de modo que un
+        generador de descargas nunca va más de max_pending páginas por
+        delante del parseo.
+        """
+        in_flight = set()
+        for page in pages:
+            url, html, *rest = page
+            # Entregar lo ya terminado antes de bloquear por un hueco libre
+            while len(in_flight) >= self.max_pending:
+                done = next(as_completed(in_flight))
+                in_flight.discard(done)
+                yield done.result()
+            in_flight.add(self.submit(html, url, rest[0] if rest else None))
+        for done in as_completed(in_flight):
+            yield done.result()
+
+    def get_stats(self) -> Dict:
+        """
+        Métricas del pool
+
+        Returns:
+            pages, records, errors, max_pending, backpressure_wait_seconds,
+            parse_seconds (total y percentiles por página) y utilization
+            (tiempo de parseo / (tiempo transcurrido × procesos))
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            times = sorted(self._parse_times)
+            elapsed = (self._finished_at or 0) - (self._started_at or 0)
+
+        busy = sum(times)
+        stats['parse_seconds'] = round(busy, 4)
+        if times:
+            stats['parse_seconds_p50'] = round(times[len(times) // 2], 5)
+            stats['parse_seconds_p95'] = round(times[min(len(times) - 1, int(len(times) * 0.95))], 5)
+            stats['parse_seconds_max'] = round(times[-1], 5)
+        stats['elapsed_seconds'] = round(max(elapsed, 0.0), 4)
+        stats['utilization'] = round(busy / (elapsed * self.max_workers), 3) if elapsed > 0 else 0.0
+        stats['workers'] = self.max_workers
+        stats['parser'] = self.parser
+        return stats
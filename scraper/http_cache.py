@@ -0,0 +1,218 @@
+"""
+Caché persistente de respuestas HTTP con peticiones condicionales
+Demuestra: ETag / Last-Modified, If-None-Match / If-Modified-Since, 304, expulsión LRU por tamaño
+
+Cada URL se guarda en un fichero propio (nombre = hash de la URL) con una
+primera línea JSON de metadatos (validadores y headers) seguida del cuerpo.
+En la siguiente descarga se envían los validadores; si el servidor responde
+304 Not Modified el cuerpo se sirve desde disco y no se transfiere de nuevo.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from file_lock import AtomicFile
+
+logger = logging.getLogger(__name__)
+
+# Headers que no describen el cuerpo ya descomprimido que se guarda
+_SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+
+class HTTPResponseCache:
+    """
+    Caché de respuestas por URL en disco, acotado en bytes
+
+    Solo guarda respuestas 200 con ETag o Last-Modified (sin ellas no hay
+    forma de revalidar) y que no llevan Cache-Control: no-store. Cuando el
+    total supera max_bytes se borran las entradas usadas hace más tiempo.
+    """
+
+    SUFFIX = '.http'
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Inicializar caché
+
+        Args:
+            directory: Carpeta de las entradas (se crea si no existe)
+            max_bytes: Tamaño máximo en disco
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # clave -> bytes en disco, de la menos a la más recientemente usada
+        self._entries = None
+        self._total_bytes = 0
+        self.stats = {
+            'stored': 0,
+            'revalidated': 0,
+            'evictions': 0,
+            'bytes_saved': 0
+        }
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:40]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def _index(self) -> OrderedDict:
+        """Índice en memoria construido una vez a partir de la carpeta (por fecha de uso)"""
+        if self._entries is None:
+            found = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(self.SUFFIX) and entry.is_file():
+                    st = entry.stat()
+                    found.append((st.st_mtime_ns, entry.name[:-len(self.SUFFIX)], st.st_size))
+            found.sort()
+            self._entries = OrderedDict((key, size) for _, key, size in found)
+            self._total_bytes = sum(size for _, _, size in found)
+        return self._entries
+
+    def _read(self, url: str, with_body: bool) -> Optional[Dict]:
+        key = self.key(url)
+        try:
+            with open(self._path(key), 'rb') as f:
+                meta = json.loads(f.readline())
+                if meta.get('url') != url:
+                    return None
+                if with_body:
+                    meta['body'] = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """
+        Headers condicionales para revalidar la copia guardada de una URL
+
+        Returns:
+            If-None-Match y/o If-Modified-Since (vacío si no hay copia)
+        """
+        meta = self._read(url, with_body=False)
+        if meta is None:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Copia guardada de una URL
+
+        Returns:
+            Diccionario con url, status, headers, etag, last_modified,
+            stored_at y body, o None si no está
+        """
+        meta = self._read(url, with_body=True)
+        if meta is None:
+            return None
+
+        key = self.key(url)
+        with self._lock:
+            entries = self._index()
+            if key in entries:
+                entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))  # orden LRU persistente entre ejecuciones
+        except FileNotFoundError:
+            pass
+        return meta
+
+    def revalidated(self, url: str) -> Optional[Dict]:
+        """
+        Copia local para responder a un 304 Not Modified
+
+        Returns:
+            La entrada (como get) o None si se expulsó entretanto
+        """
+        entry = self.get(url)
+        if entry is not None:
+            with self._lock:
+                self.stats['revalidated'] += 1
+                self.stats['bytes_saved'] += len(entry['body'])
+        return entry
+
+    def store(self, url: str, status: int, headers: Dict, body: bytes) -> bool:
+        """
+        Guardar una respuesta si se puede revalidar
+
+        Returns:
+            True si se guardó
+        """
+        lowered = {k.lower(): v for k, v in headers.items()}
+        etag = lowered.get('etag')
+        last_modified = lowered.get('last-modified')
+        if status != 200 or not (etag or last_modified) or 'no-store' in lowered.get('cache-control', ''):
+            return False
+
+        meta = {
+            'url': url,
+            'status': status,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time(),
+            'headers': {k: v for k, v in headers.items() if k.lower() not in _SKIP_HEADERS}
+        }
+        header_line = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        size = len(header_line) + len(body)
+        if size > self.max_bytes:
+            return False
+
+        key = self.key(url)
+        with AtomicFile(self._path(key), 'wb') as tmp:
+            tmp.file.write(header_line)
+            tmp.file.write(body)
+
+        with self._lock:
+            entries = self._index()
+            self._total_bytes += size - entries.pop(key, 0)
+            entries[key] = size
+            self.stats['stored'] += 1
+            self._evict()
+        return True
+
+    def _evict(self):
+        """Borrar las entradas menos usadas hasta quedar por debajo de max_bytes"""
+        entries = self._entries
+        while self._total_bytes > self.max_bytes and entries:
+            key, size = entries.popitem(last=False)
+            self._total_bytes -= size
+            self.stats['evictions'] += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Borrar todas las entradas"""
+        with self._lock:
+            for key in self._index():
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._entries = OrderedDict()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict:
+        """Estadísticas: entradas, bytes en disco, guardadas, revalidadas, expulsadas y bytes ahorrados"""
+        with self._lock:
+            entries = self._index()
+            stats = dict(self.stats)
+            stats['entries'] = len(entries)
+            stats['bytes'] = self._total_bytes
+        return stats
@@ -0,0 +1,373 @@
+"""
+Métricas del scraping (contadores, histogramas y temporizadores)
+Demuestra: instrumentación por etapa, formato de texto de Prometheus, endpoint HTTP mínimo
+
+Cada etapa (fetch, render, parse, consolidate, cache_read, cache_write,
+db_sync) registra su duración en el histograma popflix_stage_seconds, y los
+contadores acumulan páginas, bytes, aciertos de caché y segundos de
+throttling. Todo vive en un registro de proceso (REGISTRY) que:
+
+    - se sirve en formato Prometheus con MetricsServer (GET /metrics)
+    - se resume con report() dentro de scraping_report.json
+
+Uso:
+    with timed('consolidate'):
+        ...
+    CACHE_REQUESTS.inc(cache='memory', result='hit')
+"""
+
+import bisect
+import math
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Segundos: de 1 ms (parseo de una página) a 10 min (sincronizar un catálogo)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 600)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _Metric:
+    """Base de las métricas: nombre, ayuda, etiquetas y un valor por combinación"""
+
+    kind = None
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, no {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple, extra: Dict = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} {self.kind}'
+
+
+class Counter(_Metric):
+    """Valor que solo crece (peticiones, bytes, segundos acumulados)"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError(f"{self.name}: un contador no puede bajar")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def values(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        for key, value in sorted(self.values().items()):
+            yield f'{self.name}{self._labels(key)} {_format_value(value)}'
+
+
+class Histogram(_Metric):
+    """Distribución de duraciones en buckets acumulativos, con suma y recuento"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {
+                    'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0, 'max': 0.0
+                }
+            series['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            series['sum'] += value
+            series['count'] += 1
+            series['max'] = max(series['max'], value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Temporizador: observa la duración del bloque (también si lanza una excepción)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> float:
+        """Cuantil aproximado (límite superior del bucket en que cae)"""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            if not series or not series['count']:
+                return None
+            counts, count, maximum = list(series['counts']), series['count'], series['max']
+        target, seen = q * count, 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(bound, maximum)
+        return maximum
+
+    def series(self) -> Dict[Tuple, Dict]:
+        with self._lock:
+            return {key: dict(value, counts=list(value['counts'])) for key, value in self._values.items()}
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        for key, series in sorted(self.series().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series['counts']):
+                cumulative += count
+                yield f'{self.name}_bucket{self._labels(key, {"le": _format_value(bound)})} {cumulative}'
+            yield f'{self.name}_sum{self._labels(key)} {_format_value(series["sum"])}'
+            yield f'{self.name}_count{self._labels(key)} {series["count"]}'
+
+
+class MetricsRegistry:
+    """Conjunto de métricas de un proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} ya está registrada como {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Contador (devuelve el existente si ya está registrado)"""
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Histograma (devuelve el existente si ya está registrado)"""
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def clear(self):
+        """Poner a cero todas las métricas (entre ejecuciones o pruebas)"""
+        for metric in self.metrics():
+            metric.clear()
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        lines = []
+        for metric in sorted(self.metrics(), key=lambda m: m.name):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'popflix_stage_seconds', 'Duración de cada etapa del scraping', ('stage',)
+)
+PAGES = REGISTRY.counter(
+    'popflix_pages_total', 'Páginas procesadas por etapa y resultado', ('stage', 'result')
+)
+BYTES = REGISTRY.counter(
+    'popflix_bytes_total', 'Bytes de cuerpos HTTP descargados (network) o servidos tras un 304 (http_cache)', ('source',)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'popflix_cache_requests_total', 'Consultas a cada caché por resultado (hit/miss)', ('cache', 'result')
+)
+THROTTLE_SECONDS = REGISTRY.counter(
+    'popflix_throttle_seconds_total', 'Segundos de espera impuestos por el rate limiter', ('host',)
+)
+DB_ROWS = REGISTRY.counter(
+    'popflix_db_rows_total', 'Películas sincronizadas con la BD por resultado', ('result',)
+)
+TASK_SECONDS = REGISTRY.histogram(
+    'popflix_task_seconds', 'Duración de los intentos de cada tarea del orquestador', ('task',)
+)
+TASK_RUNS = REGISTRY.counter(
+    'popflix_task_runs_total', 'Intentos de cada tarea del orquestador por resultado', ('task', 'result')
+)
+
+
+def timed(stage: str):
+    """Temporizador de una etapa (context manager sobre STAGE_SECONDS)"""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def report(registry: MetricsRegistry = REGISTRY) -> Dict:
+    """
+    Resumen de las métricas para scraping_report.json
+
+    Returns:
+        stages (recuento, total, media, p50, p95 y máximo por etapa),
+        pages, bytes, cache_hit_ratio, throttle_seconds, db_rows, tasks,
+        pages_per_second (páginas descargadas / segundos de descarga en
+        tanda) y la exposición Prometheus completa
+    """
+    def counter_map(counter, label_index=0):
+        result = {}
+        for key, value in counter.values().items():
+            result[key[label_index]] = result.get(key[label_index], 0) + value
+        return result
+
+    stages = {}
+    for (stage,), series in sorted(STAGE_SECONDS.series().items()):
+        stages[stage] = {
+            'count': series['count'],
+            'seconds_total': round(series['sum'], 4),
+            'seconds_avg': round(series['sum'] / series['count'], 5) if series['count'] else None,
+            'seconds_p50': STAGE_SECONDS.quantile(0.5, stage=stage),
+            'seconds_p95': STAGE_SECONDS.quantile(0.95, stage=stage),
+            'seconds_max': round(series['max'], 5)
+        }
+
+    pages = {}
+    for (stage, result), value in PAGES.values().items():
+        pages.setdefault(stage, {})[result] = value
+
+    cache_hit_ratio = {}
+    for (cache, result), value in CACHE_REQUESTS.values().items():
+        cache_hit_ratio.setdefault(cache, {'hit': 0, 'miss': 0})[result] = value
+    cache_hit_ratio = {
+        cache: round(counts['hit'] / (counts['hit'] + counts['miss']), 4) if counts['hit'] + counts['miss'] else None
+        for cache, counts in cache_hit_ratio.items()
+    }
+
+    fetched = sum(pages.get('fetch', {}).values())
+    batch_seconds = stages.get('fetch_batch', {}).get('seconds_total')
+
+    tasks = {}
+    for (task, result), value in TASK_RUNS.values().items():
+        tasks.setdefault(task, {})[result] = value
+
+    return {
+        'stages': stages,
+        'pages': pages,
+        'pages_per_second': round(fetched / batch_seconds, 2) if batch_seconds else None,
+        'bytes': counter_map(BYTES),
+        'cache_hit_ratio': cache_hit_ratio,
+        'throttle_seconds': round(sum(THROTTLE_SECONDS.values().values()), 3),
+        'db_rows': counter_map(DB_ROWS),
+        'tasks': tasks,
+        'prometheus': registry.render()
+    }
+
+
+def _handler_class(registry: MetricsRegistry):
+    """Handler de /metrics para un registro (http.server solo se importa al servir)"""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"  📈 {self.address_string()} {format % args}")
+
+    return MetricsHandler
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP local con las métricas (GET /metrics)
+
+    Corre en un hilo daemon; por defecto solo escucha en localhost.
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = '127.0.0.1', port: int = 9464):
+        """
+        Args:
+            registry: Registro a exponer
+            host: Interfaz de escucha
+            port: Puerto (0 = uno libre cualquiera)
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}/metrics'
+
+    def start(self):
+        """Empezar a servir (no hace nada si ya está en marcha)"""
+        if self._server is not None:
+            return
+        from http.server import ThreadingHTTPServer
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _handler_class(self.registry))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logger.info(f"📈 Métricas en {self.url}")
+
+    def stop(self):
+        """Dejar de servir"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
@@ -0,0 +1,305 @@
+"""
+Registro compacto de película
+Demuestra: __slots__, máscaras de bits de plataformas, Mapping de solo lectura, medición de memoria
+
+Un diccionario por película con claves de texto ocupa ~350 bytes entre el
+dict y su lista de plataformas. MovieRecord guarda los campos habituales
+en slots y las plataformas como un entero con un bit por plataforma de
+PLATFORM_MAP (las listas se reconstruyen desde una tabla precalculada).
+
+MovieRecord es un Mapping con las mismas claves que el diccionario del
+que sale, así que el código que lee películas (movie['title'],
+movie.get('year'), pandas, comparaciones con dicts) funciona igual; lo
+que no permite es modificarlas.
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+import logging
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List
+
+from platforms import PLATFORM_MAP
+
+logger = logging.getLogger(__name__)
+
+# Un bit por plataforma según su id de BD; el orden canónico es el de los ids
+PLATFORM_BITS = {name: 1 << (platform_id - 1) for name, platform_id in PLATFORM_MAP.items()}
+_BY_ID = sorted(PLATFORM_MAP, key=PLATFORM_MAP.get)
+_MASK_PLATFORMS = [
+    tuple(name for name in _BY_ID if mask & PLATFORM_BITS[name])
+    for mask in range(1 << max(PLATFORM_MAP.values()))
+]
+
+_MISSING = object()
+_FIELDS = ('id', 'title', 'year', 'rating', 'source')
+KEYS = ('id', 'title', 'year', 'rating', 'platforms', 'source')
+
+
+def platforms_to_mask(platforms: Iterable[str]) -> int:
+    """
+    Máscara de bits de una lista de plataformas
+
+    Raises:
+        KeyError: Si alguna plataforma no está en PLATFORM_MAP
+    """
+    mask = 0
+    for platform in platforms:
+        mask |= PLATFORM_BITS[platform]
+    return mask
+
+
+def mask_to_platforms(mask: int) -> List[str]:
+    """Plataformas de una máscara en orden de id de BD"""
+    return list(_MASK_PLATFORMS[mask])
+
+
+class MovieRecord(Mapping):
+    """
+    Película en slots, de solo lectura
+
+    Las claves ausentes en el diccionario original siguen ausentes
+    (movie.get('source') devuelve None y 'source' in movie es False). Las
+    claves no habituales (tmdb_id, url, conflicts...) van en extras, igual
+    que las listas de plataformas que la máscara no puede representar tal
+    cual (plataformas desconocidas, repetidas o en otro orden).
+    """
+
+    __slots__ = ('id', 'title', 'year', 'rating', 'source', 'platform_mask', 'extras')
+
+    def __init__(self, id=_MISSING, title=_MISSING, year=_MISSING, rating=_MISSING,
+                 platforms=None, source=_MISSING, extras: Dict = None):
+        self.id = id
+        self.title = title
+        self.year = year
+        self.rating = rating
+        self.source = source
+        self.platform_mask = None
+        self.extras = dict(extras) if extras else None
+        if platforms is not None:
+            self._set_platforms(platforms)
+
+    def _set_platforms(self, platforms):
+        mask = 0
+        for platform in platforms:
+            bit = PLATFORM_BITS.get(platform)
+            if bit is None or mask & bit:
+                mask = -1
+                break
+            mask |= bit
+        if mask >= 0 and len(platforms) == len(_MASK_PLATFORMS[mask]) and list(platforms) == mask_to_platforms(mask):
+            self.platform_mask = mask
+            return
+        # No representable con la máscara: se guarda la lista tal cual
+        known = [p for p in platforms if p in PLATFORM_BITS]
+        self.platform_mask = platforms_to_mask(known)
+        if self.extras is None:
+            self.extras = {}
+        self.extras['platforms'] = list(platforms)
+
+    @classmethod
+    def from_dict(cls, movie: Dict) -> 'MovieRecord':
+        """Registro a partir del diccionario de película del scraper"""
+        if isinstance(movie, MovieRecord):
+            return movie
+        record = cls.__new__(cls)
+        get = movie.get
+        record.id = get('id', _MISSING)
+        record.title = get('title', _MISSING)
+        record.year = get('year', _MISSING)
+        record.rating = get('rating', _MISSING)
+        record.source = get('source', _MISSING)
+        record.platform_mask = None
+        extras = None
+        if len(movie) > len(KEYS) or any(key not in KEYS for key in movie):
+            extras = {key: value for key, value in movie.items() if key not in KEYS}
+        record.extras = extras or None
+        platforms = get('platforms')
+        if platforms is not None:
+            record._set_platforms(platforms)
+        return record
+
+    @property
+    def platforms(self) -> List[str]:
+        if self.extras is not None and 'platforms' in self.extras:
+            return list(self.extras['platforms'])
+        if self.platform_mask is None:
+            return None
+        return list(_MASK_PLATFORMS[self.platform_mask])
+
+    def has_platform(self, platform: str) -> bool:
+        """Comprobar una plataforma sin construir la lista"""
+        return self.platform_mask is not None and bool(self.platform_mask & PLATFORM_BITS.get(platform, 0))
+
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        if key == 'platforms':
+            if self.platform_mask is None:
+                raise KeyError(key)
+            return self.platforms
+        if self.extras is not None and key in self.extras:
+            return self.extras[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in _FIELDS:
+            return getattr(self, key) is not _MISSING
+        if key == 'platforms':
+            return self.platform_mask is not None
+        return self.extras is not None and key in self.extras
+
+    def __iter__(self) -> Iterator[str]:
+        for key in KEYS:
+            if key in self:
+                yield key
+        if self.extras is not None:
+            for key in self.extras:
+                if key != 'platforms':
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f'MovieRecord({self.to_dict()!r})'
+
+    def __reduce__(self):
+        return (MovieRecord.from_dict, (self.to_dict(),))
+
+    def to_dict(self) -> Dict:
+        """Diccionario equivalente al original"""
+        movie = {}
+        for key in _FIELDS[:4]:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                movie[key] = value
+        if self.platform_mask is not None:
+            movie['platforms'] = self.platforms
+        if self.source is not _MISSING:
+            movie['source'] = self.source
+        if self.extras is not None:
+            for key, value in self.extras.items():
+                if key != 'platforms':
+                    movie[key] = value
+        return movie
+
+
+def to_records(movies: Iterable[Dict]) -> List[MovieRecord]:
+    """Convertir películas (diccionarios o registros) a MovieRecord"""
+    from_dict = MovieRecord.from_dict
+    return [from_dict(movie) for movie in movies]
+
+
+def to_dicts(movies: Iterable[Dict]) -> List[Dict]:
+    """Convertir películas (registros o diccionarios) a diccionarios nuevos"""
+    return [movie.to_dict() if isinstance(movie, MovieRecord) else dict(movie) for movie in movies]
+
+
+def json_default(value):
+    """Hook default de json.dump/json.dumps para escribir registros"""
+    if isinstance(value, MovieRecord):
+        return value.to_dict()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _deep_size(movie: Dict) -> int:
+    """Bytes del contenedor de una película sin contar título e ids (compartidos igual en ambos casos)"""
+    if isinstance(movie, MovieRecord):
+        size = sys.getsizeof(movie)
+        if movie.extras is not None:
+            size += sys.getsizeof(movie.extras)
+        return size
+    size = sys.getsizeof(movie)
+    if isinstance(movie.get('platforms'), list):
+        size += sys.getsizeof(movie['platforms'])
+    return size
+
+
+def _synthetic_movies(count: int, seed: int = 7) -> List[Dict]:
+    rng = random.Random(seed)
+    platforms = _BY_ID
+    return [
+        {
+            'id': 100000 + i,
+            'title': f'Película {i}',
+            'year': 1950 + i % 75,
+            'rating': round(rng.uniform(1, 10), 1),
+            'platforms': [p for p in platforms if rng.random() < 0.25],
+            'source': 'TMDB-verified'
+        }
+        for i in range(count)
+    ]
+
+
+def benchmark(count: int = 200000) -> Dict:
+    """
+    Bytes por película con diccionarios y con MovieRecord
+
+    Mide con tracemalloc la memoria asignada al construir el catálogo
+    completo en cada forma (los títulos se crean antes y se comparten) y el
+    coste de convertir ida y vuelta.
+
+    Returns:
+        bytes_per_movie_dict, bytes_per_movie_record, ratio y segundos de conversión
+    """
+    source = _synthetic_movies(count)
+    rows = [tuple(movie.values()) for movie in source]
+    del source
+
+    def build_dicts():
+        return [
+            {'id': i, 'title': t, 'year': y, 'rating': r, 'platforms': list(p), 'source': s}
+            for i, t, y, r, p, s in rows
+        ]
+
+    def build_records():
+        return [MovieRecord(i, t, y, r, p, s) for i, t, y, r, p, s in rows]
+
+    results = {'movies': count}
+    for name, build in (('dict', build_dicts), ('record', build_records)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        movies = build()
+        results[f'{name}_build_seconds'] = time.perf_counter() - start
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f'bytes_per_movie_{name}'] = current / count
+        results[f'shallow_bytes_per_movie_{name}'] = _deep_size(movies[0])
+        if name == 'dict':
+            dicts = movies
+        else:
+            records = movies
+        del movies
+
+    start = time.perf_counter()
+    converted = to_records(dicts)
+    results['to_records_seconds'] = time.perf_counter() - start
+    start = time.perf_counter()
+    back = to_dicts(converted)
+    results['to_dicts_seconds'] = time.perf_counter() - start
+    start = time.perf_counter()
+    encoded = json.dumps(records, default=json_default, separators=(',', ':'))
+    results['json_dump_records_seconds'] = time.perf_counter() - start
+    results['round_trip_identical'] = back == dicts and json.loads(encoded) == dicts
+    results['ratio'] = results['bytes_per_movie_dict'] / results['bytes_per_movie_record']
+
+    logger.info(f"📊 Benchmark memoria por película ({count} títulos)")
+    logger.info(f"  dict:        {results['bytes_per_movie_dict']:.0f} bytes/película")
+    logger.info(f"  MovieRecord: {results['bytes_per_movie_record']:.0f} bytes/película (x{results['ratio']:.1f} menos)")
+    logger.info(
+        f"  Conversión: {results['to_records_seconds']:.2f}s a registros, "
+        f"{results['to_dicts_seconds']:.2f}s a dicts · ida y vuelta idéntica: {results['round_trip_identical']}"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    benchmark()
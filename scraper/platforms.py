@@ -0,0 +1,41 @@
+"""
+Plataformas de streaming soportadas por el scraper
+Módulo sin dependencias para poder usarlo desde caché, sincronización y CLI
+"""
+
+# Mapeo de plataformas a IDs de BD
+PLATFORM_MAP = {
+    'netflix': 1,
+    'prime': 2,
+    'disney': 3,
+    'hbo': 4,
+    'apple': 7,
+    'hulu': 5,
+    'paramount': 6
+}
+
+# Host de cada plataforma (el rate limiting se aplica por host)
+PLATFORM_HOSTS = {
+    'netflix': 'www.netflix.com',
+    'prime': 'www.primevideo.com',
+    'disney': 'www.disneyplus.com',
+    'hbo': 'www.max.com',
+    'apple': 'tv.apple.com',
+    'hulu': 'www.hulu.com',
+    'paramount': 'www.paramountplus.com'
+}
+
+
+def platform_id(platform) -> int:
+    """
+    Id de BD de una plataforma
+
+    Args:
+        platform: Nombre (clave de PLATFORM_MAP) o id numérico
+
+    Raises:
+        KeyError: Si la plataforma no existe
+    """
+    if isinstance(platform, int):
+        return platform
+    return PLATFORM_MAP[platform]
@@ -0,0 +1,188 @@
+"""
+Rate limiting por host para el scraper de Popflix
+Demuestra: token bucket, control adaptativo ante HTTP 429, threads + asyncio
+"""
+
+import threading
+import time
+import logging
+from typing import Dict
+
+from metrics import THROTTLE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket con reservas
+
+    Cada request reserva un token. Si no hay tokens el saldo queda en
+    negativo y la reserva devuelve cuánto hay que esperar, así varias
+    requests concurrentes al mismo host se encolan sin volver a competir
+    por el lock mientras duermen.
+    """
+
+    def __init__(self, rate: float, burst: int, now: float):
+        """
+        Args:
+            rate: Tokens por segundo
+            burst: Tokens acumulables como máximo
+            now: Instante inicial (reloj monotónico)
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Reservar un token y devolver los segundos de espera"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def block(self, until: float):
+        """Bloquear el bucket hasta el instante indicado (Retry-After)"""
+        self.blocked_until = max(self.blocked_until, until)
+
+    def slow_down(self, factor: float, min_rate: float):
+        """Reducir el ritmo tras un 429 (decremento multiplicativo)"""
+        self.rate = max(min_rate, self.rate * factor)
+
+    def speed_up(self, step: float):
+        """Recuperar ritmo tras respuestas correctas (incremento aditivo)"""
+        self.rate = min(self.base_rate, self.rate + self.base_rate * step)
+
+
+class HostRateLimiter:
+    """
+    Rate limiter con un token bucket por host
+
+    Sirve tanto desde threads (acquire) como desde asyncio (acquire_async);
+    solo se espera cuando el host concreto va por encima de su ritmo.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(
+        self,
+        rate_per_second: float = 0.5,
+        burst: int = 1,
+        host_overrides: Dict[str, Dict] = None,
+        default_retry_after: float = 30,
+        min_rate: float = 0.01,
+        clock=time.monotonic
+    ):
+        """
+        Inicializar rate limiter
+
+        Args:
+            rate_per_second: Requests por segundo permitidas por host
+            burst: Requests seguidas permitidas sin esperar
+            host_overrides: {host: {'rate_per_second': x, 'burst': n}}
+            default_retry_after: Pausa tras un 429 sin Retry-After (segundos)
+            min_rate: Ritmo mínimo al que puede bajar un host penalizado
+            clock: Reloj monotónico (inyectable en pruebas)
+        """
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.host_overrides = host_overrides or {}
+        self.default_retry_after = default_retry_after
+        self.min_rate = min_rate
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._stats = {}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            config = self.host_overrides.get(host, {})
+            bucket = TokenBucket(
+                config.get('rate_per_second', self.rate_per_second),
+                config.get('burst', self.burst),
+                self.clock()
+            )
+            self._buckets[host] = bucket
+            self._stats[host] = {
+                'acquired': 0,
+                'throttled': 0,
+                'throttled_seconds': 0.0,
+                'rate_limited_responses': 0
+            }
+        return bucket
+
+    def reserve(self, host: str) -> float:
+        """
+        Reservar turno para una request al host
+
+        Returns:
+            Segundos que hay que esperar antes de enviarla
+        """
+        with self._lock:
+            wait = self._bucket(host).reserve(self.clock())
+            stats = self._stats[host]
+            stats['acquired'] += 1
+            if wait > 0:
+                stats['throttled'] += 1
+                stats['throttled_seconds'] += wait
+        if wait > 0:
+            THROTTLE_SECONDS.inc(wait, host=host)
+        return wait
+
+    def acquire(self, host: str) -> float:
+        """Esperar turno desde un thread. Devuelve los segundos esperados"""
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, host: str) -> float:
+        """Esperar turno desde asyncio sin bloquear el event loop"""
+        import asyncio  # solo lo necesitan los llamadores asíncronos
+
+        wait = self.reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def on_response(self, host: str, status: int, retry_after: float = None):
+        """
+        Adaptar el ritmo del host según la respuesta recibida
+
+        Un 429/503 bloquea el host durante Retry-After (o default_retry_after)
+        y reduce su ritmo a la mitad; cada respuesta correcta lo recupera poco
+        a poco hasta el valor configurado.
+        """
+        with self._lock:
+            bucket = self._bucket(host)
+            if status in self.THROTTLE_STATUSES:
+                pause = retry_after if retry_after is not None else self.default_retry_after
+                bucket.block(self.clock() + pause)
+                bucket.slow_down(0.5, self.min_rate)
+                self._stats[host]['rate_limited_responses'] += 1
+                logger.warning(
+                    f"  🐢 {host} respondió {status}: pausa de {pause:.1f}s, "
+                    f"ritmo {bucket.rate:.3f} req/s"
+                )
+            elif bucket.rate < bucket.base_rate:
+                bucket.speed_up(0.1)
+
+    def get_stats(self) -> dict:
+        """Obtener contadores de throttling por host y totales"""
+        with self._lock:
+            hosts = {
+                host: dict(stats, rate=round(self._buckets[host].rate, 4))
+                for host, stats in self._stats.items()
+            }
+        return {
+            'throttled_seconds': round(sum(s['throttled_seconds'] for s in hosts.values()), 3),
+            'rate_limited_responses': sum(s['rate_limited_responses'] for s in hosts.values()),
+            'hosts': hosts
+        }
@@ -2,24 +2,30 @@
 Scraper de plataformas de streaming - Arquitectura profesional para TFG PopFlix
 Demuestra: Selenium, BeautifulSoup, gestión de datos, integración con BD
 Nota: Uso educativo. En producción usar APIs oficiales.
+
+Selenium, pandas, aiohttp y BeautifulSoup (vía fetcher y html_parser) se
+importan dentro de los métodos que los usan: importar este módulo para leer
+el caché o sincronizar no carga los navegadores ni pandas.
 """
 
-import requests
-import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+import argparse
 import time
 import json
 import os
 from datetime import datetime
-import random
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Tuple
+from urllib.parse import urlsplit
+
+from cache_manager import CacheManager
+from driver_pool import DriverPool, resolve_chromedriver_path
+from http_cache import HTTPResponseCache
+import metrics
+from metrics import PAGES, STAGE_SECONDS, timed
+from movie_record import json_default, to_dicts, to_records
+from platforms import PLATFORM_HOSTS, PLATFORM_MAP
+from rate_limiter import HostRateLimiter
 
 # Configurar logging
 logging.basicConfig(
@@ -44,31 +50,58 @@ class StreamingScraper:
     }
 
     # Mapeo de plataformas a IDs de BD
-    PLATFORM_MAP = {
-        'netflix': 1,
-        'prime': 2,
-        'disney': 3,
-        'hbo': 4,
-        'apple': 7,
-        'hulu': 5,
-        'paramount': 6
+    PLATFORM_MAP = PLATFORM_MAP
+
+    # Host de cada plataforma (el rate limiting se aplica por host)
+    PLATFORM_HOSTS = PLATFORM_HOSTS
+
+    # Método de scraping de cada plataforma scrapeada (ambos modos usan esta lista;
+    # el resto de PLATFORM_MAP solo llega desde TMDB)
+    PLATFORM_SCRAPERS = {
+        'netflix': 'scrape_netflix_public_data',
+        'prime': 'scrape_prime_video_data',
+        'disney': 'scrape_disney_plus_data',
+        'hbo': 'scrape_hbo_max_data'
     }
 
-    def __init__(self, headless=True, rate_limit_seconds=2):
+    # Similitud mínima de título para emparejar con TMDB sin id ni título exacto
+    FUZZY_MIN_SCORE = 0.7
+
+    def __init__(self, headless=True, rate_limit_seconds=2, max_workers=4, cache_manager=None):
         """
         Inicializar scraper con configuración
         
         Args:
             headless: Ejecutar sin interfaz gráfica
             rate_limit_seconds: Segundos entre requests para no sobrecargar
+            max_workers: Plataformas scrapeadas a la vez en modo concurrente
+            cache_manager: CacheManager donde volcar cada plataforma en
+                streaming según termina (None = no cachear)
         """
         self.headless = headless
         self.rate_limit = rate_limit_seconds
-        self.movies_data = []
+        self.max_workers = max_workers
+        self.cache_manager = cache_manager
+        self.response_cache = None
+        self.movies_data = []  # MovieRecord: ~4 veces menos memoria que dicts con catálogos grandes
         self.platforms_data = []
+        self.run_stats = {}
+        self.fetch_stats = {}
+        self.parse_stats = {}
+        self.resume = False
+        self.driver_pool = None
+        
+        # Un token bucket por host: solo se espera si ese host va demasiado rápido
+        self.rate_limiter = HostRateLimiter(
+            rate_per_second=1.0 / rate_limit_seconds if rate_limit_seconds > 0 else 1e9,
+            burst=1
+        )
         
     def init_driver(self):
         """Inicializar Selenium WebDriver"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        
         logger.info("🔧 Inicializando WebDriver...")
         options = webdriver.ChromeOptions()
         
@@ -80,16 +113,278 @@ class StreamingScraper:
         options.add_argument('--start-maximized')
         options.add_argument(f'user-agent={self.HEADERS["User-Agent"]}')
         
-        service = Service(ChromeDriverManager().install())
+        # La ruta de chromedriver se resuelve una vez por proceso
+        service = Service(resolve_chromedriver_path())
         driver = webdriver.Chrome(service=service, options=options)
         
         logger.info("✅ WebDriver listo")
         return driver
 
-    def rate_limit_wait(self):
-        """Rate limiting para no sobrecargar servidores"""
-        wait_time = self.rate_limit + random.uniform(-0.5, 0.5)
-        time.sleep(wait_time)
+    def get_driver_pool(self, size: int = 2, max_pages: int = 100, max_rss_mb: float = 1024) -> DriverPool:
+        """
+        Obtener (y pre-calentar) el pool de navegadores del scraper
+        
+        Args:
+            size: Sesiones de Chrome abiertas a la vez
+            max_pages: Páginas por sesión antes de reciclarla
+            max_rss_mb: Memoria por sesión antes de reciclarla
+        """
+        if self.driver_pool is None:
+            pool = DriverPool(
+                self.init_driver,
+                size=size,
+                max_pages=max_pages,
+                max_rss_mb=max_rss_mb
+            )
+            # Solo se guarda si arrancó: si no, la siguiente llamada lo vuelve a intentar
+            pool.start()
+            self.driver_pool = pool
+        return self.driver_pool
+
+    def render_page(self, url: str, wait_selector: str = None, timeout: float = 15) -> str:
+        """
+        Renderizar una página dinámica con una sesión del pool
+        
+        Args:
+            url: URL a renderizar
+            wait_selector: Selector CSS que debe aparecer antes de leer el HTML
+            timeout: Segundos máximos de espera del selector
+        
+        Returns:
+            HTML renderizado
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        
+        self.rate_limit_wait(urlsplit(url).hostname)
+        
+        with self.get_driver_pool().lease() as driver, timed('render'):
+            driver.get(url)
+            if wait_selector:
+                WebDriverWait(driver, timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
+                )
+            PAGES.inc(stage='render', result='ok')
+            return driver.page_source
+
+    def close(self):
+        """Liberar los navegadores del pool"""
+        if self.driver_pool is not None:
+            self.driver_pool.close()
+            self.driver_pool = None
+
+    def rate_limit_wait(self, host: str = None) -> float:
+        """
+        Rate limiting para no sobrecargar servidores
+        
+        Args:
+            host: Host al que va la siguiente request (None = bucket global).
+                Solo se espera si ese host superaría su ritmo; hosts
+                distintos no se bloquean entre sí.
+        
+        Returns:
+            Segundos esperados
+        """
+        return self.rate_limiter.acquire(host or '*')
+
+    def fetch_pages(self, urls: List[str], **fetcher_options) -> List[Dict]:
+        """
+        Descargar páginas en paralelo con conexiones keep-alive reutilizadas
+        
+        Args:
+            urls: URLs a descargar
+            **fetcher_options: Parámetros de AsyncFetcher (concurrency,
+                max_per_host, timeout, max_retries...)
+        
+        Returns:
+            Resultados de AsyncFetcher.fetch en el mismo orden que urls
+        """
+        import asyncio
+        from fetcher import AsyncFetcher
+        
+        fetcher_options.setdefault('headers', self.HEADERS)
+        fetcher_options.setdefault('rate_limiter', self.rate_limiter)
+        fetcher_options.setdefault('response_cache', self.get_response_cache())
+        
+        async def run():
+            async with AsyncFetcher(**fetcher_options) as fetcher:
+                results = await fetcher.fetch_all(urls)
+                self.fetch_stats = dict(fetcher.stats)
+                return results
+        
+        with timed('fetch_batch'):
+            results = asyncio.run(run())
+        logger.info(
+            f"  🌐 {len(results)} páginas descargadas "
+            f"({self.fetch_stats['connections_created']} conexiones nuevas, "
+            f"{self.fetch_stats['connections_reused']} reutilizadas, "
+            f"{self.fetch_stats['not_modified']} sin cambios)"
+        )
+        return results
+
+    def fetch_and_parse_pages(self, urls: List[str], platform: str = None, parse_workers: int = None,
+                              max_pending: int = None, **fetcher_options) -> List[Tuple[str, List[Dict]]]:
+        """
+        Descargar páginas de catálogo y parsearlas en un pool de procesos
+        
+        La descarga y el parseo se encadenan con back-pressure: como mucho
+        max_pending páginas están descargándose o esperando parseo, así que
+        si el parseo se retrasa la descarga se frena en lugar de acumular
+        HTML en memoria.
+        
+        Args:
+            urls: URLs del catálogo
+            platform: Plataforma a la que pertenecen
+            parse_workers: Procesos de parseo (por defecto, núcleos)
+            max_pending: Páginas en vuelo entre descarga y parseo
+            **fetcher_options: Parámetros de AsyncFetcher
+        
+        Returns:
+            [(url, películas)] en el orden de urls; películas es None si la
+            página no se pudo descargar o parsear
+        """
+        import asyncio
+        from fetcher import AsyncFetcher
+        from html_parser import ParsePool, records_to_movies
+        
+        fetcher_options.setdefault('headers', self.HEADERS)
+        fetcher_options.setdefault('rate_limiter', self.rate_limiter)
+        fetcher_options.setdefault('response_cache', self.get_response_cache())
+        
+        with ParsePool(max_workers=parse_workers, max_pending=max_pending) as pool:
+            async def run():
+                pending = asyncio.Semaphore(pool.max_pending)
+                async with AsyncFetcher(**fetcher_options) as fetcher:
+                    async def fetch_one(url):
+                        async with pending:
+                            page = await fetcher.fetch(url)
+                            if page['error'] or page['status'] != 200:
+                                logger.warning(f"  ⚠️ {url}: {page['error'] or page['status']}")
+                                return url, None
+                            future = pool.submit(page['body'], url, platform, block=False)
+                            result = await asyncio.wrap_future(future)
+                            if result['error']:
+                                logger.warning(f"  ⚠️ {url}: {result['error']}")
+                                return url, None
+                            return url, records_to_movies(result)
+                    
+                    pages = await asyncio.gather(*(fetch_one(url) for url in urls))
+                    self.fetch_stats = dict(fetcher.stats)
+                    return pages
+            
+            with timed('fetch_batch'):
+                pages = asyncio.run(run())
+        
+        self.parse_stats = pool.get_stats()
+        logger.info(
+            f"  🧩 {self.parse_stats['pages']} páginas parseadas ({self.parse_stats['records']} títulos) · "
+            f"p95 {self.parse_stats.get('parse_seconds_p95', 0) * 1000:.1f}ms · "
+            f"utilización {self.parse_stats['utilization']:.0%}"
+        )
+        return pages
+
+    def fetch_and_parse(self, urls: List[str], platform: str = None, **options) -> List[Dict]:
+        """
+        Descargar y parsear páginas de catálogo (ver fetch_and_parse_pages)
+        
+        Returns:
+            Películas extraídas (ver html_parser.RECORD_FIELDS)
+        """
+        pages = self.fetch_and_parse_pages(urls, platform, **options)
+        return [movie for _, movies in pages for movie in movies or []]
+
+    def crawl_catalogue(self, platform: str, page_urls: List[str], resume: bool = True,
+                        chunk_size: int = 50, **options) -> List[Dict]:
+        """
+        Recorrer un catálogo paginado guardando checkpoints
+        
+        Cada página procesada queda registrada en el checkpoint de la
+        plataforma (CacheManager.open_checkpoint); si el proceso muere, la
+        siguiente ejecución con resume=True no vuelve a descargar las páginas
+        hechas dentro de la ventana de validez del caché.
+        
+        Args:
+            platform: Clave de PLATFORM_MAP
+            page_urls: URLs de las páginas del catálogo, en orden
+            resume: Retomar el checkpoint existente
+            chunk_size: Páginas descargadas por tanda entre checkpoints
+            **options: Parámetros de fetch_and_parse_pages
+        
+        Returns:
+            Películas de la plataforma (también publicadas en el caché si no
+            ha fallado ninguna página)
+        """
+        checkpoint = self.get_cache_manager().open_checkpoint(platform, resume=resume)
+        positions = {url: i for i, url in enumerate(page_urls)}
+        todo = [url for url in page_urls if url not in checkpoint.pages_done]
+        if len(todo) < len(page_urls):
+            logger.info(f"  ⏭️ {platform}: {len(page_urls) - len(todo)} páginas ya procesadas")
+        
+        failed = 0
+        try:
+            for i in range(0, len(todo), chunk_size):
+                for url, movies in self.fetch_and_parse_pages(todo[i:i + chunk_size], platform, **options):
+                    if movies is None:
+                        failed += 1
+                    else:
+                        checkpoint.record_page(url, movies, cursor=positions[url] + 1)
+        finally:
+            checkpoint.close()
+        
+        if failed:
+            logger.warning(f"  ⚠️ {platform}: {failed} páginas fallidas; el checkpoint se conserva")
+            return list(checkpoint.movies)
+        return checkpoint.finish()
+
+    def get_cache_manager(self) -> CacheManager:
+        """CacheManager del scraper (se crea uno por defecto si no se pasó)"""
+        if self.cache_manager is None:
+            self.cache_manager = CacheManager()
+        return self.cache_manager
+
+    def get_response_cache(self) -> HTTPResponseCache:
+        """Caché de respuestas HTTP (en la subcarpeta http del caché del scraper)"""
+        if self.response_cache is None:
+            cache_manager = self.get_cache_manager()
+            directory = os.path.join(cache_manager.CACHE_DIR, cache_manager.HTTP_SUBDIR)
+            self.response_cache = HTTPResponseCache(directory)
+        return self.response_cache
+
+    def _cached_platform(self, platform: str) -> List[Dict]:
+        """Películas del caché si se está retomando y sigue vigente, o None"""
+        if not self.resume or not self.get_cache_manager().is_cache_valid(platform):
+            return None
+        logger.info(f"  ⏭️ {platform}: caché vigente, no se vuelve a scrapear")
+        return self.cache_manager.load_records(platform)
+
+    def _save_platform(self, platform: str, movies: List[Dict]):
+        """Publicar el resultado de una plataforma en el caché"""
+        if self.cache_manager is not None:
+            with self.cache_manager.open_cache_writer(platform) as writer:
+                writer.write_many(movies)
+
+    def _scrape_or_resume(self, platform: str) -> List[Dict]:
+        """Películas de una plataforma: del caché si se retoma, si no scrapeadas y guardadas"""
+        movies = self._cached_platform(platform)
+        if movies is None:
+            movies = self.scrape_platform(platform)
+            self._save_platform(platform, movies)
+        return movies
+
+    def scrape_platform(self, platform: str) -> List[Dict]:
+        """
+        Scrapear una plataforma respetando el rate limit de su host
+        
+        Args:
+            platform: Clave de PLATFORM_MAP
+        
+        Returns:
+            Lista de películas de la plataforma
+        """
+        scrape_func = getattr(self, self.PLATFORM_SCRAPERS[platform])
+        self.rate_limit_wait(self.PLATFORM_HOSTS[platform])
+        return scrape_func()
 
     def scrape_netflix_public_data(self) -> List[Dict]:
         """
@@ -153,13 +448,81 @@ class StreamingScraper:
         
         return []
 
-    def consolidate_with_tmdb(self, tmdb_movies: List[Dict]) -> List[Dict]:
+    def scrape_all_platforms_concurrently(self, max_workers: int = None) -> Dict[str, List[Dict]]:
+        """
+        Scrapear todas las plataformas de PLATFORM_SCRAPERS en paralelo
+        
+        Cada plataforma se ejecuta en un worker del pool y solo espera al
+        rate limit de su propio host, así que el tiempo total tiende al de
+        la plataforma más lenta en lugar de a la suma de todas. El speedup
+        que se registra es una estimación: compara con la suma de las
+        duraciones de cada plataforma, no con una ejecución secuencial real.
+        
+        Args:
+            max_workers: Tamaño del pool (None = self.max_workers)
+        
+        Returns:
+            Diccionario plataforma -> lista de películas
+        """
+        workers = max_workers or self.max_workers
+        logger.info(f"\n⚡ Scraping concurrente: {len(self.PLATFORM_SCRAPERS)} plataformas, {workers} workers")
+        
+        results = {}
+        durations = {}
+        start = time.perf_counter()
+        
+        def timed_scrape(platform):
+            platform_start = time.perf_counter()
+            movies = self._scrape_or_resume(platform)
+            return movies, time.perf_counter() - platform_start
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scraper') as executor:
+            futures = {
+                executor.submit(timed_scrape, platform): platform
+                for platform in self.PLATFORM_SCRAPERS
+            }
+            for future in as_completed(futures):
+                platform = futures[future]
+                try:
+                    results[platform], durations[platform] = future.result()
+                except Exception as e:
+                    logger.error(f"  ❌ Error en {platform}: {e}")
+                    results[platform], durations[platform] = [], 0.0
+        
+        elapsed = time.perf_counter() - start
+        
+        # Estimación: en modo secuencial las plataformas se ejecutarían una tras otra
+        sequential_estimate = sum(durations.values())
+        self.run_stats = {
+            'run_mode': 'concurrent',
+            'workers': workers,
+            'elapsed_seconds': round(elapsed, 3),
+            'sequential_estimate_seconds': round(sequential_estimate, 3),
+            'speedup_estimate': round(sequential_estimate / elapsed, 2) if elapsed > 0 else None,
+            'platform_seconds': {p: round(d, 3) for p, d in durations.items()},
+            'rate_limiter': self.rate_limiter.get_stats()
+        }
+        logger.info(
+            f"  ⏱️ Concurrente: {elapsed:.2f}s vs secuencial estimado: "
+            f"{sequential_estimate:.2f}s (speedup estimado x{self.run_stats['speedup_estimate']})"
+        )
+        
+        return results
+
+    def consolidate_with_tmdb(self, tmdb_movies: List[Dict], scraped_movies: List[Dict] = None) -> List[Dict]:
         """
         Consolidar datos scrapeados con TMDB
         TMDB es la fuente confiable y legal para datos oficiales
         
+        Las filas scrapeadas se cruzan con TMDB por tmdb_id o por título
+        normalizado + año (ver consolidation.py) y, si no
+        casan, por similitud de título (title_matcher.py); cada
+        película lleva sus plataformas de TMDB más las vistas por el scraper
+        y la lista de conflictos detectados.
+        
         Args:
             tmdb_movies: Películas obtenidas de TMDB API (ya implementado)
+            scraped_movies: Filas scrapeadas (por defecto self.movies_data)
         
         Returns:
             Lista consolidada de películas con plataformas verificadas
@@ -167,27 +530,29 @@ class StreamingScraper:
         logger.info("\n✅ CONSOLIDACIÓN CON TMDB")
         logger.info(f"  📊 TMDB proporciona {len(tmdb_movies)} películas verificadas")
         
-        # En tu caso: TMDB ya te dio películas reales + watch/providers
-        # Aquí correlacionamos datos scrapeados con TMDB para validación
+        if scraped_movies is None:
+            scraped_movies = self.movies_data
         
-        consolidated = []
-        for movie in tmdb_movies:
-            consolidated.append({
-                'id': movie.get('id'),
-                'title': movie.get('title'),
-                'year': movie.get('year'),
-                'rating': movie.get('rating'),
-                'platforms': movie.get('platforms', []),
-                'source': 'TMDB-verified'
-            })
+        from consolidation import consolidate
         
+        start = time.perf_counter()
+        consolidated, stats = consolidate(tmdb_movies, scraped_movies, fuzzy_min_score=self.FUZZY_MIN_SCORE)
+        elapsed = time.perf_counter() - start
+        stats['seconds'] = round(elapsed, 3)
+        STAGE_SECONDS.observe(elapsed, stage='consolidate')
+        self.run_stats['consolidation'] = stats
+        
+        logger.info(
+            f"  🔗 {stats['matched_by_id']} filas por tmdb_id, {stats['matched_by_title']} por título+año, "
+            f"{stats['matched_by_fuzzy']} por similitud, {stats['unmatched']} sin emparejar · {stats['conflicts']} películas con conflictos"
+        )
         return consolidated
 
     def save_to_json(self, data: List[Dict], filename: str):
         """Guardar datos en JSON"""
         filepath = os.path.join(os.path.dirname(__file__), f'{filename}.json')
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
         logger.info(f"💾 Guardado: {filepath}")
 
     def save_to_csv(self, data: List[Dict], filename: str):
@@ -196,18 +561,44 @@ class StreamingScraper:
             logger.warning(f"  ⚠️ Sin datos para guardar en {filename}")
             return
         
-        df = pd.DataFrame(data)
+        import pandas as pd
+        
+        df = pd.DataFrame(to_dicts(data))
         filepath = os.path.join(os.path.dirname(__file__), f'{filename}.csv')
         df.to_csv(filepath, index=False, encoding='utf-8')
         logger.info(f"💾 Guardado CSV: {filepath}")
 
+    def save_columnar(self, data: List[Dict], fmt: str = 'parquet', scrape_date: str = None,
+                      directory: str = None) -> Dict:
+        """
+        Exportar películas en Parquet o Feather particionado por plataforma y fecha
+        
+        Args:
+            data: Películas a exportar
+            fmt: 'parquet' o 'feather'
+            scrape_date: Fecha ISO de la partición (por defecto, hoy)
+            directory: Carpeta raíz (por defecto export/ junto al scraper)
+        
+        Returns:
+            Estadísticas de columnar_export.export_movies
+        """
+        # Import diferido: pyarrow solo se carga si se exporta
+        from columnar_export import export_movies
+        
+        directory = directory or os.path.join(os.path.dirname(__file__), 'export')
+        return export_movies(data, directory, fmt=fmt, scrape_date=scrape_date)
+
     def generate_report(self):
         """Generar reporte de scraping"""
         report = {
             'timestamp': datetime.now().isoformat(),
             'total_movies': len(self.movies_data),
-            'platforms_covered': list(self.PLATFORM_MAP.keys()),
+            'platforms_covered': list(self.PLATFORM_SCRAPERS),
             'status': 'DEMO - Using TMDB API',
+            'run_stats': self.run_stats,
+            'parse_stats': self.parse_stats,
+            'http_cache': self.response_cache.get_stats() if self.response_cache is not None else {},
+            'metrics': metrics.report(),
             'legal_notes': [
                 'Este scraper demuestra arquitectura profesional',
                 'En producción: Usar APIs oficiales como TMDB',
@@ -222,17 +613,31 @@ class StreamingScraper:
         logger.info(f"Películas procesadas: {report['total_movies']}")
         logger.info(f"Plataformas: {', '.join(report['platforms_covered'])}")
         logger.info(f"Estado: {report['status']}")
+        if self.run_stats.get('speedup_estimate'):
+            logger.info(f"Speedup estimado vs secuencial: x{self.run_stats['speedup_estimate']}")
+        for stage, timing in report['metrics']['stages'].items():
+            logger.info(
+                f"⏱️  {stage}: {timing['count']} × {timing['seconds_avg'] * 1000:.1f} ms "
+                f"(total {timing['seconds_total']:.2f}s, máx {timing['seconds_max'] * 1000:.1f} ms)"
+            )
         logger.info("="*60)
         
         return report
 
-    def run_full_scrape(self, use_tmdb_data=True):
+    def run_full_scrape(self, use_tmdb_data=True, concurrent=False, max_workers=None, resume=False):
         """
         Ejecutar scraping completo
         
         Args:
             use_tmdb_data: Si es True, usa datos TMDB (recomendado)
+            concurrent: Scrapear todas las plataformas en paralelo
+            max_workers: Tamaño del pool en modo concurrente
+            resume: Saltar las plataformas con caché vigente y retomar los
+                checkpoints de las que quedaron a medias
         """
+        self.resume = resume
+        if resume:
+            self.get_cache_manager()
         logger.info("\n" + "🚀 "*30)
         logger.info("INICIANDO SCRAPING DE PLATAFORMAS DE STREAMING")
         logger.info("🚀 "*30)
@@ -261,17 +666,21 @@ class StreamingScraper:
             logger.info("   ✓ Identificable User-Agent")
 
         # Ejecutar scrapers de cada plataforma (demos estructurales)
-        self.scrape_netflix_public_data()
-        self.rate_limit_wait()
-        
-        self.scrape_prime_video_data()
-        self.rate_limit_wait()
-        
-        self.scrape_disney_plus_data()
-        self.rate_limit_wait()
-        
-        self.scrape_hbo_max_data()
-        self.rate_limit_wait()
+        if concurrent:
+            for movies in self.scrape_all_platforms_concurrently(max_workers).values():
+                self.movies_data.extend(to_records(movies))
+        else:
+            start = time.perf_counter()
+            
+            # scrape_platform espera solo al rate limit del host de cada plataforma
+            for platform in self.PLATFORM_SCRAPERS:
+                self.movies_data.extend(to_records(self._scrape_or_resume(platform)))
+            
+            self.run_stats = {
+                'run_mode': 'sequential',
+                'elapsed_seconds': round(time.perf_counter() - start, 3),
+                'rate_limiter': self.rate_limiter.get_stats()
+            }
 
         # Generar reporte
         report = self.generate_report()
@@ -282,17 +691,34 @@ class StreamingScraper:
         logger.info("   🔗 Integrando con BD MySQL")
 
 
-def main():
+def main(argv=None):
     """Script principal"""
+    parser = argparse.ArgumentParser(description='Scraper de plataformas - PopFlix')
+    parser.add_argument('--concurrent', action='store_true', help='Scrapear las plataformas en paralelo')
+    parser.add_argument('--resume', action='store_true',
+                        help='Retomar tras una caída: saltar lo ya hecho dentro de la validez del caché')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Servir las métricas en formato Prometheus en http://127.0.0.1:PUERTO/metrics')
+    args = parser.parse_args(argv)
+    
     logger.info("="*60)
     logger.info("SCRAPER DE PLATAFORMAS - POPFLIX TFG")
     logger.info("="*60)
     
     # Inicializar scraper
-    scraper = StreamingScraper(headless=True, rate_limit_seconds=2)
+    scraper = StreamingScraper(headless=True, rate_limit_seconds=2, cache_manager=CacheManager())
+    
+    metrics_server = metrics.MetricsServer(port=args.metrics_port) if args.metrics_port is not None else None
+    if metrics_server is not None:
+        metrics_server.start()
     
     # Ejecutar scraping completo
-    scraper.run_full_scrape(use_tmdb_data=True)
+    try:
+        scraper.run_full_scrape(use_tmdb_data=True, concurrent=args.concurrent, resume=args.resume)
+    finally:
+        scraper.close()
+        if metrics_server is not None:
+            metrics_server.stop()
     
     logger.info("\n✨ Sistema de scraping listo para producción")
     logger.info("   Backend: populate-from-tmdb.js ya ejecutado")
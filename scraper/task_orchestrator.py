@@ -1,13 +1,49 @@
 """
 Orquestador de tareas automáticas de scraping
-Demuestra: Automatización, scheduling, logging centralizado
+Demuestra: Automatización, scheduling por reloj, pool de ejecución, control de solapes, logging centralizado
+
+El bucle principal duerme exactamente hasta la siguiente tarea pendiente
+(o hasta que termine alguna en curso) en lugar de consultar cada minuto,
+y las tareas se ejecutan en un pool: un health check horario no espera a
+que acabe el scraping nocturno. Cada tarea limita sus ejecuciones
+simultáneas y decide qué hacer si le toca mientras sigue en marcha:
+
+    skip   se salta esa ejecución (por defecto)
+    queue  se ejecuta en cuanto quede un hueco (como mucho una en espera)
+
+Las tareas pueden depender de otras (depends_on) formando un DAG: una
+tarea dependiente no tiene hora propia, arranca en cuanto terminan bien
+todas sus dependencias (ramas independientes en paralelo) y se salta,
+junto con todo lo que cuelga de ella, si alguna falla. Así la
+sincronización empieza al acabar el scraping y no a una hora fija.
+
+Cada ejecución pertenece a una generación: la hora programada de la tarea
+raíz que la origina (los reintentos y las dependientes la heredan). Una
+dependiente solo arranca cuando todas sus dependencias han terminado bien
+en la misma generación; un éxito de un ciclo anterior no cuenta. Por eso
+las raíces de las que depende una tarea deben compartir horario.
+
+Cada tarea puede tener además su política ante fallos: timeout por
+intento (se avisa a la función con cancel_event y su hueco se libera),
+reintentos con backoff exponencial y jitter, y un circuit breaker que deja
+de lanzar una tarea tras varios fallos seguidos hasta pasado un tiempo.
+Un fallo transitorio a las 02:00 se reintenta en minutos en lugar de
+esperar al día siguiente.
+
+El reloj y la espera son inyectables para medir latencias y solapes en
+pruebas sin dormir de verdad.
 """
 
-import schedule
+import inspect
+import random
+import threading
 import time
 import logging
-from datetime import datetime
-from typing import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from metrics import TASK_RUNS, TASK_SECONDS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +51,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+OVERLAP_POLICIES = ('skip', 'queue')
+
+
+def _parse_hour(time_str: str):
+    hour, minute = time_str.strip().split(':')
+    return int(hour), int(minute)
+
+
+def next_due(interval, time_str: str, after: datetime) -> datetime:
+    """
+    Siguiente ejecución de una tarea estrictamente posterior a after
+
+    Args:
+        interval: 'daily' (time_str 'HH:MM'), 'hourly' (time_str ':MM' o
+            cada hora desde after), 'weekly' (time_str 'Sunday 03:00' o
+            'HH:MM' el mismo día de la semana) o segundos entre ejecuciones
+        time_str: Hora de ejecución según el intervalo
+        after: Instante de referencia
+    """
+    if isinstance(interval, (int, float)):
+        return after + timedelta(seconds=interval)
+
+    if interval == 'hourly':
+        if not time_str or not time_str.startswith(':'):
+            return after + timedelta(hours=1)
+        due = after.replace(minute=int(time_str[1:]), second=0, microsecond=0)
+        return due if due > after else due + timedelta(hours=1)
+
+    if interval == 'daily':
+        hour, minute = _parse_hour(time_str)
+        due = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return due if due > after else due + timedelta(days=1)
+
+    if interval == 'weekly':
+        parts = time_str.split()
+        weekday = WEEKDAYS.index(parts[0].lower()) if len(parts) == 2 else after.weekday()
+        hour, minute = _parse_hour(parts[-1])
+        due = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        due += timedelta(days=(weekday - after.weekday()) % 7)
+        return due if due > after else due + timedelta(days=7)
+
+    raise ValueError(f'Intervalo no soportado: {interval}')
+
+
+def _cancel_event_parameter(func: Callable) -> Optional[inspect.Parameter]:
+    try:
+        return inspect.signature(func).parameters.get('cancel_event')
+    except (TypeError, ValueError):
+        return None
+
 
 class TaskOrchestrator:
     """
@@ -22,57 +109,502 @@ class TaskOrchestrator:
     Ejecuta: Scraping, sincronización de BD, limpieza de caché
     """
     
-    def __init__(self):
-        """Inicializar orquestador"""
+    def __init__(self, max_workers: int = 4, executor: Executor = None,
+                 clock: Callable[[], datetime] = datetime.now,
+                 wait: Callable[[float], bool] = None, seed: int = None):
+        """
+        Inicializar orquestador
+        
+        Args:
+            max_workers: Tareas ejecutándose a la vez (pool de threads)
+            executor: Executor alternativo (p. ej. ProcessPoolExecutor; las
+                funciones deben poder serializarse y no reciben cancel_event)
+            clock: Función que devuelve la hora actual
+            wait: Espera interrumpible wait(segundos); por defecto se
+                despierta también al terminar una tarea o al llamar a stop()
+            seed: Semilla del jitter de los reintentos
+        """
         self.tasks = []
         self.last_run = {}
+        self.clock = clock
+        self.max_workers = max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._wakeup = threading.Event()
+        self._wait = wait or self._wait_for_wakeup
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._running = 0
+        self._stopping = False
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'failed_attempts': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'circuits_opened': 0,
+            'circuit_skips': 0,
+            'skipped': 0,
+            'upstream_failed': 0,
+            'max_running': 0,
+            'max_latency_seconds': 0.0
+        }
     
     def schedule_task(
         self,
         name: str,
         func: Callable,
-        interval: str = 'daily',
-        time_str: str = '02:00'
+        interval='daily',
+        time_str: str = '02:00',
+        max_concurrency: int = 1,
+        overlap: str = 'skip',
+        depends_on: Iterable[str] = None,
+        timeout: float = None,
+        max_retries: int = 0,
+        backoff_base: float = 60.0,
+        backoff_max: float = 3600.0,
+        jitter: bool = True,
+        circuit_threshold: int = None,
+        circuit_cooldown: float = 3600.0
     ):
         """
         Programar tarea automática
         
         Args:
             name: Nombre de la tarea
-            func: Función a ejecutar
-            interval: 'daily', 'hourly', 'weekly'
-            time_str: Hora (HH:MM) para ejecución
+            func: Función a ejecutar; si acepta un parámetro cancel_event
+                recibe un threading.Event que se activa al vencer el timeout
+                (salvo en un ProcessPoolExecutor, donde el Event no se puede
+                enviar: se usa el valor por defecto y, si no lo tiene, se rechaza)
+            interval: 'daily', 'hourly', 'weekly' o segundos entre ejecuciones
+            time_str: Hora (HH:MM) para ejecución (ver next_due)
+            max_concurrency: Ejecuciones simultáneas permitidas de esta tarea
+            overlap: Política si toca ejecutarla con max_concurrency en
+                marcha: 'skip' o 'queue'
+            depends_on: Nombres de tareas ya programadas; la tarea arranca
+                cuando terminan bien todas en la misma generación (interval y
+                time_str se ignoran; sus tareas raíz deben tener el mismo horario)
+            timeout: Segundos máximos por intento (None = sin límite)
+            max_retries: Reintentos tras un intento fallido o vencido
+            backoff_base: Espera antes del primer reintento (se duplica en cada uno)
+            backoff_max: Espera máxima entre reintentos
+            jitter: Espera aleatoria entre 0 y el backoff (jitter completo)
+            circuit_threshold: Intentos fallidos seguidos que abren el
+                circuito (None = sin circuit breaker)
+            circuit_cooldown: Segundos con el circuito abierto; después se
+                permite un intento de prueba
         """
-        logger.info(f"📅 Programando: {name} ({interval} @ {time_str})")
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f'Política de solape no soportada: {overlap}')
+        
+        cancel_parameter = _cancel_event_parameter(func)
+        accepts_cancel = cancel_parameter is not None
+        if accepts_cancel and isinstance(self._executor, ProcessPoolExecutor):
+            # Un threading.Event no se puede serializar hacia otro proceso
+            if cancel_parameter.default is inspect.Parameter.empty:
+                raise ValueError(f'{name} exige cancel_event, que no se puede pasar a un ProcessPoolExecutor')
+            accepts_cancel = False
+        
+        depends_on = list(depends_on or ())
+        with self._lock:
+            by_name = {task['name']: task for task in self.tasks}
+        if name in by_name:
+            raise ValueError(f'Tarea duplicada: {name}')
+        # Las dependencias deben existir ya, así que el grafo no puede tener ciclos
+        unknown = [dependency for dependency in depends_on if dependency not in by_name]
+        if unknown:
+            raise ValueError(f'Dependencias desconocidas de {name}: {unknown}')
+        
+        if depends_on:
+            root_schedules = set().union(*(by_name[dependency]['root_schedules'] for dependency in depends_on))
+            if len(root_schedules) > 1:
+                raise ValueError(f'Las dependencias de {name} parten de horarios distintos: {sorted(root_schedules, key=str)}')
+        else:
+            root_schedules = {(interval, time_str)}
+        
+        if depends_on:
+            interval = time_str = None
+            logger.info(f"📅 Programando: {name} (después de {', '.join(depends_on)})")
+        else:
+            logger.info(f"📅 Programando: {name} ({interval} @ {time_str})")
         
         task_entry = {
             'name': name,
             'func': func,
+            'accepts_cancel': accepts_cancel,
             'interval': interval,
-            'time': time_str
+            'time': time_str,
+            'max_concurrency': max_concurrency,
+            'overlap': overlap,
+            'timeout': timeout,
+            'max_retries': max_retries,
+            'backoff_base': backoff_base,
+            'backoff_max': backoff_max,
+            'jitter': jitter,
+            'circuit_threshold': circuit_threshold,
+            'circuit_cooldown': circuit_cooldown,
+            'next_run': next_due(interval, time_str, self.clock()) if not depends_on else None,
+            'depends_on': depends_on,
+            'root_schedules': root_schedules,
+            'downstream': [],
+            # Dependencia -> generación en la que terminó bien
+            'satisfied': {},
+            # Última generación ejecutada o saltada
+            'generation': None,
+            'queued_at': None,
+            'queued_generation': None,
+            'active': [],
+            'retrying': [],
+            'running': 0,
+            'runs': 0,
+            'failures': 0,
+            'failed_attempts': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'skipped': 0,
+            'upstream_failed': 0,
+            'circuit_skips': 0,
+            'consecutive_failures': 0,
+            'circuit_open_until': None,
+            'last_attempts': 0,
+            'last_duration_seconds': None,
+            'last_error': None,
+            'max_running': 0,
+            'last_latency_seconds': None,
+            'max_latency_seconds': 0.0
         }
-        self.tasks.append(task_entry)
-        
-        # Registrar en schedule
-        if interval == 'daily':
-            schedule.every().day.at(time_str).do(self._run_task, name, func)
-        elif interval == 'hourly':
-            schedule.every().hour.do(self._run_task, name, func)
-        elif interval == 'weekly':
-            schedule.every().week.at(time_str).do(self._run_task, name, func)
-    
-    def _run_task(self, name: str, func: Callable):
-        """Ejecutar tarea con logging"""
-        logger.info(f"\n{'='*60}")
-        logger.info(f"▶️  EJECUTANDO TAREA: {name}")
-        logger.info(f"{'='*60}")
+        with self._lock:
+            self.tasks.append(task_entry)
+            for dependency in depends_on:
+                by_name[dependency]['downstream'].append(task_entry)
+        self._wakeup.set()
+        return task_entry
+    
+    def schedule_config(self, config: Dict[str, dict], funcs: Dict[str, Callable]) -> list:
+        """
+        Programar las tareas de una configuración (ver ScheduleConfig)
         
-        try:
-            func()
-            self.last_run[name] = datetime.now()
-            logger.info(f"✅ TAREA COMPLETADA: {name}")
-        except Exception as e:
-            logger.error(f"❌ ERROR EN TAREA {name}: {str(e)}")
+        Args:
+            config: Entradas por clave con name, interval, time y, opcionalmente,
+                depends_on (claves de la misma configuración, antes en el orden)
+                y policy (parámetros de schedule_task: timeout, max_retries...)
+            funcs: Función de cada clave; las claves sin función no se programan
+        
+        Returns:
+            Entradas de tarea creadas
+        """
+        created = []
+        for key, entry in config.items():
+            if key not in funcs:
+                continue
+            depends_on = [config[dependency]['name'] for dependency in entry.get('depends_on', ())]
+            created.append(self.schedule_task(
+                entry['name'], funcs[key], entry['interval'], entry['time'], depends_on=depends_on,
+                **entry.get('policy', {})
+            ))
+        return created
+    
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='task')
+            self._owns_executor = True
+        return self._executor
+    
+    @staticmethod
+    def _has_slot(task: dict) -> bool:
+        # Un reintento pendiente ocupa el hueco de la ejecución a la que pertenece
+        return task['running'] + len(task['retrying']) < task['max_concurrency']
+    
+    def _claim(self, task: dict, run: dict, now: datetime):
+        """Reservar un hueco de ejecución para un intento (con self._lock tomado)"""
+        latency = max((now - run['due']).total_seconds(), 0.0)
+        run['started_at'] = now
+        run['deadline'] = now + timedelta(seconds=task['timeout']) if task['timeout'] else None
+        run['cancel'] = threading.Event()
+        run['future'] = None
+        run['timed_out'] = False
+        task['active'].append(run)
+        task['running'] += 1
+        task['last_attempts'] = run['attempt']
+        task['max_running'] = max(task['max_running'], task['running'])
+        task['last_latency_seconds'] = latency
+        task['max_latency_seconds'] = max(task['max_latency_seconds'], latency)
+        self._running += 1
+        self.stats['submitted'] += 1
+        self.stats['max_running'] = max(self.stats['max_running'], self._running)
+        self.stats['max_latency_seconds'] = max(self.stats['max_latency_seconds'], latency)
+    
+    def _release(self, task: dict, run: dict):
+        task['active'].remove(run)
+        task['running'] -= 1
+        self._running -= 1
+    
+    def _start_or_defer(self, task: dict, due: datetime, now: datetime, to_start: list,
+                        generation: datetime = None):
+        """
+        Reservar una ejecución que toca o aplicar circuito y política de solape (con self._lock tomado)
+        
+        Args:
+            generation: Generación de la ejecución (None = due, para las raíces)
+        """
+        generation = due if generation is None else generation
+        half_open = False
+        if task['circuit_open_until'] is not None:
+            if now < task['circuit_open_until']:
+                task['circuit_skips'] += 1
+                self.stats['circuit_skips'] += 1
+                logger.warning(
+                    f"🔌 {task['name']}: circuito abierto hasta {task['circuit_open_until']:%Y-%m-%d %H:%M}; "
+                    f"se salta la ejecución"
+                )
+                self._skip_downstream(task, generation)
+                return
+            half_open = True
+        
+        run = {'due': due, 'attempt': 1, 'half_open': half_open, 'generation': generation}
+        if self._has_slot(task):
+            self._claim(task, run, now)
+            to_start.append((task, run))
+        elif task['overlap'] == 'queue' and task['queued_at'] is None:
+            task['queued_at'], task['queued_generation'] = due, generation
+        else:
+            task['skipped'] += 1
+            self.stats['skipped'] += 1
+            logger.warning(f"⏭️  {task['name']} sigue en marcha; se salta la ejecución de {due:%H:%M:%S}")
+    
+    @staticmethod
+    def _consume(task: dict, generation: datetime) -> bool:
+        """
+        Marcar una generación como ejecutada o saltada (con self._lock tomado)
+        
+        Olvida los éxitos de dependencias de esa generación y anteriores.
+        
+        Returns:
+            False si esa generación ya se había ejecutado o saltado
+        """
+        task['satisfied'] = {name: done for name, done in task['satisfied'].items() if done > generation}
+        if task['generation'] is not None and generation <= task['generation']:
+            return False
+        task['generation'] = generation
+        return True
+    
+    def _trigger_downstream(self, task: dict, generation: datetime, now: datetime, to_start: list):
+        """
+        Arrancar las dependientes cuyas dependencias han terminado bien en
+        esta misma generación (con self._lock tomado)
+        """
+        for downstream in task['downstream']:
+            if downstream['generation'] is not None and generation <= downstream['generation']:
+                continue
+            downstream['satisfied'][task['name']] = generation
+            if all(downstream['satisfied'].get(name) == generation for name in downstream['depends_on']):
+                self._consume(downstream, generation)
+                self._start_or_defer(downstream, now, now, to_start, generation)
+    
+    def _skip_downstream(self, task: dict, generation: datetime, seen: set = None):
+        """Saltar en esta generación todo lo que depende de una tarea fallida (con self._lock tomado)"""
+        seen = set() if seen is None else seen
+        for downstream in task['downstream']:
+            if downstream['name'] in seen:
+                continue
+            seen.add(downstream['name'])
+            if not self._consume(downstream, generation):
+                continue
+            downstream['upstream_failed'] += 1
+            self.stats['upstream_failed'] += 1
+            logger.warning(f"⏭️  {downstream['name']} no se ejecuta: falló {task['name']}")
+            self._skip_downstream(downstream, generation, seen)
+    
+    def backoff_delay(self, task: dict, attempt: int) -> float:
+        """Backoff exponencial (con jitter completo si la tarea lo usa) antes del reintento attempt"""
+        delay = min(task['backoff_max'], task['backoff_base'] * (2 ** (attempt - 1)))
+        return self._random.uniform(0, delay) if task['jitter'] else delay
+    
+    def _attempt_failed(self, task: dict, run: dict, reason: str, now: datetime):
+        """Reintentar, abrir el circuito o dar la ejecución por fallida (con self._lock tomado)"""
+        task['last_error'] = reason
+        task['failed_attempts'] += 1
+        task['consecutive_failures'] += 1
+        self.stats['failed_attempts'] += 1
+        
+        threshold = task['circuit_threshold']
+        if run['half_open'] or (threshold and task['consecutive_failures'] >= threshold):
+            task['circuit_open_until'] = now + timedelta(seconds=task['circuit_cooldown'])
+            self.stats['circuits_opened'] += 1
+            logger.error(
+                f"🔌 {task['name']}: {task['consecutive_failures']} intentos fallidos seguidos; "
+                f"circuito abierto hasta {task['circuit_open_until']:%Y-%m-%d %H:%M}"
+            )
+        elif run['attempt'] <= task['max_retries']:
+            delay = self.backoff_delay(task, run['attempt'])
+            run['attempt'] += 1
+            run['due'] = now + timedelta(seconds=delay)
+            task['retrying'].append(run)
+            task['retries'] += 1
+            self.stats['retries'] += 1
+            logger.warning(f"🔁 {task['name']}: reintento {run['attempt'] - 1}/{task['max_retries']} en {delay:.0f}s ({reason})")
+            return
+        
+        task['failures'] += 1
+        self.stats['failed'] += 1
+        logger.error(f"❌ ERROR EN TAREA {task['name']}: {reason}")
+        self._skip_downstream(task, run['generation'])
+    
+    def _submit(self, task: dict, run: dict):
+        """Lanzar un intento ya reservado en el pool (sin self._lock)"""
+        attempt = f", intento {run['attempt']}" if run['attempt'] > 1 else ''
+        logger.info(f"▶️  EJECUTANDO TAREA: {task['name']} (retraso {task['last_latency_seconds']:.3f}s{attempt})")
+        kwargs = {'cancel_event': run['cancel']} if task['accepts_cancel'] else {}
+        future = self._get_executor().submit(task['func'], **kwargs)
+        with self._lock:
+            run['future'] = future
+        # Si ya terminó, el callback se ejecuta aquí mismo
+        future.add_done_callback(lambda f, task=task, run=run: self._on_done(task, run, f))
+    
+    def _on_done(self, task: dict, run: dict, future: Future):
+        """
+        Anotar el resultado de un intento, arrancar lo que dependía de él
+        (o una ejecución encolada) y despertar al bucle
+        """
+        error = future.exception() if not future.cancelled() else None
+        to_start = []
+        with self._lock:
+            if run['timed_out']:
+                # Ya se contó como vencido al pasar el timeout
+                logger.info(f"  ⌛ {task['name']}: el intento vencido terminó por fin")
+                return
+            now = self.clock()
+            self._release(task, run)
+            task['last_duration_seconds'] = (now - run['started_at']).total_seconds()
+            TASK_SECONDS.observe(task['last_duration_seconds'], task=task['name'])
+            if future.cancelled() or error is not None:
+                reason = 'Cancelada' if future.cancelled() else f'{type(error).__name__}: {error}'
+                TASK_RUNS.inc(task=task['name'], result='failed')
+                self._attempt_failed(task, run, reason, now)
+            else:
+                TASK_RUNS.inc(task=task['name'], result='completed')
+                task['runs'] += 1
+                task['consecutive_failures'] = 0
+                task['circuit_open_until'] = None
+                self.stats['completed'] += 1
+                self.last_run[task['name']] = run['started_at']
+                self._trigger_downstream(task, run['generation'], now, to_start)
+                logger.info(f"✅ TAREA COMPLETADA: {task['name']}")
+            
+            if task['queued_at'] is not None and self._has_slot(task):
+                due, task['queued_at'] = task['queued_at'], None
+                self._start_or_defer(task, due, now, to_start, task['queued_generation'])
+        
+        for next_task, next_run in to_start:
+            self._submit(next_task, next_run)
+        self._wakeup.set()
+    
+    def _expire(self, task: dict, now: datetime, to_cancel: list):
+        """
+        Dar por fallidos los intentos que han superado su timeout (con self._lock tomado)
+        
+        Los futures se cancelan después de soltar el lock: si el intento
+        seguía en la cola del pool, cancel() ejecuta _on_done en este hilo.
+        """
+        for run in list(task['active']):
+            if run['deadline'] is None or now < run['deadline']:
+                continue
+            run['timed_out'] = True
+            run['cancel'].set()
+            if run['future'] is not None:
+                to_cancel.append(run['future'])
+            self._release(task, run)
+            task['timeouts'] += 1
+            task['last_duration_seconds'] = (now - run['started_at']).total_seconds()
+            TASK_SECONDS.observe(task['last_duration_seconds'], task=task['name'])
+            TASK_RUNS.inc(task=task['name'], result='timeout')
+            self.stats['timeouts'] += 1
+            self._attempt_failed(task, run, f"Timeout: más de {task['timeout']}s", now)
+    
+    def run_pending(self) -> Optional[float]:
+        """
+        Lanzar las tareas que ya tocan, vencer intentos y lanzar reintentos
+        
+        Returns:
+            Segundos hasta el siguiente evento (tarea, reintento o timeout;
+            None si no hay ninguno)
+        """
+        now = self.clock()
+        to_start = []
+        to_cancel = []
+        with self._lock:
+            for task in self.tasks:
+                self._expire(task, now, to_cancel)
+                
+                for run in sorted(task['retrying'], key=lambda r: r['due']):
+                    if run['due'] > now or task['running'] >= task['max_concurrency']:
+                        break
+                    task['retrying'].remove(run)
+                    self._claim(task, run, now)
+                    to_start.append((task, run))
+                
+                if task['queued_at'] is not None and self._has_slot(task):
+                    due, task['queued_at'] = task['queued_at'], None
+                    self._start_or_defer(task, due, now, to_start, task['queued_generation'])
+                
+                if task['next_run'] is None or task['next_run'] > now:
+                    continue
+                due = task['next_run']
+                task['next_run'] = next_due(task['interval'], task['time'], max(now, due))
+                self._start_or_defer(task, due, now, to_start)
+        
+        for future in to_cancel:
+            future.cancel()
+        for task, run in to_start:
+            self._submit(task, run)
+        
+        # Después de lanzar: un intento que ya terminó puede haber programado un reintento
+        with self._lock:
+            events = [task['next_run'] for task in self.tasks if task['next_run'] is not None]
+            for task in self.tasks:
+                events.extend(run['due'] for run in task['retrying'])
+                events.extend(run['deadline'] for run in task['active'] if run['deadline'] is not None)
+            next_event = min(events, default=None)
+        if next_event is None:
+            return None
+        return max((next_event - now).total_seconds(), 0.0)
+    
+    def _wait_for_wakeup(self, seconds: float) -> bool:
+        woken = self._wakeup.wait(seconds)
+        self._wakeup.clear()
+        return woken
+    
+    def run(self, until: datetime = None):
+        """
+        Bucle del scheduler
+        
+        Args:
+            until: Parar al llegar a esta hora del reloj (None = hasta stop())
+        """
+        self._stopping = False
+        while not self._stopping:
+            delay = self.run_pending()
+            now = self.clock()
+            if until is not None:
+                if now >= until:
+                    break
+                remaining = (until - now).total_seconds()
+                delay = remaining if delay is None else min(delay, remaining)
+            self._wait(delay)
+    
+    def stop(self, wait: bool = True):
+        """
+        Parar el bucle y esperar a las tareas en curso
+        
+        Los intentos vencidos que no atienden cancel_event siguen ocupando
+        su thread hasta que terminan; con wait=False no se les espera.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
     
     def start(self):
         """Iniciar scheduler en modo daemon"""
@@ -82,34 +614,76 @@ class TaskOrchestrator:
         logger.info(f"Tareas programadas: {len(self.tasks)}")
         
         for task in self.tasks:
-            logger.info(f"  • {task['name']} ({task['interval']} @ {task['time']})")
+            if task['depends_on']:
+                logger.info(f"  • {task['name']} (después de {', '.join(task['depends_on'])})")
+            else:
+                logger.info(f"  • {task['name']} ({task['interval']} @ {task['time']}) · próxima: {task['next_run']:%Y-%m-%d %H:%M}")
         
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Verificar cada minuto
+            self.run()
         except KeyboardInterrupt:
             logger.info("\n⏹️  Orquestador detenido")
+        finally:
+            self.stop()
+    
+    def _circuit_state(self, task: dict, now: datetime) -> str:
+        if task['circuit_open_until'] is None:
+            return 'closed'
+        return 'open' if now < task['circuit_open_until'] else 'half-open'
     
     def get_status(self) -> dict:
         """Obtener estado del orquestador"""
-        return {
-            'total_tasks': len(self.tasks),
-            'tasks': [
-                {
-                    'name': t['name'],
-                    'interval': t['interval'],
-                    'last_run': self.last_run.get(t['name']).isoformat()
-                    if t['name'] in self.last_run else 'Never'
-                }
-                for t in self.tasks
-            ]
-        }
+        with self._lock:
+            now = self.clock()
+            return {
+                'total_tasks': len(self.tasks),
+                'running': self._running,
+                'stats': dict(self.stats),
+                'tasks': [
+                    {
+                        'name': t['name'],
+                        'interval': t['interval'],
+                        'last_run': self.last_run.get(t['name']).isoformat()
+                        if t['name'] in self.last_run else 'Never',
+                        'next_run': t['next_run'].isoformat() if t['next_run'] else None,
+                        'depends_on': t['depends_on'],
+                        'running': t['running'],
+                        'runs': t['runs'],
+                        'failures': t['failures'],
+                        'attempts': t['last_attempts'],
+                        'retries': t['retries'],
+                        'retry_at': min(r['due'] for r in t['retrying']).isoformat() if t['retrying'] else None,
+                        'timeouts': t['timeouts'],
+                        'last_duration_seconds': t['last_duration_seconds'],
+                        'last_error': t['last_error'],
+                        'circuit': self._circuit_state(t, now),
+                        'skipped': t['skipped'],
+                        'upstream_failed': t['upstream_failed'],
+                        'circuit_skips': t['circuit_skips'],
+                        'max_running': t['max_running'],
+                        'last_latency_seconds': t['last_latency_seconds'],
+                        'max_latency_seconds': t['max_latency_seconds']
+                    }
+                    for t in self.tasks
+                ]
+            }
 
 
 class ScheduleConfig:
     """Configuración recomendada de schedule para PopFlix"""
     
+    # Políticas ante fallos (parámetros de TaskOrchestrator.schedule_task)
+    SCRAPING_POLICY = {
+        'timeout': 3 * 3600,
+        'max_retries': 3,
+        'backoff_base': 300,
+        'backoff_max': 1800,
+        'circuit_threshold': 4,
+        'circuit_cooldown': 6 * 3600
+    }
+    SYNC_POLICY = {'timeout': 1800, 'max_retries': 2, 'backoff_base': 60}
+    HEALTH_CHECK_POLICY = {'timeout': 60}
+    
     @staticmethod
     def get_recommended_schedule() -> dict:
         """
@@ -120,13 +694,16 @@ class ScheduleConfig:
                 'name': 'Scraping automático de plataformas',
                 'interval': 'daily',
                 'time': '02:00',
-                'description': 'Ejecuta a las 2 AM (horas bajas de tráfico)'
+                'policy': ScheduleConfig.SCRAPING_POLICY,
+                'description': 'Ejecuta a las 2 AM (horas bajas de tráfico); hasta 3 reintentos con backoff desde 5 minutos'
             },
             'sync': {
                 'name': 'Sincronización con BD',
-                'interval': 'daily',
-                'time': '02:30',
-                'description': 'Después del scraping, sincroniza cambios'
+                'interval': None,
+                'time': None,
+                'depends_on': ['scraping'],
+                'policy': ScheduleConfig.SYNC_POLICY,
+                'description': 'En cuanto termina el scraping, envía solo el diff (altas, cambios y bajas) respecto al último snapshot'
             },
             'cache_cleanup': {
                 'name': 'Limpieza de caché',
@@ -138,9 +715,45 @@ class ScheduleConfig:
                 'name': 'Verificación de salud',
                 'interval': 'hourly',
                 'time': 'Every hour',
+                'policy': ScheduleConfig.HEALTH_CHECK_POLICY,
                 'description': 'Verifica conectividad con plataformas'
             }
         }
+    
+    @staticmethod
+    def get_platform_pipeline(platforms: Iterable[str], time_str: str = '02:00') -> dict:
+        """
+        Pipeline con una rama scraping → sincronización por plataforma
+        
+        Las ramas corren en paralelo y el informe final espera a todas, así
+        que el pipeline dura lo que la rama más lenta. Cada scraping tiene
+        su propio circuit breaker: una plataforma inestable no frena al resto.
+        """
+        pipeline = {}
+        for platform in platforms:
+            pipeline[f'scraping_{platform}'] = {
+                'name': f'Scraping {platform}',
+                'interval': 'daily',
+                'time': time_str,
+                'policy': ScheduleConfig.SCRAPING_POLICY,
+                'description': f'Scrapea {platform} y publica su caché'
+            }
+            pipeline[f'sync_{platform}'] = {
+                'name': f'Sincronización {platform}',
+                'interval': None,
+                'time': None,
+                'depends_on': [f'scraping_{platform}'],
+                'policy': ScheduleConfig.SYNC_POLICY,
+                'description': f'Sincroniza el diff de {platform} en cuanto termina su scraping'
+            }
+        pipeline['report'] = {
+            'name': 'Informe del pipeline',
+            'interval': None,
+            'time': None,
+            'depends_on': [key for key in pipeline if key.startswith('sync_')],
+            'description': 'Se genera cuando todas las plataformas están sincronizadas'
+        }
+        return pipeline
 
 
 def demo_scrape_task():
@@ -185,15 +798,23 @@ def main():
     for key, config in schedule_config.items():
         logger.info(f"\n  {key.upper()}:")
         logger.info(f"    • Nombre: {config['name']}")
-        logger.info(f"    • Intervalo: {config['interval']}")
-        logger.info(f"    • Hora: {config['time']}")
+        if config.get('depends_on'):
+            logger.info(f"    • Después de: {', '.join(config['depends_on'])}")
+        else:
+            logger.info(f"    • Intervalo: {config['interval']}")
+            logger.info(f"    • Hora: {config['time']}")
+        if config.get('policy'):
+            logger.info(f"    • Política: {config['policy']}")
         logger.info(f"    • Descripción: {config['description']}")
     
     # En producción, descomentar para ejecutar scheduler:
     # orchestrator = TaskOrchestrator()
-    # orchestrator.schedule_task('Scraping', demo_scrape_task, 'daily', '02:00')
-    # orchestrator.schedule_task('Sincronización', demo_sync_task, 'daily', '02:30')
-    # orchestrator.schedule_task('Health Check', demo_health_check, 'hourly')
+    # orchestrator.schedule_config(schedule_config, {
+    #     'scraping': demo_scrape_task,
+    #     'sync': demo_sync_task,
+    #     'health_check': demo_health_check
+    # })
+    # MetricsServer(port=9464).start()  # from metrics import MetricsServer; GET /metrics
     # orchestrator.start()
     
     # Demo de tareas
@@ -213,7 +834,7 @@ def main():
     logger.info("\n" + "✅ "*30)
     logger.info("SISTEMA DE AUTOMATIZACIÓN OPERACIONAL")
     logger.info("✅ "*30)
-    logger.info("\nEn producción con schedule ejecutado como servicio:")
+    logger.info("\nEn producción con el orquestador ejecutado como servicio:")
     logger.info("  • Windows Service: Usar NSSM (Non-Sucking Service Manager)")
     logger.info("  • Linux: Usar systemd service")
     logger.info("  • Docker: Contenedor con scheduler incluido")
@@ -0,0 +1,59 @@
+"""
+Pruebas de la suite de benchmarks offline
+"""
+
+import json
+
+import pytest
+
+from benchmark_suite import compare, generate_catalogue, main, measure
+from cache_manager import CacheManager
+
+
+def test_catalogue_is_reproducible_and_respects_overlap():
+    """Misma semilla, mismo catálogo; overlap controla los títulos en varias plataformas"""
+    catalogue = generate_catalogue(2000, ['netflix', 'prime', 'hbo'], overlap=0.25, seed=3)
+    assert catalogue == generate_catalogue(2000, ['netflix', 'prime', 'hbo'], overlap=0.25, seed=3)
+
+    shared = sum(len(movie['platforms']) > 1 for movie in catalogue['tmdb'])
+    assert 0.2 < shared / 2000 < 0.3
+    assert set(catalogue['by_platform']) == {'netflix', 'prime', 'hbo'}
+    assert sum(map(len, catalogue['by_platform'].values())) == len(catalogue['scraped'])
+
+    single = generate_catalogue(500, ['netflix', 'prime'], overlap=0)
+    assert all(len(movie['platforms']) == 1 for movie in single['tmdb'])
+    with pytest.raises(ValueError):
+        generate_catalogue(10, ['mubi'])
+
+
+def test_measure_excludes_setup():
+    """La preparación de cada repetición no cuenta en el tiempo"""
+    calls = []
+    result = measure(calls.append, repeat=4, setup=lambda: len(calls), items=10)
+
+    assert calls == [0, 1, 2, 3]
+    assert result['repeat'] == 4 and len(result['runs']) == 4
+    assert result['seconds_min'] <= result['seconds_median'] <= result['seconds_max']
+
+
+def test_run_writes_comparable_json(tmp_path):
+    """Todas las rutas calientes medidas, en JSON, sin tocar el caché real"""
+    cache_dir = CacheManager.CACHE_DIR
+    output = tmp_path / 'bench.json'
+
+    assert main(['--titles', '300', '--platforms', 'netflix,hbo', '--repeat', '1', '--output', str(output)]) == 0
+
+    assert CacheManager.CACHE_DIR == cache_dir
+    results = json.loads(output.read_text(encoding='utf-8'))
+    assert results['config']['platforms'] == ['netflix', 'hbo']
+    assert {
+        'cache_save_json', 'cache_load_cold_json', 'cache_load_warm_binary', 'cache_get_stats',
+        'consolidate_with_tmdb', 'save_to_json', 'save_to_csv', 'db_sync_initial', 'db_sync_unchanged'
+    } <= set(results['benchmarks'])
+    assert results['benchmarks']['db_sync_initial']['items'] == results['config']['cached_movies']
+
+    slower = json.loads(json.dumps(results))
+    slower['benchmarks']['save_to_csv']['seconds_min'] *= 2
+    report = compare(results, slower)
+    assert report['save_to_csv']['regression'] and not report['save_to_json']['regression']
+
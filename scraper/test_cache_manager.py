@@ -0,0 +1,317 @@
+"""
+Pruebas del sistema de caché (directorio temporal, sin BD)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from binary_cache import BinaryCacheReader, benchmark as binary_benchmark, write_binary_cache
+from cache_manager import CacheManager
+from http_cache import HTTPResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+def make_movies(count, platform='netflix'):
+    return [
+        {'id': i, 'title': f'Película {i}', 'year': 2000 + i % 25, 'rating': 7.5, 'platforms': [platform]}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    return CacheManager()
+
+
+def test_load_cache_served_from_memory(cache):
+    """Tras guardar, las lecturas no vuelven a decodificar el JSON"""
+    cache.save_cache('netflix', make_movies(10))
+
+    assert len(cache.load_cache('netflix')) == 10
+    assert len(cache.load_cache('netflix')) == 10
+
+    stats = cache.get_stats()['memory']
+    assert stats['hits'] == 2
+    assert stats['misses'] == 0
+    assert cache.is_cache_valid('netflix')
+
+
+def test_memory_tier_detects_external_writes(cache, monkeypatch):
+    """Un cambio del fichero en disco (otro proceso) invalida la entrada en memoria"""
+    monkeypatch.setattr(CacheManager, 'MTIME_CHECK_SECONDS', 0)
+    cache.save_cache('prime', make_movies(3, 'prime'))
+
+    other = CacheManager()
+    other.save_cache('prime', make_movies(5, 'prime'))
+
+    assert len(cache.load_cache('prime')) == 5
+    assert cache.get_stats()['memory']['invalidations'] == 1
+
+
+def test_memory_tier_detects_same_size_rewrites(cache, monkeypatch):
+    """Una reescritura del mismo tamaño y mismo mtime también invalida la entrada"""
+    monkeypatch.setattr(CacheManager, 'MTIME_CHECK_SECONDS', 0)
+    cache.save_cache('prime', [{'id': 1, 'title': 'AAAA'}])
+    path = cache.get_cache_file('prime')
+    before = os.stat(path)
+
+    CacheManager().save_cache('prime', [{'id': 1, 'title': 'BBBB'}])
+    assert os.stat(path).st_size == before.st_size
+    os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+
+    assert cache.load_cache('prime')[0]['title'] == 'BBBB'
+
+
+def test_memory_tier_evicts_least_recently_used(cache):
+    """El LRU respeta el máximo de entradas"""
+    cache.memory_max_entries = 2
+    for platform in ('netflix', 'prime', 'disney'):
+        cache.save_cache(platform, make_movies(2, platform))
+
+    cache.load_cache('disney')
+    cache.load_cache('netflix')
+
+    stats = cache.get_stats()['memory']
+    assert stats['entries'] == 2
+    assert stats['evictions'] >= 1
+    assert stats['misses'] == 1
+
+
+def test_clear_cache_invalidates_memory(cache):
+    """clear_cache no deja datos servibles desde memoria"""
+    cache.save_cache('hbo', make_movies(4, 'hbo'))
+    cache.clear_cache('hbo')
+
+    assert cache.load_cache('hbo') == []
+    assert not cache.is_cache_valid('hbo')
+
+
+def test_clear_all_removes_checkpoints_and_snapshots(cache, tmp_path):
+    """clear_cache() no deja estado que afecte a --resume, al sync incremental ni a las revalidaciones HTTP"""
+    cache.save_cache('hbo', make_movies(4, 'hbo'))
+    cache.save_snapshot('hbo', {'1': 'abc'})
+    checkpoint = cache.open_checkpoint('netflix')
+    checkpoint.record_page('/p/1', make_movies(3))
+    checkpoint.close()
+    responses = HTTPResponseCache(str(tmp_path / CacheManager.HTTP_SUBDIR))
+    assert responses.store('https://www.netflix.com/browse', 200, {'ETag': '"v1"'}, b'<html></html>')
+
+    cache.clear_cache()
+
+    assert sorted(os.listdir(tmp_path)) == ['.hbo.lock', '.manifest.json', '.manifest.lock', 'http']
+    assert os.listdir(tmp_path / 'http') == []
+    assert responses.get('https://www.netflix.com/browse') is None
+    assert cache.load_snapshot('hbo') == {}
+    assert not cache.open_checkpoint('netflix').resumed
+
+
+def test_binary_format_roundtrip_and_lookup(tmp_path, monkeypatch):
+    """El formato binario devuelve lo mismo que JSON y lee por id sin cargar todo"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    movies = make_movies(50, 'disney')
+    movies[3]['rating'] = None
+    movies[4]['source'] = 'TMDB-verified'
+
+    CacheManager(cache_format='binary').save_cache('disney', movies)
+
+    cache = CacheManager(cache_format='binary')
+    assert cache.get_movie('disney', 4) == movies[4]
+    assert cache.get_movie('disney', 999) is None
+    assert cache.load_cache('disney') == movies
+    assert cache.get_stats()['platforms']['disney']['movies'] == 50
+
+
+def test_binary_format_keeps_missing_fields_missing(tmp_path):
+    """Ida y vuelta sin pérdidas: no aparecen claves que la película no traía"""
+    movies = [
+        {'title': 'Solo título'},
+        {'id': 7, 'title': None, 'year': 2001, 'platforms': None, 'tmdb_id': 12},
+        {'id': 8, 'rating': 7.5, 'platforms': ['netflix']},
+        {'id': 9, 'title': 'Completa', 'year': None, 'rating': None, 'platforms': []}
+    ]
+    path = str(tmp_path / 'prime.pfxc')
+    write_binary_cache(path, 'prime', movies, '2024-01-01T00:00:00')
+
+    with BinaryCacheReader(path) as reader:
+        assert list(reader) == movies
+        assert reader.get(8) == movies[2]
+
+
+def test_binary_benchmark_stays_out_of_the_cache(tmp_path, monkeypatch):
+    """El benchmark del formato binario escribe en una carpeta temporal"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    results = binary_benchmark(count=200, lookups=10)
+    assert results['identical']
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stream_writer_and_iter_cache(cache):
+    """El escritor JSON Lines se puede leer en streaming, con load_cache y get_stats"""
+    with cache.open_cache_writer('prime') as writer:
+        writer.write_many(movie for movie in make_movies(20, 'prime'))
+
+    assert list(cache.iter_cache('prime')) == make_movies(20, 'prime')
+    assert len(cache.load_cache('prime')) == 20
+    assert cache.get_stats()['platforms']['prime']['movies'] == 20
+    assert cache.is_cache_valid('prime')
+
+
+def test_stream_writer_discards_failed_writes(cache):
+    """Si la escritura falla a medias no queda un caché parcial"""
+    with pytest.raises(RuntimeError):
+        with cache.open_cache_writer('hbo') as writer:
+            writer.write(make_movies(1, 'hbo')[0])
+            raise RuntimeError('scraper caído')
+
+    assert list(cache.iter_cache('hbo')) == []
+
+
+def write_versions(cache_dir, platform, versions):
+    """Escritor de la prueba de estrés (también se usa en procesos hijos)"""
+    CacheManager.CACHE_DIR = cache_dir
+    cache = CacheManager()
+    for version in versions:
+        cache.save_cache(platform, [dict(m, version=version) for m in make_movies(300, platform)])
+
+
+def test_concurrent_readers_and_writers_never_see_partial_files(cache, tmp_path):
+    """Estrés: escritores en varios procesos y threads, lectores sin bloqueo ni corrupción"""
+    ctx = multiprocessing.get_context('spawn')
+    processes = [
+        ctx.Process(target=write_versions, args=(str(tmp_path), 'netflix', range(i * 100, i * 100 + 20)))
+        for i in range(2)
+    ]
+    threads = [
+        threading.Thread(target=write_versions, args=(str(tmp_path), 'netflix', range(500 + i * 100, 520 + i * 100)))
+        for i in range(2)
+    ]
+    errors = []
+    reads = []
+    done = threading.Event()
+
+    def reader():
+        # memory_max_bytes=1: ninguna entrada cabe en memoria, todas las lecturas van a disco
+        reader_cache = CacheManager(memory_max_bytes=1)
+        while not done.is_set():
+            try:
+                movies = reader_cache.load_cache('netflix')
+                reader_cache.get_stats()
+            except Exception as e:
+                errors.append(e)
+                continue
+            if movies:
+                versions = {m['version'] for m in movies}
+                if len(movies) != 300 or len(versions) != 1:
+                    errors.append(AssertionError(f'{len(movies)} películas, versiones {versions}'))
+            reads.append(len(movies))
+
+    readers = [threading.Thread(target=reader) for _ in range(6)]
+    start = time.perf_counter()
+    for worker in processes + threads + readers:
+        worker.start()
+    for worker in processes + threads:
+        worker.join()
+    done.set()
+    for worker in readers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    assert all(p.exitcode == 0 for p in processes)
+    assert errors == []
+    assert len(cache.load_cache('netflix')) == 300
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.tmp')]
+    assert reads
+    logger.info(f"{len(reads)} lecturas y 80 escrituras en {elapsed:.2f}s "
+                f"({len(reads) / elapsed:.0f} lecturas/s, {80 / elapsed:.0f} escrituras/s)")
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='permisos POSIX')
+def test_atomic_writes_keep_regular_permissions(cache, tmp_path):
+    """Los ficheros publicados respetan la umask y los permisos del destino anterior"""
+    from file_lock import DEFAULT_FILE_MODE
+
+    cache.save_cache('netflix', make_movies(3))
+    path = tmp_path / 'netflix_cache.json'
+    assert path.stat().st_mode & 0o777 == DEFAULT_FILE_MODE
+    assert (tmp_path / '.manifest.json').stat().st_mode & 0o777 == DEFAULT_FILE_MODE
+
+    path.chmod(0o640)
+    cache.save_cache('netflix', make_movies(4))
+    assert path.stat().st_mode & 0o777 == 0o640
+
+
+def test_stats_and_validity_come_from_manifest(cache, monkeypatch):
+    """get_stats e is_cache_valid no abren los ficheros de datos"""
+    cache.save_cache('netflix', make_movies(7))
+    with cache.open_cache_writer('prime') as writer:
+        writer.write_many(make_movies(3, 'prime'))
+    cache.clear_cache('disney')
+
+    def fail(*args, **kwargs):
+        raise AssertionError('get_stats no debe leer los ficheros de datos')
+
+    monkeypatch.setattr(CacheManager, '_read_cache_file', fail)
+    fresh = CacheManager()
+    stats = fresh.get_stats()
+
+    assert stats['total_cache_files'] == 2
+    assert stats['platforms']['netflix']['movies'] == 7
+    assert stats['platforms']['prime']['movies'] == 3
+    assert fresh.is_cache_valid('prime')
+    assert not fresh.is_cache_valid('disney')
+
+    fresh.clear_cache('netflix')
+    assert set(CacheManager().get_stats()['platforms']) == {'prime'}
+
+
+def test_manifest_rebuilt_for_existing_cache_dirs(cache):
+    """Un directorio de caché sin manifest se indexa una vez"""
+    cache.save_cache('hbo', make_movies(4, 'hbo'))
+    os.remove(cache._manifest_path())
+
+    stats = CacheManager().get_stats()
+    assert stats['platforms']['hbo']['movies'] == 4
+    assert os.path.exists(cache._manifest_path())
+
+    os.remove(cache._manifest_path())
+    assert CacheManager().is_cache_valid('hbo')
+    assert os.path.exists(cache._manifest_path())
+
+
+def test_checkpoint_resumes_after_crash(cache):
+    """Tras una caída se conservan páginas hechas y películas, sin duplicados"""
+    movies = make_movies(30)
+    checkpoint = cache.open_checkpoint('netflix')
+    checkpoint.record_page('/p/1', movies[:5])
+    checkpoint.record_page('/p/2', movies[3:8], cursor=2)
+    # Caída a mitad de la página 3: películas escritas, página sin marcar
+    checkpoint._append(*movies[20:22])
+    checkpoint._file.write('{"id": 99, "tit')
+    checkpoint.close()
+
+    resumed = cache.open_checkpoint('netflix')
+    assert resumed.resumed
+    assert resumed.pages_done == {'/p/1', '/p/2'}
+    assert resumed.cursor == 2
+    assert len(resumed.movies) == 10
+
+    assert len(resumed.record_page('/p/3', movies[20:23])) == 1
+    assert len(resumed.finish()) == 11
+    assert len(cache.load_cache('netflix')) == 11
+    assert not cache.open_checkpoint('netflix').resumed
+
+
+def test_checkpoint_expires_with_cache_validity(cache, monkeypatch):
+    checkpoint = cache.open_checkpoint('prime')
+    checkpoint.record_page('/p/1', make_movies(3))
+    checkpoint.close()
+
+    monkeypatch.setattr(CacheManager, 'CACHE_EXPIRY_HOURS', 0)
+    assert not cache.open_checkpoint('prime').pages_done
@@ -0,0 +1,90 @@
+"""
+Pruebas del punto de entrada único (cli.py)
+"""
+
+import json
+import subprocess
+import sys
+
+import cli
+from cache_manager import CacheManager
+
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:       300 |        420 |   io
+import time:      1500 |       1920 | cache_manager
+"""
+
+
+def test_cache_commands(tmp_path, monkeypatch, capsys):
+    """cache stats y cache clear sobre el caché configurado"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    CacheManager().save_cache('netflix', [{'id': 1, 'title': 'Amélie', 'platforms': ['netflix']}])
+
+    assert cli.main(['cache', 'stats', '--json']) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats['platforms']['netflix']['movies'] == 1
+
+    assert cli.main(['cache', 'clear', 'netflix']) == 0
+    assert cli.main(['cache', 'stats']) == 0
+    assert '0 plataformas en caché' in capsys.readouterr().out
+
+
+def test_bench_forwards_its_arguments(tmp_path):
+    """Las opciones tras 'bench' son de benchmark_suite"""
+    output = tmp_path / 'bench.json'
+    assert cli.main(['bench', '--titles', '20', '--platforms', 'netflix', '--repeat', '1', '--output', str(output)]) == 0
+    assert json.loads(output.read_text(encoding='utf-8'))['config']['titles'] == 20
+
+
+def test_cheap_commands_do_not_import_heavy_dependencies(tmp_path):
+    """cache stats e import scraper no cargan pandas, Selenium, aiohttp, bs4 ni pyarrow"""
+    code = (
+        "import sys, cache_manager, cli\n"
+        f"cache_manager.CacheManager.CACHE_DIR = {str(tmp_path)!r}\n"
+        "cli.main(['cache', 'stats'])\n"
+        "import scraper\n"
+        "print([m for m in cli.HEAVY_MODULES if m in sys.modules])\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=cli.os.path.dirname(cli.CLI_PATH))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_startup_report():
+    """Parseo de -X importtime y medición del arranque de un comando"""
+    entries = cli.parse_importtime(IMPORTTIME)
+    assert entries == [(120, 120, 2, '_io'), (300, 420, 1, 'io'), (1500, 1920, 0, 'cache_manager')]
+
+    report = cli.measure_startup(['--help'], runs=1)
+    assert report['heavy_modules'] == []
+    assert report['wall_ms_min'] > 0 and report['modules'] > 0
+    assert 'site' not in {entry['module'] for entry in report['slowest']}
+
+
+def test_startup_does_not_touch_the_cache(tmp_path, monkeypatch):
+    """Los procesos medidos usan un caché temporal, no CACHE_DIR"""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv('POPFLIX_CACHE_DIR', str(cache_dir))
+    code = "import cache_manager; print(cache_manager.CacheManager.CACHE_DIR)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=cli.os.path.dirname(cli.CLI_PATH))
+    assert result.stdout.strip() == str(cache_dir)
+
+    real_cache = cli.os.path.join(cli.os.path.dirname(cli.CLI_PATH), 'cache')
+    before = sorted(cli.os.listdir(real_cache)) if cli.os.path.isdir(real_cache) else None
+    cli.measure_startup(['cache', 'stats'], runs=1)
+    after = sorted(cli.os.listdir(real_cache)) if cli.os.path.isdir(real_cache) else None
+    assert after == before
+    assert not cache_dir.exists()
+
+
+def test_startup_options_go_anywhere():
+    """--runs y --json son de startup aunque vayan detrás del comando; tras '--' son del comando medido"""
+    parser = cli.build_parser()
+
+    args = parser.parse_args(['startup', 'cache', 'stats', '--runs', '3', '--json'])
+    assert (args.command, args.runs, args.json) == (['cache', 'stats'], 3, True)
+
+    args = parser.parse_args(['startup', '--runs', '2', '--', 'cache', 'stats', '--json'])
+    assert (args.command, args.runs, args.json) == (['cache', 'stats', '--json'], 2, False)
@@ -0,0 +1,72 @@
+"""
+Pruebas de la exportación columnar
+"""
+
+import os
+
+import pytest
+
+from columnar_export import export_movies, load_movies
+from scraper import StreamingScraper
+
+
+MOVIES = [
+    {'id': 1, 'title': 'Amélie', 'year': 2001, 'rating': 7.9, 'platforms': ['netflix', 'prime']},
+    {'id': 2, 'title': 'Dune', 'year': None, 'rating': None, 'platforms': ['hbo']},
+    {'id': 3, 'title': 'Solaris', 'year': 1972, 'rating': 8.0, 'platforms': []}
+]
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'feather'])
+def test_export_partitions_and_round_trips(tmp_path, fmt):
+    """Una partición por plataforma y fecha; los valores vuelven con su tipo"""
+    stats = export_movies(MOVIES, str(tmp_path), fmt=fmt, scrape_date='2026-10-01')
+
+    assert (stats['rows'], stats['partitions']) == (4, 4)
+    assert os.path.isdir(tmp_path / 'platform=netflix' / 'scrape_date=2026-10-01')
+
+    frame = load_movies(str(tmp_path)).sort_values(['id', 'platform'])
+    assert frame['platform'].tolist() == ['netflix', 'prime', 'hbo', 'none']
+    assert frame['title'].iloc[0] == 'Amélie'
+    assert str(frame['year'].dtype) == 'float64'  # int16 con nulos pasa a float en pandas
+    assert frame['rating'].isna().tolist() == [False, False, True, False]
+    assert list(frame['platforms'].iloc[0]) == ['netflix', 'prime']
+
+
+def test_load_reads_only_requested_columns_and_partitions(tmp_path):
+    """Filtros por plataforma y fecha, y reexportar una fecha la sustituye"""
+    export_movies(MOVIES, str(tmp_path), scrape_date='2026-10-01')
+    export_movies(MOVIES[:1], str(tmp_path), scrape_date='2026-10-02')
+    export_movies([dict(MOVIES[0], rating=9.5)], str(tmp_path), scrape_date='2026-10-02')
+
+    frame = load_movies(str(tmp_path), columns=['id', 'rating'], platforms=['netflix'], since='2026-10-02')
+    assert list(frame.columns) == ['id', 'rating']
+    assert frame.to_dict('records') == [{'id': 1, 'rating': 9.5}]
+
+    assert len(load_movies(str(tmp_path), until='2026-10-01')) == 4
+    assert load_movies(str(tmp_path / 'missing')).empty
+
+
+def test_export_keeps_keys_missing_from_the_first_movie(tmp_path):
+    """Las columnas salen de todas las películas, no solo de la primera"""
+    movies = [
+        {'id': 1, 'title': 'Amélie', 'year': 2001, 'platforms': ['netflix']},
+        {'id': 2, 'title': 'Dune', 'year': 2021, 'rating': 7.8, 'source': 'TMDB-verified',
+         'conflicts': ['year'], 'platforms': ['netflix']}
+    ]
+    export_movies(movies, str(tmp_path), scrape_date='2026-10-01')
+
+    frame = load_movies(str(tmp_path)).sort_values('id')
+    assert {'rating', 'source', 'conflicts'} <= set(frame.columns)
+    assert frame['rating'].isna().tolist() == [True, False]
+    assert frame['source'].tolist() == [None, 'TMDB-verified']
+    assert list(frame['conflicts'].iloc[1]) == ['year']
+
+
+def test_scraper_save_columnar(tmp_path):
+    scraper = StreamingScraper(rate_limit_seconds=0)
+
+    stats = scraper.save_columnar(MOVIES, fmt='feather', directory=str(tmp_path))
+
+    assert stats['format'] == 'feather'
+    assert stats['files'] == 4
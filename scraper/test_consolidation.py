@@ -0,0 +1,100 @@
+"""
+Pruebas de la consolidación con TMDB
+"""
+
+from consolidation import consolidate, consolidate_frame, frame_to_movies, normalize_title, synthetic_catalogue
+
+
+TMDB = [
+    {'id': 1, 'title': 'Amélie', 'year': 2001, 'rating': 7.9, 'platforms': ['netflix']},
+    {'id': 2, 'title': 'Dune', 'year': 2021, 'rating': 7.8, 'platforms': []},
+    {'id': 3, 'title': 'Solaris', 'year': 1972, 'rating': 8.0, 'platforms': ['prime']},
+    {'id': 4, 'title': 'Solaris', 'year': 1972, 'rating': 6.2, 'platforms': []},
+    {'id': 5, 'title': 'Sin año', 'year': None, 'rating': None}
+]
+
+
+def test_normalize_title():
+    assert normalize_title('  AMÉLIE: El Fabuloso... ') == 'amelie el fabuloso'
+    assert normalize_title(None) == ''
+
+
+def test_consolidate_joins_by_id_and_title():
+    """Emparejado por id o título+año, plataformas agregadas y conflictos"""
+    scraped = [
+        {'title': 'AMELIE', 'year': 2001, 'rating': 8.0, 'platforms': ['prime']},
+        {'tmdb_id': 2, 'title': 'Dune (2021)', 'year': 2020, 'rating': 7.5, 'platforms': ['hbo']},
+        {'tmdb_id': 2, 'title': 'Dune', 'year': 2021, 'platforms': ['apple', 'hbo']},
+        {'title': 'Solaris', 'year': 1972, 'platforms': ['disney']},
+        {'title': 'Desconocida', 'year': 1999, 'platforms': ['netflix']}
+    ]
+
+    movies, stats = consolidate(TMDB, scraped)
+    by_id = {m['id']: m for m in movies}
+
+    assert [m['id'] for m in movies] == [1, 2, 3, 4, 5]
+    assert by_id[1]['platforms'] == ['netflix', 'prime']
+    assert by_id[1]['conflicts'] == ['platforms']
+    assert by_id[2]['platforms'] == ['apple', 'hbo']
+    assert by_id[2]['conflicts'] == ['year']
+    assert by_id[3]['platforms'] == ['prime']
+    assert by_id[5] == {
+        'id': 5, 'title': 'Sin año', 'year': None, 'rating': None,
+        'platforms': [], 'source': 'TMDB-verified', 'conflicts': []
+    }
+    assert stats == {
+        'tmdb_movies': 5, 'scraped_rows': 5, 'matched_by_id': 2, 'matched_by_title': 1,
+        'matched_by_fuzzy': 0, 'unmatched': 2, 'ambiguous': 1, 'conflicts': 2
+    }
+
+
+def consolidate_with_pandas(tmdb, scraped=(), **options):
+    frame, stats = consolidate_frame(tmdb, scraped, **options)
+    return frame_to_movies(frame), stats
+
+
+def test_consolidate_matches_pandas_version():
+    """La versión con diccionarios y la de joins de pandas dan el mismo resultado"""
+    tmdb, scraped = synthetic_catalogue(2000, seed=7)
+
+    assert consolidate(tmdb, scraped) == consolidate_with_pandas(tmdb, scraped)
+    assert consolidate(TMDB) == consolidate_with_pandas(TMDB)
+
+
+def test_loosely_typed_rows_are_coerced_the_same_in_both_versions():
+    """Años, ids y notas como texto se convierten; lo que no es un número cuenta como ausente"""
+    scraped = [
+        {'tmdb_id': '2', 'title': 'Dune', 'year': '2020', 'rating': '7.5', 'platforms': ['hbo']},
+        {'title': 'Amélie', 'year': '2001', 'rating': '', 'platforms': ['prime']},
+        {'title': 'Sin año', 'year': '', 'rating': 'n/d', 'platforms': ['mubi']},
+        {'tmdb_id': 'tt0001', 'title': 'Desconocida', 'year': 'hace poco', 'platforms': ['hbo']}
+    ]
+
+    movies, stats = consolidate(TMDB, scraped)
+    by_id = {m['id']: m for m in movies}
+
+    assert (by_id[2]['platforms'], by_id[2]['conflicts']) == (['hbo'], ['year'])
+    assert by_id[1]['platforms'] == ['netflix', 'prime']
+    assert by_id[5]['platforms'] == ['mubi']
+    assert (stats['matched_by_id'], stats['matched_by_title'], stats['unmatched']) == (1, 2, 1)
+    assert consolidate_with_pandas(TMDB, scraped) == (movies, stats)
+
+    # Todas las filas por id (la parte por título queda vacía) y con texto
+    scraped = [{'tmdb_id': '3', 'title': 'Solaris', 'year': '1972', 'rating': '8', 'platforms': ['hbo']}]
+    assert consolidate_with_pandas(TMDB, scraped) == consolidate(TMDB, scraped)
+    assert consolidate(TMDB, scraped)[1]['matched_by_id'] == 1
+
+
+def test_consolidate_fuzzy_matches_leftover_rows():
+    """Las filas sin coincidencia exacta se emparejan por similitud"""
+    scraped = [
+        {'title': 'Amelie!', 'year': 2002, 'platforms': ['hbo']},
+        {'title': 'Dune: Part One', 'year': 2021, 'platforms': ['hbo']},
+        {'title': 'Solaris', 'year': 1972, 'platforms': ['disney']}
+    ]
+
+    movies, stats = consolidate(TMDB, scraped, fuzzy_min_score=0.7)
+
+    assert movies[0]['platforms'] == ['netflix', 'hbo']
+    assert (stats['matched_by_fuzzy'], stats['ambiguous'], stats['unmatched']) == (1, 1, 2)
+    assert consolidate_with_pandas(TMDB, scraped, fuzzy_min_score=0.7) == (movies, stats)
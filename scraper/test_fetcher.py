@@ -0,0 +1,207 @@
+"""
+Pruebas de la capa HTTP contra un servidor stub local
+"""
+
+import asyncio
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetcher import AsyncFetcher, fetch_urls
+from rate_limiter import HostRateLimiter
+from cache_manager import CacheManager
+from http_cache import HTTPResponseCache
+from scraper import StreamingScraper
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Servidor de catálogo falso con keep-alive, gzip y fallos transitorios"""
+
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+    missing = set()
+    versions = {}
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body, extra_headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/flaky'):
+            remaining = self.failures.get(self.path, 2)
+            if remaining:
+                self.failures[self.path] = remaining - 1
+                self.send_body(503, b'busy', {'Retry-After': '0'})
+                return
+        if self.path in self.missing:
+            self.send_body(404, b'not found')
+            return
+        if self.path.startswith('/versioned/'):
+            etag = f'"{self.path}-v{self.versions.get(self.path, 1)}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_body(304, b'', {'ETag': etag})
+                return
+            body = f'<html>{self.path} {etag}</html>'.encode() * 20
+            self.send_body(200, body, {'ETag': etag, 'Last-Modified': 'Mon, 06 Oct 2025 10:00:00 GMT'})
+            return
+        if self.path.startswith('/catalogue/'):
+            page = int(self.path.rsplit('/', 1)[1])
+            body = ''.join(
+                f'<a data-title="Título {page}-{i}" data-id="{page * 10 + i}" href="/t/{i}"></a>' for i in range(10)
+            ).encode()
+            self.send_body(200, body)
+            return
+        body = f'<html><h1>{self.path}</h1></html>'.encode()
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self.send_body(200, gzip.compress(body), {'Content-Encoding': 'gzip'})
+        else:
+            self.send_body(200, body)
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_reuses_connections_and_decompresses(stub_server):
+    """Muchas páginas de un host usan pocas conexiones y llegan descomprimidas"""
+    urls = [f'{stub_server}/title/{i}' for i in range(40)]
+    results = fetch_urls(urls, headers={'Accept-Encoding': 'gzip, deflate'}, max_per_host=4)
+
+    assert [r['status'] for r in results] == [200] * 40
+    assert results[7]['body'] == b'<html><h1>/title/7</h1></html>'
+
+
+def test_fetch_reports_connection_reuse(stub_server):
+    """Las estadísticas muestran conexiones reutilizadas"""
+    async def run():
+        async with AsyncFetcher(max_per_host=2, concurrency=2) as fetcher:
+            await fetcher.fetch_all(f'{stub_server}/title/{i}' for i in range(20))
+            return fetcher.stats
+
+    stats = asyncio.run(run())
+    assert stats['connections_created'] <= 2
+    assert stats['connections_reused'] >= 18
+
+
+def test_fetch_retries_transient_errors(stub_server):
+    """Un 503 transitorio se reintenta hasta obtener 200"""
+    StubHandler.failures.clear()
+    result = fetch_urls([f'{stub_server}/flaky/1'], max_retries=3, backoff_base=0.01)[0]
+
+    assert result['status'] == 200
+    assert result['attempts'] == 3
+    assert result['error'] is None
+
+
+def test_rate_limiter_buckets_are_per_host():
+    """El burst se consume por host y un 429 con Retry-After bloquea solo ese host"""
+    now = [0.0]
+    limiter = HostRateLimiter(rate_per_second=1, burst=2, clock=lambda: now[0])
+
+    assert limiter.reserve('a') == 0
+    assert limiter.reserve('a') == 0
+    assert limiter.reserve('a') == pytest.approx(1.0)
+    assert limiter.reserve('b') == 0
+
+    limiter.on_response('b', 429, retry_after=5)
+    assert limiter.reserve('b') == pytest.approx(5.0)
+
+    stats = limiter.get_stats()
+    assert stats['rate_limited_responses'] == 1
+    assert stats['hosts']['a']['throttled'] == 1
+    assert stats['throttled_seconds'] == pytest.approx(6.0)
+
+
+def test_fetch_and_parse_pipeline(stub_server, tmp_path, monkeypatch):
+    """Descarga y parseo encadenados con páginas en vuelo limitadas"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    scraper = StreamingScraper(rate_limit_seconds=0)
+
+    movies = scraper.fetch_and_parse(
+        [f'{stub_server}/catalogue/{page}' for page in range(12)],
+        platform='prime', parse_workers=2, max_pending=3
+    )
+
+    assert len(movies) == 120
+    assert {m['id'] for m in movies} == set(range(120))
+    assert movies[0]['platforms'] == ['prime']
+    assert scraper.parse_stats['pages'] == 12
+    assert scraper.parse_stats['max_pending'] <= 3
+
+
+def test_crawl_resumes_without_refetching_done_pages(stub_server, tmp_path, monkeypatch):
+    """Una página fallida deja el checkpoint; al retomar solo se descarga esa"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    pages = [f'{stub_server}/catalogue/{page}' for page in range(6)]
+    StubHandler.missing = {'/catalogue/3'}
+
+    scraper = StreamingScraper(rate_limit_seconds=0, cache_manager=CacheManager())
+    partial = scraper.crawl_catalogue('hbo', pages, chunk_size=2, parse_workers=1)
+    assert len(partial) == 50
+    assert not scraper.cache_manager.is_cache_valid('hbo')
+
+    StubHandler.missing = set()
+    movies = scraper.crawl_catalogue('hbo', pages, parse_workers=1)
+    assert scraper.fetch_stats['requests'] == 1
+    assert len(movies) == 60
+    assert len(scraper.cache_manager.load_cache('hbo')) == 60
+
+
+def test_response_cache_serves_not_modified_from_disk(stub_server, tmp_path):
+    """La segunda descarga es condicional: 304 y cuerpo servido desde disco"""
+    cache = HTTPResponseCache(str(tmp_path))
+    urls = [f'{stub_server}/versioned/{i}' for i in range(3)]
+    StubHandler.versions = {}
+
+    first = fetch_urls(urls, response_cache=cache)
+    assert [r['from_cache'] for r in first] == [False] * 3
+
+    StubHandler.versions = {'/versioned/2': 2}
+    reopened = HTTPResponseCache(str(tmp_path))
+
+    async def run():
+        async with AsyncFetcher(response_cache=reopened) as fetcher:
+            return await fetcher.fetch_all(urls), fetcher.stats
+
+    second, stats = asyncio.run(run())
+    assert [r['from_cache'] for r in second] == [True, True, False]
+    assert [r['status'] for r in second] == [200] * 3
+    assert second[0]['body'] == first[0]['body']
+    assert second[0]['headers']['Last-Modified'] == first[0]['headers']['Last-Modified']
+    assert b'-v2' in second[2]['body']
+    assert stats['not_modified'] == 2
+    assert stats['bytes_saved'] == len(first[0]['body']) + len(first[1]['body'])
+    assert reopened.validators(urls[2])['If-None-Match'].endswith('-v2"')
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    """Por encima de max_bytes se borran las entradas usadas hace más tiempo"""
+    cache = HTTPResponseCache(str(tmp_path), max_bytes=2500)
+    headers = {'ETag': '"x"'}
+
+    assert cache.store('http://a/1', 200, headers, b'1' * 1000)
+    assert cache.store('http://a/2', 200, headers, b'2' * 1000)
+    assert cache.get('http://a/1') is not None
+    assert cache.store('http://a/3', 200, headers, b'3' * 1000)
+
+    assert cache.get('http://a/2') is None
+    assert cache.get('http://a/1')['body'] == b'1' * 1000
+    assert cache.get_stats()['evictions'] == 1
+    assert cache.get_stats()['bytes'] <= 2500
+    assert not cache.store('http://a/4', 200, {}, b'sin validadores')
+    assert not cache.store('http://a/5', 200, {'ETag': '"y"', 'Cache-Control': 'no-store'}, b'privado')
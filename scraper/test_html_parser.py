@@ -0,0 +1,71 @@
+"""
+Pruebas de la etapa de parseo HTML
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import html_parser
+from html_parser import ParsePool, parse_catalogue_page, records_to_movies
+
+
+def catalogue_page(start, count=5):
+    cards = ''.join(
+        f'<div class="card" data-title=" Película {i} " data-id="{i}" data-year="2020" '
+        f'data-rating="7.{i % 10}"><a href="/title/{i}">ver</a></div>'
+        for i in range(start, start + count)
+    )
+    return f'<html><body><nav>menú</nav><section>{cards}</section></body></html>'.encode()
+
+
+def test_parse_catalogue_page_returns_compact_records():
+    result = parse_catalogue_page(catalogue_page(0, 3) + b'<p data-title="x" data-year="?">', 'u', 'hbo')
+
+    assert result['error'] is None
+    assert result['records'][0] == (0, 'Película 0', 2020, 7.0, '/title/0')
+    assert result['records'][3] == (None, 'x', None, None, None)
+    assert records_to_movies(result)[1] == {
+        'id': 1, 'title': 'Película 1', 'year': 2020, 'rating': 7.1, 'url': '/title/1', 'platforms': ['hbo']
+    }
+
+
+def test_parse_pool_uses_processes_and_reports_metrics():
+    pages = [(f'/p/{i}', catalogue_page(i * 5), 'netflix') for i in range(20)]
+
+    with ParsePool(max_workers=2) as pool:
+        results = list(pool.parse_all(pages))
+
+    assert sorted(r['url'] for r in results) == sorted(url for url, _, _ in pages)
+    stats = pool.get_stats()
+    assert (stats['pages'], stats['records'], stats['errors']) == (20, 100, 0)
+    assert stats['parse_seconds_p95'] >= stats['parse_seconds_p50'] > 0
+    assert 0 < stats['utilization'] <= 1
+
+
+def test_parse_pool_applies_backpressure(monkeypatch):
+    """El productor se bloquea cuando hay max_pending páginas pendientes"""
+    release = threading.Event()
+    original = html_parser.parse_catalogue_page
+
+    def slow_parse(*args):
+        release.wait()
+        return original(*args)
+
+    monkeypatch.setattr(html_parser, 'parse_catalogue_page', slow_parse)
+    executor = ThreadPoolExecutor(max_workers=2)
+    pool = ParsePool(max_workers=2, max_pending=3, executor=executor)
+
+    futures = [pool.submit(catalogue_page(i), f'/p/{i}') for i in range(3)]
+    producer = threading.Thread(target=lambda: futures.append(pool.submit(catalogue_page(9), '/p/9')))
+    producer.start()
+    time.sleep(0.1)
+    assert producer.is_alive()
+
+    release.set()
+    producer.join(timeout=5)
+    assert len(futures) == 4
+    assert all(len(f.result()['records']) == 5 for f in futures)
+    assert pool.get_stats()['max_pending'] == 3
+    assert pool.get_stats()['backpressure_wait_seconds'] >= 0.05
+    executor.shutdown()
@@ -0,0 +1,88 @@
+"""
+Pruebas de la capa de métricas
+"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+import metrics
+from cache_manager import CacheManager, SyncManager
+from db import create_sqlite_database
+from metrics import MetricsRegistry, MetricsServer
+from scraper import StreamingScraper
+
+
+@pytest.fixture
+def registry():
+    metrics.REGISTRY.clear()
+    yield metrics.REGISTRY
+    metrics.REGISTRY.clear()
+
+
+def test_prometheus_text_format():
+    """Contadores y histogramas con etiquetas, buckets acumulativos, +Inf, suma y recuento"""
+    registry = MetricsRegistry()
+    pages = registry.counter('pages_total', 'Páginas', ('stage',))
+    latency = registry.histogram('latency_seconds', 'Latencia', ('stage',), buckets=(0.1, 1))
+
+    pages.inc(stage='fetch')
+    pages.inc(2, stage='fe"tch')
+    for value in (0.05, 0.5, 0.7, 3):
+        latency.observe(value, stage='parse')
+
+    text = registry.render()
+    assert '# TYPE pages_total counter' in text
+    assert 'pages_total{stage="fetch"} 1\n' in text
+    assert 'pages_total{stage="fe\\"tch"} 2\n' in text
+    assert 'latency_seconds_bucket{stage="parse",le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{stage="parse",le="1"} 3\n' in text
+    assert 'latency_seconds_bucket{stage="parse",le="+Inf"} 4\n' in text
+    assert 'latency_seconds_sum{stage="parse"} 4.25\n' in text
+    assert 'latency_seconds_count{stage="parse"} 4\n' in text
+    assert latency.quantile(0.5, stage='parse') == 1
+    assert latency.quantile(1, stage='parse') == 3
+
+    assert registry.counter('pages_total', 'Páginas', ('stage',)) is pages
+    with pytest.raises(ValueError):
+        pages.inc(platform='netflix')
+    with pytest.raises(ValueError):
+        registry.histogram('pages_total', 'Páginas')
+
+
+def test_server_exposes_registry():
+    """GET /metrics devuelve el texto de Prometheus; otras rutas, 404"""
+    registry = MetricsRegistry()
+    registry.counter('up', 'Arriba').inc()
+
+    with MetricsServer(registry, port=0) as server:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'up 1\n' in response.read().decode('utf-8')
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(server.url.replace('/metrics', '/otra'), timeout=5)
+
+
+def test_pipeline_stages_end_up_in_the_report(registry, tmp_path, monkeypatch):
+    """Caché, consolidación y sincronización quedan medidas en scraping_report"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    movies = [{'id': 1000 + i, 'title': f'Película {i}', 'year': 2010, 'rating': 6.5, 'platforms': ['netflix']}
+              for i in range(30)]
+    cache = CacheManager()
+    cache.save_cache('netflix', movies)
+    cache.load_cache('netflix')
+    CacheManager().load_cache('netflix')
+    SyncManager(create_sqlite_database()).sync_platform_data('netflix', movies)
+
+    scraper = StreamingScraper(headless=True)
+    scraper.consolidate_with_tmdb(movies, [{'title': 'PELICULA 0', 'year': 2010, 'platforms': ['prime']}])
+    with metrics.timed('render'):
+        pass
+
+    report = scraper.generate_report()['metrics']
+    assert {'cache_write', 'cache_read', 'db_sync', 'consolidate', 'render'} <= set(report['stages'])
+    assert report['stages']['db_sync']['count'] == 1
+    assert report['cache_hit_ratio']['memory'] == 0.5
+    assert report['db_rows'] == {'inserted': 30}
+    assert 'popflix_stage_seconds_count{stage="cache_write"} 1' in report['prometheus']
@@ -0,0 +1,108 @@
+"""
+Pruebas del registro compacto de película
+"""
+
+import json
+import pickle
+
+import pytest
+
+from cache_manager import CacheManager
+from movie_record import (
+    MovieRecord, PLATFORM_BITS, benchmark, json_default, mask_to_platforms,
+    platforms_to_mask, to_dicts, to_records
+)
+
+
+MOVIES = [
+    {'id': 1, 'title': 'Amélie', 'year': 2001, 'rating': 7.9, 'platforms': ['netflix', 'prime'], 'source': 'TMDB'},
+    {'title': 'Dune', 'year': None, 'platforms': []},
+    {'id': 3, 'title': 'Solaris', 'platforms': ['hbo', 'netflix'], 'tmdb_id': 593, 'url': '/t/3'},
+    {'id': 4, 'title': 'Her', 'platforms': ['netflix', 'mubi', 'netflix']}
+]
+
+
+def test_mask_round_trip():
+    """Un bit por plataforma según su id de BD; la lista vuelve en orden de id"""
+    mask = platforms_to_mask(['hbo', 'netflix'])
+    assert mask == PLATFORM_BITS['netflix'] | PLATFORM_BITS['hbo']
+    assert mask_to_platforms(mask) == ['netflix', 'hbo']
+    with pytest.raises(KeyError):
+        platforms_to_mask(['mubi'])
+
+
+def test_record_behaves_like_the_original_dict():
+    """Mismas claves, valores y orden; las ausentes siguen ausentes y no se puede modificar"""
+    records = to_records(MOVIES)
+
+    assert records == MOVIES
+    assert to_dicts(records) == MOVIES
+    assert [list(r) for r in records] == [list(m) for m in MOVIES]
+    assert 'rating' not in records[1] and records[1].get('rating') is None
+    assert records[0]['platforms'] == ['netflix', 'prime'] and records[0].has_platform('prime')
+    # Orden no canónico, plataforma desconocida y repetida: la lista se conserva tal cual
+    assert records[2]['platforms'] == ['hbo', 'netflix'] and records[2]['tmdb_id'] == 593
+    assert records[3]['platforms'] == ['netflix', 'mubi', 'netflix'] and not records[3].has_platform('mubi')
+    assert records[0].extras is None and records[0].platform_mask == platforms_to_mask(['netflix', 'prime'])
+    with pytest.raises(TypeError):
+        records[0]['title'] = 'Otra'
+
+    encoded = json.dumps(records, default=json_default, ensure_ascii=False)
+    assert json.loads(encoded) == MOVIES
+    assert pickle.loads(pickle.dumps(records)) == MOVIES
+
+
+def test_cache_round_trip_with_records(tmp_path, monkeypatch):
+    """El caché guarda registros; load_records los comparte y load_cache da dicts"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    cache = CacheManager()
+    cache.save_cache('netflix', to_records(MOVIES))
+
+    loaded = cache.load_records('netflix')
+    assert all(isinstance(movie, MovieRecord) for movie in loaded)
+    assert loaded == MOVIES
+    assert CacheManager().load_records('netflix') == MOVIES
+    assert CacheManager().load_cache('netflix') == MOVIES
+
+    with cache.open_cache_writer('prime') as writer:
+        writer.write_many(loaded)
+    assert list(cache.iter_cache('prime')) == MOVIES
+
+
+def test_benchmark_records_use_less_memory():
+    """Con 100k títulos cada registro ocupa menos de la mitad que su diccionario"""
+    results = benchmark(100000)
+
+    assert results['round_trip_identical']
+    assert results['bytes_per_movie_record'] * 2 < results['bytes_per_movie_dict']
+
+
+def test_load_cache_returns_mutable_dicts(tmp_path, monkeypatch):
+    """Modificar lo que devuelve load_cache no altera el caché en memoria"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    cache = CacheManager()
+    cache.save_cache('netflix', MOVIES)
+
+    for _ in range(2):  # desde disco y desde memoria
+        movies = cache.load_cache('netflix')
+        assert all(type(movie) is dict for movie in movies)
+        movies[0]['title'] = 'Otro'
+        movies[0]['platforms'].append('hbo')
+
+    assert cache.load_cache('netflix') == MOVIES
+    assert cache.load_records('netflix')[0]['title'] == MOVIES[0]['title']
+    assert all(type(movie) is dict for movie in cache.iter_cache('netflix'))
+
+
+def test_get_movie_returns_a_dict_from_the_memory_tier(tmp_path, monkeypatch):
+    """get_movie devuelve un diccionario también cuando la plataforma está en memoria"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    cache = CacheManager()
+    cache.save_cache('netflix', MOVIES)
+    assert cache._memory_get('netflix') is not None
+
+    movie = cache.get_movie('netflix', 3)
+    assert type(movie) is dict and movie == MOVIES[2]
+    movie['title'] = 'Otra'
+    assert cache.get_movie('netflix', 3)['title'] == 'Solaris'
+    assert cache.get_movie('netflix', 99) is None
@@ -0,0 +1,209 @@
+"""
+Pruebas offline del motor de scraping (sin red ni navegador)
+"""
+
+import time
+
+import pytest
+
+from cache_manager import CacheManager
+from driver_pool import DriverPool
+from scraper import StreamingScraper
+
+
+class SlowScraper(StreamingScraper):
+    """Scraper cuyas plataformas tardan un tiempo fijo"""
+
+    PLATFORM_DELAY = 0.1
+
+    def scrape_platform(self, platform):
+        time.sleep(self.PLATFORM_DELAY)
+        return [{'id': self.PLATFORM_MAP[platform], 'platforms': [platform]}]
+
+
+def test_concurrent_scrape_covers_all_platforms():
+    """Modo concurrente: todas las plataformas scrapeadas y speedup estimado > 1"""
+    scraper = SlowScraper(rate_limit_seconds=0.5, max_workers=len(StreamingScraper.PLATFORM_SCRAPERS))
+
+    results = scraper.scrape_all_platforms_concurrently()
+
+    assert set(results) == set(StreamingScraper.PLATFORM_SCRAPERS)
+    assert scraper.run_stats['run_mode'] == 'concurrent'
+    assert scraper.run_stats['elapsed_seconds'] < SlowScraper.PLATFORM_DELAY * len(results)
+    assert scraper.run_stats['speedup_estimate'] > 1
+
+
+def test_resume_skips_platforms_with_valid_cache(tmp_path, monkeypatch):
+    """--resume: las plataformas ya cacheadas no se vuelven a scrapear"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    calls = []
+
+    class CountingScraper(SlowScraper):
+        PLATFORM_DELAY = 0
+
+        def scrape_platform(self, platform):
+            calls.append(platform)
+            return super().scrape_platform(platform)
+
+        def save_to_json(self, data, filename):
+            pass
+
+    CountingScraper(rate_limit_seconds=0, cache_manager=CacheManager()).run_full_scrape(concurrent=True)
+    assert len(calls) == len(StreamingScraper.PLATFORM_SCRAPERS)
+
+    calls.clear()
+    scraper = CountingScraper(rate_limit_seconds=0, cache_manager=CacheManager())
+    scraper.run_full_scrape(concurrent=True, resume=True)
+    assert calls == []
+
+    calls.clear()
+    CountingScraper(rate_limit_seconds=0, cache_manager=CacheManager()).run_full_scrape(concurrent=False)
+    assert calls == list(StreamingScraper.PLATFORM_SCRAPERS)
+    assert len(scraper.movies_data) == len(StreamingScraper.PLATFORM_SCRAPERS)
+
+
+def test_rate_limit_is_per_host():
+    """Solo se espera al repetir host; hosts distintos no se bloquean"""
+    scraper = StreamingScraper(rate_limit_seconds=0.6)
+
+    start = time.perf_counter()
+    scraper.rate_limit_wait('a.example')
+    scraper.rate_limit_wait('b.example')
+    assert time.perf_counter() - start < 0.05
+
+    scraper.rate_limit_wait('a.example')
+    assert time.perf_counter() - start >= 0.1
+
+
+class FakeDriver:
+    """Driver falso con la interfaz que usa DriverPool"""
+
+    def __init__(self):
+        self.window_handles = ['main']
+        self.switch_to = self
+        self.cookies_cleared = 0
+        self.quit_called = False
+
+    def window(self, handle):
+        pass
+
+    def delete_all_cookies(self):
+        self.cookies_cleared += 1
+
+    def get(self, url):
+        self.current_url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_driver_pool_reuses_and_recycles_sessions():
+    """Las sesiones se reutilizan, se limpian y se reciclan tras max_pages"""
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    with DriverPool(factory, size=2, max_pages=3, rss_probe=None) as pool:
+        assert len(created) == 2
+
+        for _ in range(6):
+            with pool.lease() as driver:
+                driver.get('https://example.com')
+
+        assert pool.stats['leases'] == 6
+        assert pool.stats['recycled'] == 2
+        assert len(created) == 4
+        assert created[0].quit_called
+        assert created[0].cookies_cleared == 2
+
+    assert all(d.quit_called for d in created)
+
+
+def test_driver_pool_recycles_on_memory_threshold():
+    """Una sesión que supera max_rss_mb se sustituye al devolverla"""
+    pool = DriverPool(FakeDriver, size=1, max_pages=100, max_rss_mb=500, rss_probe=lambda d: 800)
+
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+
+    assert first is not second
+    assert first.quit_called
+    pool.close()
+
+
+def test_driver_pool_retries_failed_replacements():
+    """Un reemplazo fallido se reintenta en lease(); sin sesiones posibles, lease() falla"""
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if 2 <= len(attempts) <= 3:
+            raise OSError('chrome no arranca')
+        return FakeDriver()
+
+    pool = DriverPool(factory, size=1, max_pages=1, rss_probe=None)
+    with pool.lease():
+        pass
+    assert pool.stats['create_failures'] == 1
+
+    with pytest.raises(RuntimeError):
+        with pool.lease(timeout=1):
+            pass
+
+    with pool.lease(timeout=1) as driver:
+        assert isinstance(driver, FakeDriver)
+    assert pool.stats['create_failures'] == 2
+    pool.close()
+
+
+def test_driver_pool_start_failures_are_retried_or_raise():
+    """Las sesiones que fallan al pre-calentar quedan pendientes: lease() no espera para siempre"""
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise OSError('chrome no arranca')
+
+    pool = DriverPool(broken, size=2, rss_probe=None)
+    with pytest.raises(RuntimeError):
+        pool.start()
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
+    assert len(attempts) == 3
+    pool.close()
+
+    flaky = []
+
+    def factory():
+        flaky.append(1)
+        if len(flaky) == 1:
+            raise OSError('chrome no arranca')
+        return FakeDriver()
+
+    with DriverPool(factory, size=2, rss_probe=None) as pool:
+        assert pool.stats['create_failures'] == 1
+        with pool.lease(timeout=1) as first:
+            with pool.lease(timeout=1) as second:
+                assert first is not second
+
+
+def test_scraper_keeps_no_driver_pool_that_failed_to_start(monkeypatch):
+    """get_driver_pool vuelve a intentarlo si el pool no pudo arrancar"""
+    def broken():
+        raise OSError('chrome no arranca')
+
+    scraper = StreamingScraper()
+    monkeypatch.setattr(scraper, 'init_driver', broken)
+    with pytest.raises(RuntimeError):
+        scraper.get_driver_pool(size=1)
+    assert scraper.driver_pool is None
+
+    monkeypatch.setattr(scraper, 'init_driver', FakeDriver)
+    with scraper.get_driver_pool(size=1).lease(timeout=1) as driver:
+        assert isinstance(driver, FakeDriver)
+    scraper.driver_pool.close()
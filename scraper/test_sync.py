@@ -0,0 +1,241 @@
+"""
+Pruebas de la sincronización con BD usando SQLite como sustituto de MySQL
+"""
+
+import threading
+
+import pytest
+
+from cache_manager import CacheManager, SyncManager
+from db import ConnectionPool, SQLiteDialect, create_sqlite_database
+
+
+def make_movies(count, start=0):
+    return [
+        {'id': 1000 + i, 'title': f'Película {i}', 'year': 2010, 'rating': 6.5, 'platforms': ['netflix']}
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    connection = create_sqlite_database()
+    yield connection
+    connection.close()
+
+
+class CountingConnection:
+    """Envoltorio que cuenta las sentencias ejecutadas"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = 0
+
+    def cursor(self):
+        outer = self
+        cursor = self.connection.cursor()
+
+        class Cursor:
+            def execute(self, sql, params=()):
+                outer.statements += 1
+                return cursor.execute(sql, params)
+
+            def __getattr__(self, name):
+                return getattr(cursor, name)
+
+        return Cursor()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+def test_sync_counts_inserts_updates_and_skips(db):
+    """Recuentos exactos en primera carga, resincronización y cambios"""
+    sync = SyncManager(db, batch_size=40)
+
+    first = sync.sync_platform_data('netflix', make_movies(100) + [{'id': None, 'title': 'Sin id'}])
+    assert (first['inserted'], first['updated'], first['skipped']) == (100, 0, 1)
+    assert first['batches'] == 3
+
+    again = sync.sync_platform_data('netflix', iter(make_movies(100)))
+    assert (again['inserted'], again['updated'], again['skipped']) == (0, 0, 100)
+
+    changed = make_movies(100)
+    changed[5]['rating'] = 9.1
+    mixed = sync.sync_platform_data('netflix', changed + make_movies(10, start=100))
+    assert (mixed['inserted'], mixed['updated'], mixed['skipped']) == (10, 1, 99)
+
+    on_prime = sync.sync_platform_data('prime', make_movies(3))
+    assert (on_prime['inserted'], on_prime['updated']) == (0, 3)
+
+    assert db.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == 110
+    assert db.execute('SELECT COUNT(*) FROM movies_platforms').fetchone()[0] == 113
+    assert db.execute('SELECT rating FROM movies WHERE tmdb_id = 1005').fetchone()[0] == 9.1
+
+
+def test_sync_falls_back_to_year(db):
+    """Sin release_date se guarda el año, sin pisar una fecha completa del mismo año"""
+    sync = SyncManager(db)
+    sync.sync_platform_data('netflix', make_movies(2))
+    assert db.execute('SELECT release_date FROM movies WHERE tmdb_id = 1000').fetchone()[0] == '2010-01-01'
+
+    db.execute("UPDATE movies SET release_date = '2010-06-15' WHERE tmdb_id = 1000")
+    again = sync.sync_platform_data('netflix', make_movies(2))
+    assert (again['updated'], again['skipped']) == (0, 2)
+
+    changed = make_movies(2)
+    changed[0]['rating'] = 8.0
+    changed[1]['year'] = 2011
+    result = sync.sync_platform_data('netflix', changed)
+    assert result['updated'] == 2
+    dates = dict(db.execute('SELECT tmdb_id, release_date FROM movies').fetchall())
+    assert dates == {1000: '2010-06-15', 1001: '2011-01-01'}
+
+
+def test_sync_round_trips_are_per_batch(db):
+    """El número de sentencias depende de los lotes, no de las películas"""
+    connection = CountingConnection(db)
+    SyncManager(connection, batch_size=500).sync_platform_data('netflix', make_movies(1000))
+
+    assert connection.statements <= 2 * 5
+
+
+def test_sync_from_cache_streams_catalogue(db):
+    """sync_from_cache consume el caché en streaming"""
+    cache = CacheManager()
+    with cache.open_cache_writer('disney') as writer:
+        writer.write_many(make_movies(25))
+
+    result = SyncManager(db, batch_size=10).sync_from_cache('disney')
+    assert result['inserted'] == 25
+    assert result['batches'] == 3
+
+
+def test_incremental_sync_pushes_only_the_diff(db):
+    """El diff incluye altas, cambios y bajas de la plataforma"""
+    connection = CountingConnection(db)
+    sync = SyncManager(connection, batch_size=50, dialect=SQLiteDialect())
+
+    first = sync.sync_platform_incremental('netflix', make_movies(100))
+    assert first['diff'] == {'added': 100, 'changed': 0, 'removed': 0, 'unchanged': 0}
+    assert first['inserted'] == 100
+
+    connection.statements = 0
+    again = sync.sync_platform_incremental('netflix', iter(make_movies(100)))
+    assert again['diff'] == {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 100}
+    assert connection.statements == 0
+
+    catalogue = make_movies(95, start=5) + make_movies(2, start=100)
+    catalogue[0]['rating'] = 8.8
+    result = sync.sync_platform_incremental('netflix', catalogue)
+    assert result['diff'] == {'added': 2, 'changed': 1, 'removed': 5, 'unchanged': 94}
+    assert (result['inserted'], result['updated'], result['removed']) == (2, 1, 5)
+
+    links = db.execute('SELECT COUNT(*) FROM movies_platforms WHERE platform_id = 1').fetchone()[0]
+    assert links == 97
+    assert db.execute('SELECT rating FROM movies WHERE tmdb_id = 1005').fetchone()[0] == 8.8
+
+
+def test_incremental_sync_keeps_the_last_duplicate(db):
+    """Con una película repetida, BD y snapshot reciben la misma copia (la última)"""
+    sync = SyncManager(db)
+    sync.sync_platform_incremental('prime', make_movies(3))
+
+    retitled = dict(make_movies(1)[0], title='Película 0 (remasterizada)')
+    result = sync.sync_platform_incremental('prime', make_movies(3) + [retitled])
+    assert result['diff'] == {'added': 0, 'changed': 1, 'removed': 0, 'unchanged': 2}
+    assert db.execute('SELECT title FROM movies WHERE tmdb_id = 1000').fetchone()[0] == retitled['title']
+
+    reverted = sync.sync_platform_incremental('prime', [retitled] + make_movies(3))
+    assert reverted['diff']['changed'] == 1
+    assert db.execute('SELECT title FROM movies WHERE tmdb_id = 1000').fetchone()[0] == 'Película 0'
+    assert sync.sync_platform_incremental('prime', make_movies(3))['diff']['unchanged'] == 3
+
+
+def test_incremental_sync_retries_failed_batches(db):
+    """Un lote revertido no entra en el snapshot y se reintenta en la siguiente pasada"""
+    sync = SyncManager(db, batch_size=10)
+    original = sync._sync_batch
+
+    def broken_batch(*args):
+        raise RuntimeError('BD caída')
+
+    sync._sync_batch = broken_batch
+
+    failed = sync.sync_platform_incremental('hbo', make_movies(10))
+    assert failed['failed'] == 10
+    assert sync.cache.load_snapshot('hbo') == {}
+
+    sync._sync_batch = original
+    retried = sync.sync_platform_incremental('hbo', make_movies(10))
+    assert retried['diff']['added'] == 10
+    assert retried['inserted'] == 10
+
+
+def test_connection_pool_leases_per_thread_and_recycles(tmp_path):
+    """Mismo hilo, misma conexión; se recicla por antigüedad y por health check"""
+    path = str(tmp_path / 'popflix.db')
+    pool = ConnectionPool(lambda: create_sqlite_database(path), size=2, health_check_interval=0)
+
+    with pool.lease() as outer, pool.lease() as inner:
+        assert outer is inner
+        seen = []
+
+        def other_thread():
+            with pool.lease() as entry:
+                seen.append(entry)
+
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+        assert seen[0] is not outer
+    assert pool.stats['created'] == 2
+
+    # Conexión caída mientras estaba libre: se detecta al prestarla
+    with pool.lease() as entry:
+        dead = entry
+    dead.connection.close()
+    with pool.lease() as entry:
+        assert entry is not dead
+        entry.connection.execute('SELECT 1')
+    assert pool.stats['health_check_failures'] == 1
+
+    pool.max_lifetime = 0
+    with pool.lease():
+        pass
+    assert pool.stats['recycled'] == 1
+    assert pool.stats['created'] == 4
+
+    # Cerrar con una conexión prestada: al devolverla se descuenta igual
+    with pool.lease():
+        pool.close()
+    assert pool._open == 0
+
+
+def test_parallel_sync_with_pool(tmp_path, monkeypatch):
+    """Varias plataformas en paralelo con conexiones del pool y sentencias reutilizadas"""
+    monkeypatch.setattr(CacheManager, 'CACHE_DIR', str(tmp_path))
+    path = str(tmp_path / 'popflix.db')
+    create_sqlite_database(path).close()
+
+    cache = CacheManager()
+    platforms = ['netflix', 'prime', 'disney']
+    for platform in platforms:
+        with cache.open_cache_writer(platform) as writer:
+            writer.write_many(make_movies(120))
+
+    with ConnectionPool(lambda: create_sqlite_database(path), size=3) as pool:
+        results = SyncManager(pool, batch_size=40).sync_platforms(platforms)
+
+        assert all(r['failed'] == 0 for r in results.values())
+        # Qué plataforma inserta cada película compartida depende del orden de los threads
+        assert sum(r['inserted'] + r['updated'] for r in results.values()) == 360
+        assert all(r['diff']['added'] == 120 for r in results.values())
+
+        with pool.lease() as entry:
+            links = entry.connection.execute('SELECT COUNT(*) FROM movies_platforms').fetchone()[0]
+            movies = entry.connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+        assert links == 360
+        assert movies == 120
+        assert pool.stats['created'] <= 3
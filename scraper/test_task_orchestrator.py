@@ -0,0 +1,372 @@
+"""
+Pruebas del orquestador con reloj falso
+"""
+
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from task_orchestrator import ScheduleConfig, TaskOrchestrator, next_due
+
+
+class FakeClock:
+    """Reloj que solo avanza cuando el orquestador espera"""
+
+    def __init__(self, start=datetime(2026, 10, 18, 1, 0)):
+        self.now = start
+        self.waits = []
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, seconds):
+        self.waits.append(seconds)
+        self.now += timedelta(seconds=seconds)
+        return False
+
+
+def wait_idle(orchestrator, timeout=5):
+    """Esperar (tiempo real) a que no quede ninguna tarea en marcha"""
+    deadline = time.monotonic() + timeout
+    while orchestrator.get_status()['running']:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_next_due():
+    monday = datetime(2026, 10, 19, 10, 30)
+
+    assert next_due('daily', '02:00', monday) == datetime(2026, 10, 20, 2, 0)
+    assert next_due('daily', '11:00', monday) == datetime(2026, 10, 19, 11, 0)
+    assert next_due('hourly', ':15', monday) == datetime(2026, 10, 19, 11, 15)
+    assert next_due('hourly', 'Every hour', monday) == datetime(2026, 10, 19, 11, 30)
+    assert next_due('weekly', 'Sunday 03:00', monday) == datetime(2026, 10, 25, 3, 0)
+    assert next_due(90, None, monday) == datetime(2026, 10, 19, 10, 31, 30)
+    with pytest.raises(ValueError):
+        next_due('monthly', '02:00', monday)
+
+
+def test_sleeps_until_next_due_job_without_drift():
+    """El bucle despierta justo a la hora de cada tarea: sin sondeo ni retraso"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(clock=clock, wait=clock.wait)
+    calls = []
+    orchestrator.schedule_task('scrape', lambda: calls.append('scrape'), 'daily', '02:00')
+    orchestrator.schedule_task('health', lambda: calls.append('health'), 'hourly', ':30')
+
+    orchestrator.run(until=datetime(2026, 10, 18, 4, 0))
+    orchestrator.stop()
+
+    assert clock.waits == [1800, 1800, 1800, 3600, 1800]
+    assert sorted(calls) == ['health'] * 3 + ['scrape']
+    status = orchestrator.get_status()
+    assert status['stats']['max_latency_seconds'] == 0.0
+    assert status['tasks'][0]['last_run'] == '2026-10-18T02:00:00'
+
+
+def test_long_task_does_not_block_others_and_overlaps_are_skipped():
+    """El health check corre durante el scraping; el scraping no se solapa consigo mismo"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(max_workers=4, clock=clock, wait=clock.wait)
+    release = threading.Event()
+    health_runs = threading.Semaphore(0)
+    orchestrator.schedule_task('scrape', lambda: release.wait(5), 600)
+    # El reloj falso avanza sin esperar a los threads: el health check admite solapes
+    orchestrator.schedule_task('health', health_runs.release, 300, max_concurrency=6)
+
+    orchestrator.run(until=clock.now + timedelta(seconds=1800))
+
+    for _ in range(6):
+        assert health_runs.acquire(timeout=2)
+    status = orchestrator.get_status()
+    scrape, health = status['tasks']
+    assert scrape['running'] == 1
+    assert scrape['skipped'] == 2
+    assert scrape['max_running'] == 1
+    assert status['stats']['max_running'] >= 2
+    assert health['skipped'] == 0
+
+    release.set()
+    orchestrator.stop()
+    assert orchestrator.get_status()['tasks'][0]['runs'] == 1
+
+
+def test_queue_policy_runs_as_soon_as_a_slot_frees():
+    """Con overlap='queue' la ejecución pendiente arranca al terminar la anterior"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(clock=clock, wait=clock.wait)
+    releases = [threading.Event(), threading.Event()]
+    started = []
+    finished = threading.Event()
+
+    def task():
+        started.append(clock())
+        releases[len(started) - 1].wait(2)
+        if len(started) == 2:
+            finished.set()
+
+    orchestrator.schedule_task('sync', task, 60, overlap='queue')
+    orchestrator.run(until=clock.now + timedelta(seconds=150))
+    assert len(started) == 1
+
+    releases[0].set()
+    releases[1].set()
+    while orchestrator.get_status()['tasks'][0]['runs'] < 1:
+        time.sleep(0.01)
+    orchestrator.run_pending()
+    assert finished.wait(2)
+    orchestrator.stop()
+
+    task_status = orchestrator.get_status()['tasks'][0]
+    assert task_status['runs'] == 2
+    assert task_status['skipped'] == 0
+    assert task_status['max_latency_seconds'] == 30.0
+
+
+def test_dag_runs_branches_in_parallel_and_downstream_right_after_upstream():
+    """Cada sync arranca al acabar su scraping, sin esperar a la otra rama"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(clock=clock, wait=clock.wait)
+    order = []
+    netflix_done = threading.Event()
+    release_prime = threading.Event()
+
+    def scrape_prime():
+        order.append('scrape prime')
+        release_prime.wait(5)
+
+    def sync_netflix():
+        order.append('sync netflix')
+        netflix_done.set()
+
+    orchestrator.schedule_config(ScheduleConfig.get_platform_pipeline(['netflix', 'prime']), {
+        'scraping_netflix': lambda: order.append('scrape netflix'),
+        'sync_netflix': sync_netflix,
+        'scraping_prime': scrape_prime,
+        'sync_prime': lambda: order.append('sync prime'),
+        'report': lambda: order.append('report')
+    })
+    orchestrator.run(until=datetime(2026, 10, 18, 2, 0))
+
+    assert netflix_done.wait(5)
+    assert 'sync prime' not in order and 'report' not in order
+    release_prime.set()
+    wait_idle(orchestrator)
+    orchestrator.stop()
+
+    assert order.index('sync netflix') > order.index('scrape netflix')
+    assert order.index('sync prime') > order.index('scrape prime')
+    assert order[-1] == 'report'
+    tasks = {t['name']: t for t in orchestrator.get_status()['tasks']}
+    assert tasks['Sincronización prime']['next_run'] is None
+    assert tasks['Sincronización prime']['last_latency_seconds'] == 0.0
+    assert tasks['Informe del pipeline']['runs'] == 1
+
+
+def test_failed_upstream_skips_everything_downstream():
+    """Si falla un scraping no se sincroniza esa plataforma ni se genera el informe"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(clock=clock, wait=clock.wait)
+    ran = []
+
+    def broken():
+        raise RuntimeError('Selenium caído')
+
+    pipeline = ScheduleConfig.get_platform_pipeline(['netflix', 'prime'])
+    for entry in pipeline.values():
+        entry.pop('policy', None)  # sin reintentos: el primer fallo es definitivo
+    orchestrator.schedule_config(pipeline, {
+        'scraping_netflix': lambda: ran.append('scrape netflix'),
+        'sync_netflix': lambda: ran.append('sync netflix'),
+        'scraping_prime': broken,
+        'sync_prime': lambda: ran.append('sync prime'),
+        'report': lambda: ran.append('report')
+    })
+    orchestrator.run(until=datetime(2026, 10, 18, 2, 0))
+    wait_idle(orchestrator)
+    orchestrator.stop()
+
+    assert sorted(ran) == ['scrape netflix', 'sync netflix']
+    status = orchestrator.get_status()
+    tasks = {t['name']: t for t in status['tasks']}
+    assert tasks['Scraping prime']['failures'] == 1
+    assert tasks['Sincronización prime']['upstream_failed'] == 1
+    assert tasks['Informe del pipeline']['upstream_failed'] == 1
+    assert tasks['Informe del pipeline']['runs'] == 0
+    assert status['stats']['upstream_failed'] == 2
+
+
+def test_dependencies_must_exist():
+    orchestrator = TaskOrchestrator()
+    orchestrator.schedule_task('scrape', lambda: None)
+
+    with pytest.raises(ValueError):
+        orchestrator.schedule_task('sync', lambda: None, depends_on=['scraping'])
+    with pytest.raises(ValueError):
+        orchestrator.schedule_task('scrape', lambda: None)
+
+
+class InlineExecutor(Executor):
+    """Ejecuta cada tarea en el momento: resultados deterministas con el reloj falso"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def test_downstream_needs_every_upstream_in_the_same_cycle():
+    """Un éxito del día anterior no cuenta: R solo corre cuando A, B y C terminan bien el mismo día"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(executor=InlineExecutor(), clock=clock, wait=clock.wait)
+    failures = {('b', 0), ('c', 1)}
+    order = []
+
+    def upstream(name):
+        def run():
+            day = (clock().date() - datetime(2026, 10, 18).date()).days
+            order.append((name, day))
+            if (name, day) in failures:
+                raise RuntimeError(f'{name} falla el día {day}')
+        return run
+
+    for name in 'abc':
+        orchestrator.schedule_task(name, upstream(name), 'daily', '02:00')
+    orchestrator.schedule_task('R', lambda: order.append(('R', clock().day - 18)), depends_on=['a', 'b', 'c'])
+    orchestrator.run(until=datetime(2026, 10, 20, 3, 0))
+
+    assert order == [('a', 0), ('b', 0), ('c', 0), ('a', 1), ('b', 1), ('c', 1),
+                     ('a', 2), ('b', 2), ('c', 2), ('R', 2)]
+    report = orchestrator.get_status()['tasks'][-1]
+    assert (report['runs'], report['upstream_failed']) == (1, 2)
+
+    orchestrator.schedule_task('health', lambda: None, 'hourly', ':00')
+    with pytest.raises(ValueError):
+        orchestrator.schedule_task('mixed', lambda: None, depends_on=['a', 'health'])
+
+
+def test_transient_failure_is_retried_with_exponential_backoff():
+    """Dos fallos a las 02:00 se reintentan a los 60s y 120s, no al día siguiente"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(executor=InlineExecutor(), clock=clock, wait=clock.wait)
+    attempts = []
+
+    def flaky():
+        attempts.append(clock())
+        if len(attempts) < 3:
+            raise ConnectionError('Netflix no responde')
+
+    orchestrator.schedule_task('scrape', flaky, 'daily', '02:00', max_retries=3, backoff_base=60, jitter=False)
+    orchestrator.schedule_task('sync', lambda: None, depends_on=['scrape'])
+    orchestrator.run(until=datetime(2026, 10, 18, 2, 30))
+
+    assert attempts == [datetime(2026, 10, 18, 2, 0), datetime(2026, 10, 18, 2, 1), datetime(2026, 10, 18, 2, 3)]
+    scrape, sync = orchestrator.get_status()['tasks']
+    assert (scrape['runs'], scrape['failures'], scrape['attempts'], scrape['retries']) == (1, 0, 3, 2)
+    assert scrape['last_error'] == 'ConnectionError: Netflix no responde'
+    assert scrape['last_duration_seconds'] == 0.0
+    assert sync['runs'] == 1 and sync['upstream_failed'] == 0
+
+
+def test_backoff_is_capped_and_jittered():
+    orchestrator = TaskOrchestrator(seed=3)
+    task = orchestrator.schedule_task('scrape', lambda: None, backoff_base=60, backoff_max=300)
+
+    delays = [orchestrator.backoff_delay(task, attempt) for attempt in range(1, 8)]
+    assert all(0 <= delay <= min(300, 60 * 2 ** (attempt - 1)) for attempt, delay in enumerate(delays, 1))
+    task['jitter'] = False
+    assert [orchestrator.backoff_delay(task, attempt) for attempt in (1, 2, 3, 4)] == [60, 120, 240, 300]
+
+
+def test_timeout_cancels_the_attempt_and_retries():
+    """Un intento colgado vence, recibe cancel_event y su hueco se libera para el reintento"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(clock=clock, wait=clock.wait)
+    cancelled = threading.Event()
+    attempts = []
+
+    def scrape(cancel_event):
+        attempts.append(clock())
+        if len(attempts) == 1 and cancel_event.wait(5):
+            cancelled.set()
+
+    orchestrator.schedule_task('scrape', scrape, 'daily', '02:00', timeout=600, max_retries=1,
+                               backoff_base=30, jitter=False)
+    orchestrator.run(until=datetime(2026, 10, 18, 2, 15))
+    assert cancelled.wait(5)
+    wait_idle(orchestrator)
+    orchestrator.stop()
+
+    # El reloj falso sigue avanzando mientras los hilos arrancan: la hora de
+    # cada intento se toma de lo que anota el orquestador, no de dentro de la tarea
+    assert len(attempts) == 2
+    assert orchestrator.last_run['scrape'] == datetime(2026, 10, 18, 2, 10, 30)
+    task = orchestrator.get_status()['tasks'][0]
+    assert (task['runs'], task['timeouts'], task['attempts']) == (1, 1, 2)
+    assert task['last_error'] == 'Timeout: más de 600s'
+
+
+def test_timeout_of_a_queued_attempt_does_not_deadlock():
+    """Con el pool lleno, vencer un intento aún en cola no bloquea al planificador"""
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(max_workers=1, clock=clock, wait=clock.wait)
+    release = threading.Event()
+    orchestrator.schedule_task('scrape', lambda: release.wait(5), 'daily', '02:00')
+    orchestrator.schedule_task('health', lambda: None, 'daily', '02:00', timeout=60)
+
+    runner = threading.Thread(target=orchestrator.run, kwargs={'until': datetime(2026, 10, 18, 2, 5)}, daemon=True)
+    runner.start()
+    runner.join(5)
+    assert not runner.is_alive()
+    release.set()
+    wait_idle(orchestrator)
+    orchestrator.stop()
+
+    health = orchestrator.get_status()['tasks'][1]
+    assert (health['runs'], health['timeouts']) == (0, 1)
+
+
+def test_process_pool_does_not_receive_cancel_event():
+    """Un threading.Event no viaja a otro proceso: se usa el valor por defecto o se rechaza la tarea"""
+    executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        orchestrator = TaskOrchestrator(executor=executor)
+        with pytest.raises(ValueError):
+            orchestrator.schedule_task('scrape', lambda cancel_event: None, timeout=60)
+        orchestrator.schedule_task('health', lambda cancel_event=None: None, timeout=60)
+        assert orchestrator.tasks[0]['accepts_cancel'] is False
+    finally:
+        executor.shutdown()
+
+
+def test_circuit_breaker_opens_after_consecutive_failures_and_probes_after_cooldown():
+    clock = FakeClock()
+    orchestrator = TaskOrchestrator(executor=InlineExecutor(), clock=clock, wait=clock.wait)
+    healthy = []
+
+    def platform():
+        if not healthy:
+            raise RuntimeError('HBO caído')
+
+    orchestrator.schedule_task('hbo', platform, 600, circuit_threshold=2, circuit_cooldown=1800)
+    orchestrator.schedule_task('sync hbo', lambda: None, depends_on=['hbo'])
+    start = clock.now
+    orchestrator.run(until=start + timedelta(seconds=4200))
+
+    hbo, sync = orchestrator.get_status()['tasks']
+    # 600 y 1200 fallan (se abre), 1800/2400 saltadas, 3000 prueba y falla (se reabre), 3600/4200 saltadas
+    assert (hbo['failures'], hbo['circuit_skips'], hbo['circuit']) == (3, 4, 'open')
+    assert orchestrator.get_status()['stats']['circuits_opened'] == 2
+    assert sync['upstream_failed'] == 7
+
+    healthy.append(True)
+    orchestrator.run(until=start + timedelta(seconds=4800))
+    hbo, sync = orchestrator.get_status()['tasks']
+    assert (hbo['runs'], hbo['circuit']) == (1, 'closed')
+    assert sync['runs'] == 1
@@ -0,0 +1,47 @@
+"""
+Pruebas del índice de emparejado difuso de títulos
+"""
+
+from title_matcher import TitleIndex, brute_force_match, split_title_year
+
+
+MOVIES = [
+    {'id': 1, 'title': 'El Señor de los Anillos: La Comunidad del Anillo', 'year': 2001},
+    {'id': 2, 'title': 'El Señor de los Anillos: Las Dos Torres', 'year': 2002},
+    {'id': 3, 'title': 'Dune', 'year': 1984},
+    {'id': 4, 'title': 'Dune', 'year': 2021},
+    {'id': 5, 'title': 'Solaris', 'year': None}
+]
+
+
+def test_split_title_year():
+    assert split_title_year('Dune (2021)') == ('dune', 2021)
+    assert split_title_year('Dune (2021)', 2020) == ('dune', 2020)
+    assert split_title_year('1917') == ('1917', None)
+
+
+def test_match_ranks_by_similarity():
+    """Resultados ordenados por puntuación y con erratas toleradas"""
+    index = TitleIndex(MOVIES)
+
+    matches = index.match('el senor de los anillos la comunidad del anilo', 2001, min_score=0.3)
+    assert [movie_id for movie_id, _ in matches] == [1, 2]
+    assert matches[0][1] > matches[1][1]
+
+
+def test_year_prunes_candidates():
+    """El año separa títulos iguales; sin año en TMDB casa con cualquiera"""
+    index = TitleIndex(MOVIES)
+
+    assert index.best('DUNE', 2021) == 4
+    assert index.best('Dune (1985)') == 3
+    assert index.best('Dune', 1999) is None
+    assert index.best('Solaris!', 1972) == 5
+
+
+def test_index_agrees_with_brute_force():
+    queries = [('Las dos torres', 2002), ('Dune', 2020), ('Solaris', None), ('Otra película', 2001)]
+    index = TitleIndex(MOVIES)
+
+    for title, year in queries:
+        assert index.best(title, year, min_score=0.4) == brute_force_match(MOVIES, title, year, min_score=0.4)
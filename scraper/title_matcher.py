@@ -0,0 +1,251 @@
+"""
+Emparejado difuso de títulos scrapeados con TMDB
+Demuestra: índice invertido de n-gramas, bloqueo por año, ranking por similitud
+
+Comparar cada título scrapeado con todo el catálogo es O(N×M). El índice
+guarda, para cada trigrama de título normalizado, las películas que lo
+contienen agrupadas por año; una consulta solo recorre las listas de sus
+trigramas en los años compatibles y puntúa a los candidatos con el
+coeficiente de Dice sobre trigramas, que sale directamente del recuento de
+trigramas compartidos.
+"""
+
+import random
+import re
+import time
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from consolidation import normalize_title
+
+logger = logging.getLogger(__name__)
+
+# Año al final del título: "Dune (2021)" -> "dune", 2021
+_TRAILING_YEAR = re.compile(r'\s*\b((?:18|19|20)\d{2})$')
+
+
+def split_title_year(title, year=None) -> Tuple[str, int]:
+    """Título normalizado y año (el del final del título si no se da)"""
+    normalized = normalize_title(title)
+    found = _TRAILING_YEAR.search(normalized)
+    if found and found.start() > 0:
+        normalized = normalized[:found.start()]
+        if year is None:
+            year = int(found.group(1))
+    return normalized, year
+
+
+def trigrams(normalized: str) -> frozenset:
+    """Trigramas de un título normalizado, con los bordes de palabra marcados"""
+    padded = f'  {normalized} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TitleIndex:
+    """
+    Índice de títulos TMDB para emparejado difuso
+
+    Las películas sin año se consideran compatibles con cualquier año.
+    """
+
+    def __init__(self, movies: Iterable[Dict], year_tolerance: int = 1, year_penalty: float = 0.05):
+        """
+        Construir índice
+
+        Args:
+            movies: Películas con id, title y year
+            year_tolerance: Diferencia de años aceptada entre fuentes
+            year_penalty: Puntuación restada por cada año de diferencia
+        """
+        self.year_tolerance = year_tolerance
+        self.year_penalty = year_penalty
+        self.ids = []
+        self.years = []
+        self.sizes = []
+        # trigrama -> año -> posiciones
+        self._postings = defaultdict(lambda: defaultdict(list))
+
+        for movie in movies:
+            normalized, year = split_title_year(movie.get('title'), movie.get('year'))
+            grams = trigrams(normalized)
+            position = len(self.ids)
+            self.ids.append(movie.get('id'))
+            self.years.append(year)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram][year].append(position)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _year_keys(self, year) -> list:
+        if year is None:
+            return None
+        return [year + delta for delta in range(-self.year_tolerance, self.year_tolerance + 1)] + [None]
+
+    def match(self, title: str, year: int = None, limit: int = 5, min_score: float = 0.7) -> List[Tuple[object, float]]:
+        """
+        Películas más parecidas a un título
+
+        Args:
+            title: Título scrapeado
+            year: Año scrapeado (None = el del final del título o cualquiera)
+            limit: Resultados máximos
+            min_score: Puntuación mínima (0-1)
+
+        Returns:
+            [(id TMDB, puntuación)] de mayor a menor puntuación
+        """
+        normalized, year = split_title_year(title, year)
+        grams = trigrams(normalized)
+        if not grams:
+            return []
+        year_keys = self._year_keys(year)
+
+        shared = defaultdict(int)
+        for gram in grams:
+            by_year = self._postings.get(gram)
+            if by_year is None:
+                continue
+            if year_keys is None:
+                for positions in by_year.values():
+                    for position in positions:
+                        shared[position] += 1
+            else:
+                for key in year_keys:
+                    for position in by_year.get(key, ()):
+                        shared[position] += 1
+
+        size = len(grams)
+        sizes, years = self.sizes, self.years
+        # Dice >= min_score exige compartir al menos min_score * |consulta| / 2 trigramas
+        min_shared = min_score * size / 2
+        scored = []
+        for position, count in shared.items():
+            if count < min_shared:
+                continue
+            score = 2 * count / (size + sizes[position])
+            if year is not None and years[position] is not None:
+                score -= self.year_penalty * abs(year - years[position])
+            if score >= min_score:
+                scored.append((score, position))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.ids[position], round(score, 4)) for score, position in scored[:limit]]
+
+    def best(self, title: str, year: int = None, min_score: float = 0.7):
+        """Id de la mejor coincidencia o None"""
+        matches = self.match(title, year, limit=1, min_score=min_score)
+        return matches[0][0] if matches else None
+
+
+def brute_force_match(movies: List[Dict], title: str, year: int = None,
+                      year_tolerance: int = 1, year_penalty: float = 0.05, min_score: float = 0.7):
+    """Misma puntuación que TitleIndex.best comparando contra todo el catálogo"""
+    normalized, year = split_title_year(title, year)
+    grams = trigrams(normalized)
+    best = (min_score, None)
+    for movie in movies:
+        other, other_year = split_title_year(movie.get('title'), movie.get('year'))
+        if year is not None and other_year is not None and abs(year - other_year) > year_tolerance:
+            continue
+        other_grams = trigrams(other)
+        score = 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+        if year is not None and other_year is not None:
+            score -= year_penalty * abs(year - other_year)
+        if score > best[0] or (score == best[0] and best[1] is None):
+            best = (score, movie.get('id'))
+    return best[1]
+
+
+_WORDS = (
+    'amor noche guerra ciudad sombra luz mar tierra rey reina perdido ultimo primer secreto '
+    'sangre fuego hielo viento camino casa hijo padre madre hermano tiempo sueño misterio '
+    'dark night star river lost last first secret blood fire ice wind road house son father '
+    'mother brother time dream mystery king queen city shadow light sea land war love'
+).split()
+
+
+def _perturb(title: str, rng: random.Random) -> str:
+    """Variación realista de un título: mayúsculas, puntuación, erratas, artículo, acentos"""
+    choice = rng.random()
+    if choice < 0.2:
+        return title.upper()
+    if choice < 0.4:
+        return title.replace(' ', ': ', 1) + '!'
+    if choice < 0.6 and len(title) > 6:
+        i = rng.randrange(1, len(title) - 1)
+        return title[:i] + title[i + 1:]
+    if choice < 0.8:
+        return f'El {title}'
+    return title.lower().replace('o', 'ó', 1)
+
+
+def benchmark(count: int = 50000, queries: int = 5000, brute_force_queries: int = 50, seed: int = 1) -> Dict:
+    """
+    Precisión, recall y rendimiento sobre un catálogo sintético
+
+    Las consultas son títulos del catálogo con variaciones (y a veces el año
+    desplazado uno) más un 10% de títulos que no existen.
+
+    Returns:
+        Precisión, recall, consultas/s y comparación con fuerza bruta
+    """
+    rng = random.Random(seed)
+    movies = [
+        {
+            'id': i,
+            'title': ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(2, 5))) + f' {i % 97}',
+            'year': 1970 + rng.randrange(55)
+        }
+        for i in range(count)
+    ]
+    sample = []
+    for _ in range(queries):
+        if rng.random() < 0.1:
+            sample.append((' '.join(rng.choice(_WORDS) for _ in range(4)) + ' x', 1990, None))
+        else:
+            movie = rng.choice(movies)
+            year = movie['year'] + (rng.choice((-1, 1)) if rng.random() < 0.1 else 0)
+            sample.append((_perturb(movie['title'], rng), year, movie['id']))
+
+    start = time.perf_counter()
+    index = TitleIndex(movies)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [index.best(title, year) for title, year, _ in sample]
+    match_seconds = time.perf_counter() - start
+
+    returned = sum(1 for f in found if f is not None)
+    correct = sum(1 for f, (_, _, expected) in zip(found, sample) if f is not None and f == expected)
+    positives = sum(1 for _, _, expected in sample if expected is not None)
+
+    start = time.perf_counter()
+    brute = [brute_force_match(movies, title, year) for title, year, _ in sample[:brute_force_queries]]
+    brute_each = (time.perf_counter() - start) / brute_force_queries
+
+    results = {
+        'catalogue': count,
+        'queries': queries,
+        'precision': correct / returned if returned else 0.0,
+        'recall': correct / positives if positives else 0.0,
+        'build_seconds': build_seconds,
+        'queries_per_second': queries / match_seconds,
+        'brute_force_queries_per_second': 1 / brute_each,
+        'same_as_brute_force': brute == found[:brute_force_queries]
+    }
+    results['speedup'] = results['queries_per_second'] / results['brute_force_queries_per_second']
+
+    logger.info(f"📊 Benchmark emparejado difuso ({count} títulos, {queries} consultas)")
+    logger.info(f"  Precisión {results['precision']:.3f} · recall {results['recall']:.3f}")
+    logger.info(f"  Índice: construcción {build_seconds:.2f}s · {results['queries_per_second']:.0f} consultas/s")
+    logger.info(f"  Fuerza bruta: {results['brute_force_queries_per_second']:.1f} consultas/s "
+                f"(x{results['speedup']:.0f}) · mismos resultados: {results['same_as_brute_force']}")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    benchmark()